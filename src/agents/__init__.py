@@ -1,10 +1,11 @@
 import logging
+import os
 import sys
-from typing import Literal
+from typing import Literal, Union
 
 from openai import AsyncOpenAI
 
-from . import _config
+from . import _config, _schema_cache
 from .agent import Agent
 from .agent_output import AgentOutputSchema
 from .computer import AsyncComputer, Button, Computer, Environment
@@ -25,6 +26,7 @@ from .guardrail import (
     input_guardrail,
     output_guardrail,
 )
+from .handoff_router import HandoffRouter
 from .handoffs import Handoff, HandoffInputData, HandoffInputFilter, handoff
 from .items import (
     HandoffCallItem,
@@ -39,20 +41,33 @@ from .items import (
     TResponseInputItem,
 )
 from .lifecycle import AgentHooks, RunHooks
+from .metrics import AgentMetrics, MetricsRegistry
 from .model_settings import ModelSettings
 from .models.interface import Model, ModelProvider, ModelTracing
 from .models.openai_chatcompletions import OpenAIChatCompletionsModel
 from .models.openai_provider import OpenAIProvider
 from .models.openai_responses import OpenAIResponsesModel
+from .resources import (
+    Resource,
+    ResourceRegistry,
+    get_default_resource_registry,
+    resource,
+    set_default_resource_registry,
+)
 from .result import RunResult, RunResultStreaming
 from .run import RunConfig, Runner
 from .run_context import RunContextWrapper, TContext
+from .schema_compaction import CompactedSchema, compact_json_schema
+from .stream_buffer import TextDeltaCoalescing
 from .stream_events import (
     AgentUpdatedStreamEvent,
+    PartialOutputStreamEvent,
     RawResponsesStreamEvent,
     RunItemStreamEvent,
     StreamEvent,
+    ToolProgressStreamEvent,
 )
+from .timing import RunTimings, ToolTiming, TurnTiming
 from .tool import (
     ComputerTool,
     FileSearchTool,
@@ -62,6 +77,10 @@ from .tool import (
     default_tool_error_function,
     function_tool,
 )
+from .tool_output_store import ToolOutputPolicy, ToolOutputStore
+from .tool_policy import ToolPolicy
+from .tool_progress import report_tool_progress
+from .tool_selection import ToolSelection
 from .tracing import (
     AgentSpanData,
     CustomSpanData,
@@ -90,6 +109,7 @@ from .tracing import (
     trace,
 )
 from .usage import Usage
+from .watchdog import EventLoopWatchdog, StallReport
 
 
 def set_default_openai_key(key: str) -> None:
@@ -121,6 +141,14 @@ def set_default_openai_api(api: Literal["chat_completions", "responses"]) -> Non
     _config.set_default_openai_api(api)
 
 
+def set_function_schema_cache_dir(path: Union[str, os.PathLike[str], None]) -> None:
+    """Set a directory in which to cache the schemas generated for function tools, so that they
+    aren't generated again every time the process starts. Pass None to disable the cache. You can
+    also set the OPENAI_AGENTS_FUNCTION_SCHEMA_CACHE_DIR environment variable.
+    """
+    _schema_cache.set_cache_dir(path)
+
+
 def enable_verbose_stdout_logging():
     """Enables verbose logging to stdout. This is useful for debugging."""
     for name in ["openai.agents", "openai.agents.tracing"]:
@@ -161,6 +189,7 @@ __all__ = [
     "Handoff",
     "HandoffInputData",
     "HandoffInputFilter",
+    "HandoffRouter",
     "TResponseInputItem",
     "MessageOutputItem",
     "ModelResponse",
@@ -175,6 +204,8 @@ __all__ = [
     "RunHooks",
     "AgentHooks",
     "RunContextWrapper",
+    "CompactedSchema",
+    "compact_json_schema",
     "TContext",
     "RunResult",
     "RunResultStreaming",
@@ -182,14 +213,34 @@ __all__ = [
     "RawResponsesStreamEvent",
     "RunItemStreamEvent",
     "AgentUpdatedStreamEvent",
+    "PartialOutputStreamEvent",
     "StreamEvent",
+    "ToolProgressStreamEvent",
+    "report_tool_progress",
+    "TextDeltaCoalescing",
     "FunctionTool",
     "ComputerTool",
     "FileSearchTool",
     "Tool",
     "WebSearchTool",
+    "ToolSelection",
+    "ToolOutputPolicy",
+    "ToolOutputStore",
+    "ToolPolicy",
     "function_tool",
     "Usage",
+    "RunTimings",
+    "Resource",
+    "ResourceRegistry",
+    "resource",
+    "get_default_resource_registry",
+    "set_default_resource_registry",
+    "TurnTiming",
+    "ToolTiming",
+    "AgentMetrics",
+    "MetricsRegistry",
+    "EventLoopWatchdog",
+    "StallReport",
     "add_trace_processor",
     "agent_span",
     "custom_span",
@@ -215,6 +266,7 @@ __all__ = [
     "set_default_openai_key",
     "set_default_openai_client",
     "set_default_openai_api",
+    "set_function_schema_cache_dir",
     "set_tracing_export_api_key",
     "enable_verbose_stdout_logging",
     "gen_trace_id",
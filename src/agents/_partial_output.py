@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+import json
+import re
+from typing import Any
+
+from openai.types.responses import ResponseTextDeltaEvent
+
+from .agent_output import AgentOutputSchema
+from .exceptions import ModelBehaviorError
+from .items import TResponseStreamEvent
+
+_WHITESPACE = frozenset(" \t\n\r")
+_STRING_SPECIAL = re.compile(r'["\\]')
+_TOKEN_END = re.compile(r"[\s,\]}]")
+
+# Parser states
+_VALUE = 0  # Expecting a value
+_VALUE_OR_END = 1  # Expecting a value, or the end of an empty array
+_KEY = 2  # Expecting a key
+_KEY_OR_END = 3  # Expecting a key, or the end of an empty object
+_IN_KEY = 4  # Inside a key
+_COLON = 5  # Expecting the colon after a key
+_IN_STRING = 6  # Inside a string value
+_IN_TOKEN = 7  # Inside a number, true, false or null
+_AFTER_VALUE = 8  # Expecting a comma or the end of the enclosing object or array
+
+
+class PartialJSONParser:
+    """Parses a JSON document as it streams in. Each chunk is only scanned once, and the values are
+    built up in place, so the cost of parsing doesn't grow with the length of what was already
+    parsed. `snapshot()` returns the value parsed so far.
+    """
+
+    def __init__(self) -> None:
+        self.failed = False
+        """Whether the document turned out to be invalid JSON. Once set, the rest is ignored."""
+
+        self._root: Any = None
+        self._has_root = False
+        self._containers: list[dict[str, Any] | list[Any]] = []
+        # The key currently being filled in, for each object in `_containers`
+        self._keys: list[str | None] = []
+        self._state = _VALUE
+        # The raw contents of the current string, with escapes as-is
+        self._string: list[str] = []
+        # An incomplete escape sequence at the end of `_string`
+        self._escape = ""
+        self._token: list[str] = []
+
+    def feed(self, chunk: str) -> None:
+        """Parses the next chunk of the document."""
+        i, n = 0, len(chunk)
+        while i < n and not self.failed:
+            state = self._state
+            if state == _IN_STRING or state == _IN_KEY:
+                i = self._feed_string(chunk, i)
+                continue
+
+            if state == _IN_TOKEN:
+                match = _TOKEN_END.search(chunk, i)
+                end = match.start() if match else n
+                self._token.append(chunk[i:end])
+                i = end
+                if match:
+                    self._end_token()
+                continue
+
+            c = chunk[i]
+            i += 1
+            if c in _WHITESPACE:
+                continue
+
+            if state == _VALUE or state == _VALUE_OR_END:
+                if c == "{":
+                    self._start_container({})
+                    self._state = _KEY_OR_END
+                elif c == "[":
+                    self._start_container([])
+                    self._state = _VALUE_OR_END
+                elif c == '"':
+                    # The string is added right away, and updated as it's parsed
+                    self._add_value("")
+                    self._string = []
+                    self._state = _IN_STRING
+                elif c in "-0123456789tfn":
+                    self._token = [c]
+                    self._state = _IN_TOKEN
+                elif c == "]" and state == _VALUE_OR_END:
+                    self._end_container()
+                else:
+                    self.failed = True
+            elif state == _KEY or state == _KEY_OR_END:
+                if c == '"':
+                    self._string = []
+                    self._state = _IN_KEY
+                elif c == "}" and state == _KEY_OR_END:
+                    self._end_container()
+                else:
+                    self.failed = True
+            elif state == _COLON:
+                if c == ":":
+                    self._state = _VALUE
+                else:
+                    self.failed = True
+            elif state == _AFTER_VALUE and self._containers:
+                container = self._containers[-1]
+                if c == ",":
+                    self._state = _KEY if isinstance(container, dict) else _VALUE
+                elif c == ("}" if isinstance(container, dict) else "]"):
+                    self._end_container()
+                else:
+                    self.failed = True
+            else:
+                # Anything other than whitespace after the document
+                self.failed = True
+
+    def snapshot(self) -> Any:
+        """Returns a copy of the value parsed so far, or None if no value has started. Incomplete
+        strings are included as far as they've been parsed. Incomplete numbers, `true`, `false` and
+        `null`, and keys without a value yet, are left out.
+        """
+        if self._state == _IN_STRING and not self.failed:
+            self._set_last_value(self._decode_string())
+        return _copy(self._root)
+
+    def _feed_string(self, chunk: str, i: int) -> int:
+        n = len(chunk)
+        while i < n:
+            if self._escape:
+                self._escape += chunk[i]
+                i += 1
+                if len(self._escape) == 6 or (len(self._escape) == 2 and self._escape[1] != "u"):
+                    self._string.append(self._escape)
+                    self._escape = ""
+                continue
+
+            match = _STRING_SPECIAL.search(chunk, i)
+            if match is None:
+                self._string.append(chunk[i:])
+                return n
+
+            self._string.append(chunk[i : match.start()])
+            i = match.end()
+            if match.group() == "\\":
+                self._escape = "\\"
+                continue
+
+            value = self._decode_string()
+            if self.failed:
+                return n
+            if self._state == _IN_KEY:
+                self._keys[-1] = value
+                self._state = _COLON
+            else:
+                self._set_last_value(value)
+                self._state = _AFTER_VALUE
+            return i
+        return i
+
+    def _decode_string(self) -> str:
+        try:
+            return json.loads('"' + "".join(self._string) + '"', strict=False)  # type: ignore
+        except ValueError:
+            self.failed = True
+            return ""
+
+    def _end_token(self) -> None:
+        try:
+            value = json.loads("".join(self._token))
+        except ValueError:
+            self.failed = True
+            return
+        self._add_value(value)
+        self._state = _AFTER_VALUE
+
+    def _start_container(self, container: dict[str, Any] | list[Any]) -> None:
+        self._add_value(container)
+        self._containers.append(container)
+        self._keys.append(None)
+
+    def _end_container(self) -> None:
+        self._containers.pop()
+        self._keys.pop()
+        self._state = _AFTER_VALUE
+
+    def _add_value(self, value: Any) -> None:
+        if not self._containers:
+            if self._has_root:
+                self.failed = True
+            self._root = value
+            self._has_root = True
+            return
+
+        container = self._containers[-1]
+        if isinstance(container, list):
+            container.append(value)
+        else:
+            container[self._keys[-1]] = value  # type: ignore[index]
+
+    def _set_last_value(self, value: Any) -> None:
+        """Replaces the value that was added last, i.e. the string being parsed."""
+        if not self._containers:
+            self._root = value
+            return
+
+        container = self._containers[-1]
+        if isinstance(container, list):
+            container[-1] = value
+        else:
+            container[self._keys[-1]] = value  # type: ignore[index]
+
+
+def _copy(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _copy(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy(v) for v in value]
+    return value
+
+
+class PartialOutputTracker:
+    """Follows the output text of a streamed turn as it's generated, and for agents with an
+    `output_type`, parses it into the partial final output.
+    """
+
+    def __init__(self, output_schema: AgentOutputSchema | None):
+        self.output_schema = (
+            output_schema if output_schema and not output_schema.is_plain_text() else None
+        )
+        self.changed = False
+        """Whether the output changed since `mark_seen()` was last called."""
+
+        self.text_length = 0
+        """The length of the output text generated so far."""
+
+        self._content: tuple[str, int, int] | None = None
+        self._text: list[str] = []
+        self._parser = PartialJSONParser() if self.output_schema else None
+
+    def add(self, event: TResponseStreamEvent) -> None:
+        """Adds an event from the model. Only output text deltas are used."""
+        if not isinstance(event, ResponseTextDeltaEvent):
+            return
+
+        content = (event.item_id, event.output_index, event.content_index)
+        if content != self._content:
+            # Only the latest output text can be the final output
+            self._content = content
+            self._text = []
+            self.text_length = 0
+            self._parser = PartialJSONParser() if self.output_schema else None
+
+        self._text.append(event.delta)
+        self.text_length += len(event.delta)
+        if self._parser:
+            self._parser.feed(event.delta)
+        self.changed = True
+
+    def mark_seen(self) -> None:
+        self.changed = False
+
+    @property
+    def text(self) -> str:
+        """The output text generated so far."""
+        if len(self._text) > 1:
+            self._text = ["".join(self._text)]
+        return self._text[0] if self._text else ""
+
+    def partial_json(self) -> Any:
+        """The JSON parsed from the output text so far, or None if there isn't any (or it's not
+        valid JSON)."""
+        if not self._parser or self._parser.failed:
+            return None
+        return self._parser.snapshot()
+
+    def current_output(self) -> Any:
+        """The output so far: the text for plain text outputs, otherwise the validated partial
+        output. None if there isn't any valid output yet."""
+        if self.output_schema is None:
+            return self.text if self.text_length else None
+        return self.partial_output(self.partial_json())
+
+    def partial_output(self, json_value: Any) -> Any:
+        """Validates the partial JSON against the output type. Returns None if it isn't valid yet,
+        e.g. because a required field hasn't been generated."""
+        if self.output_schema is None or json_value is None:
+            return None
+        try:
+            return self.output_schema.validate_partial_python(json_value)
+        except ModelBehaviorError:
+            return None
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
 import asyncio
+import json
+import time
+from collections.abc import Awaitable
 from dataclasses import dataclass
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, Callable
 
 from openai.types.responses import (
     ResponseComputerToolCall,
@@ -28,9 +31,20 @@ from openai.types.responses.response_reasoning_item import ResponseReasoningItem
 from . import _utils
 from .agent import Agent
 from .agent_output import AgentOutputSchema
+from .background_tools import (
+    AWAIT_TOOL_NAME,
+    start_background_tool_call,
+    undelivered_background_tool_calls,
+)
 from .computer import AsyncComputer, Computer
-from .exceptions import AgentsException, ModelBehaviorError, UserError
+from .exceptions import (
+    AgentsException,
+    ModelBehaviorError,
+    OutputGuardrailTripwireTriggered,
+    UserError,
+)
 from .guardrail import InputGuardrail, InputGuardrailResult, OutputGuardrail, OutputGuardrailResult
+from .handoff_router import ROUTER_TOOL_NAME, route_handoffs
 from .handoffs import Handoff, HandoffInputData
 from .items import (
     HandoffCallItem,
@@ -46,10 +60,14 @@ from .items import (
 )
 from .lifecycle import RunHooks
 from .logger import logger
+from .metrics import AgentMetrics, _tool_errors
 from .models.interface import ModelTracing
 from .run_context import RunContextWrapper, TContext
-from .stream_events import RunItemStreamEvent, StreamEvent
-from .tool import ComputerTool, FunctionTool
+from .stream_events import RunItemStreamEvent, StreamEvent, ToolProgressStreamEvent
+from .timing import ToolTiming, measure
+from .tool import ComputerTool, FunctionTool, Tool
+from .tool_progress import ToolProgressReporter, set_tool_progress_reporter
+from .tool_selection import unavailable_tool
 from .tracing import (
     SpanError,
     Trace,
@@ -59,8 +77,10 @@ from .tracing import (
     handoff_span,
     trace,
 )
+from .watchdog import blocking_call
 
 if TYPE_CHECKING:
+    from ._partial_output import PartialOutputTracker
     from .run import RunConfig
 
 
@@ -75,6 +95,9 @@ QUEUE_COMPLETE_SENTINEL = QueueCompleteSentinel()
 class ToolRunHandoff:
     handoff: Handoff
     tool_call: ResponseFunctionToolCall
+    arguments: str | None = None
+    """The arguments to invoke the handoff with, if not the tool call's, e.g. when the model called
+    the handoff routing tool."""
 
 
 @dataclass
@@ -159,6 +182,24 @@ def get_model_tracing_impl(
         return ModelTracing.ENABLED_WITHOUT_DATA
 
 
+def _tool_progress_emitter(
+    on_tool_progress: Callable[[StreamEvent], None],
+    tool_run: ToolRunFunction,
+    agent: Agent[Any],
+) -> Callable[[Any], None]:
+    def emit(progress: Any) -> None:
+        on_tool_progress(
+            ToolProgressStreamEvent(
+                progress=progress,
+                tool_name=tool_run.function_tool.name,
+                call_id=tool_run.tool_call.call_id,
+                agent=agent,
+            )
+        )
+
+    return emit
+
+
 class RunImpl:
     @classmethod
     async def execute_tools_and_side_effects(
@@ -175,6 +216,66 @@ class RunImpl:
         hooks: RunHooks[TContext],
         context_wrapper: RunContextWrapper[TContext],
         run_config: RunConfig,
+        event_queue: asyncio.Queue[StreamEvent | QueueCompleteSentinel] | None = None,
+    ) -> SingleStepResult:
+        """Runs the tools, handoffs and hooks for a model response. If an `event_queue` is given
+        (in streamed runs), the step's items are streamed to it: the tool calls before the tools
+        run, each tool output as soon as its tool completes, and the rest once the step is done.
+        """
+        streamed_items: set[int] = set()
+        on_tool_output: Callable[[RunItem], None] | None = None
+        on_tool_progress: Callable[[StreamEvent], None] | None = None
+        if event_queue is not None and (
+            processed_response.functions or processed_response.computer_actions
+        ):
+            queue = event_queue
+            cls.stream_items_to_queue(processed_response.new_items, queue)
+            streamed_items.update(id(item) for item in processed_response.new_items)
+
+            def on_tool_output(item: RunItem) -> None:
+                streamed_items.add(id(item))
+                cls.stream_items_to_queue([item], queue)
+
+            include = getattr(queue, "include", None)
+            if include is None or "tool_progress_stream_event" in include:
+                on_tool_progress = queue.put_nowait
+
+        step_result = await cls._execute_tools_and_side_effects(
+            agent=agent,
+            original_input=original_input,
+            pre_step_items=pre_step_items,
+            new_response=new_response,
+            processed_response=processed_response,
+            output_schema=output_schema,
+            hooks=hooks,
+            context_wrapper=context_wrapper,
+            run_config=run_config,
+            on_tool_output=on_tool_output,
+            on_tool_progress=on_tool_progress,
+        )
+
+        if event_queue is not None:
+            cls.stream_items_to_queue(
+                [item for item in step_result.new_step_items if id(item) not in streamed_items],
+                event_queue,
+            )
+        return step_result
+
+    @classmethod
+    async def _execute_tools_and_side_effects(
+        cls,
+        *,
+        agent: Agent[TContext],
+        original_input: str | list[TResponseInputItem],
+        pre_step_items: list[RunItem],
+        new_response: ModelResponse,
+        processed_response: ProcessedResponse,
+        output_schema: AgentOutputSchema | None,
+        hooks: RunHooks[TContext],
+        context_wrapper: RunContextWrapper[TContext],
+        run_config: RunConfig,
+        on_tool_output: Callable[[RunItem], None] | None,
+        on_tool_progress: Callable[[StreamEvent], None] | None = None,
     ) -> SingleStepResult:
         # Make a copy of the generated items
         pre_step_items = list(pre_step_items)
@@ -183,24 +284,34 @@ class RunImpl:
         new_step_items.extend(processed_response.new_items)
 
         # First, lets run the tool calls - function tools and computer actions
-        function_results, computer_results = await asyncio.gather(
-            cls.execute_function_tool_calls(
-                agent=agent,
-                tool_runs=processed_response.functions,
-                hooks=hooks,
-                context_wrapper=context_wrapper,
-                config=run_config,
-            ),
-            cls.execute_computer_actions(
-                agent=agent,
-                actions=processed_response.computer_actions,
-                hooks=hooks,
-                context_wrapper=context_wrapper,
-                config=run_config,
-            ),
-        )
+        with measure(context_wrapper.timings, "tools"):
+            function_results, computer_results = await asyncio.gather(
+                cls.execute_function_tool_calls(
+                    agent=agent,
+                    tool_runs=processed_response.functions,
+                    hooks=hooks,
+                    context_wrapper=context_wrapper,
+                    config=run_config,
+                    on_tool_output=on_tool_output,
+                    on_tool_progress=on_tool_progress,
+                ),
+                cls.execute_computer_actions(
+                    agent=agent,
+                    actions=processed_response.computer_actions,
+                    hooks=hooks,
+                    context_wrapper=context_wrapper,
+                    config=run_config,
+                    on_tool_output=on_tool_output,
+                ),
+            )
         new_step_items.extend(function_results)
         new_step_items.extend(computer_results)
+        # Outputs of background tools that have completed are added to the conversation
+        new_step_items.extend(
+            await cls.collect_background_tool_outputs(
+                agent=agent, context_wrapper=context_wrapper, config=run_config
+            )
+        )
 
         # Second, check if there are any handoffs
         if run_handoffs := processed_response.handoffs:
@@ -227,6 +338,27 @@ class RunImpl:
         # There are two possibilities that lead to a final output:
         # 1. Structured output schema => always leads to a final output
         # 2. Plain text output schema => only leads to a final output if there are no tool calls
+        if output_schema and not output_schema.is_plain_text():
+            is_final_output = bool(potential_final_output_text)
+        else:
+            is_final_output = not processed_response.has_tools_to_run()
+
+        if is_final_output and undelivered_background_tool_calls(context_wrapper):
+            # The run can't end while background tools are running. Once they complete, the model
+            # runs again, with their outputs.
+            new_step_items.extend(
+                await cls.collect_background_tool_outputs(
+                    agent=agent, context_wrapper=context_wrapper, config=run_config, wait=True
+                )
+            )
+            return SingleStepResult(
+                original_input=original_input,
+                model_response=new_response,
+                pre_step_items=pre_step_items,
+                new_step_items=new_step_items,
+                next_step=NextStepRunAgain(),
+            )
+
         if output_schema and not output_schema.is_plain_text() and potential_final_output_text:
             final_output = output_schema.validate_json(potential_final_output_text)
             return await cls.execute_final_output(
@@ -270,7 +402,11 @@ class RunImpl:
         response: ModelResponse,
         output_schema: AgentOutputSchema | None,
         handoffs: list[Handoff],
+        run_tools: list[Tool] | None = None,
     ) -> ProcessedResponse:
+        """Sorts the model's output into items, and the tool calls and handoffs to run.
+        `run_tools` are tools added by the run (rather than the agent) that the model may call.
+        """
         items: list[RunItem] = []
 
         run_handoffs = []
@@ -278,7 +414,11 @@ class RunImpl:
         computer_actions = []
 
         handoff_map = {handoff.tool_name: handoff for handoff in handoffs}
-        function_map = {tool.name: tool for tool in agent.tools if isinstance(tool, FunctionTool)}
+        function_map = {
+            tool.name: tool
+            for tool in [*(run_tools or []), *agent.tools]
+            if isinstance(tool, FunctionTool)
+        }
         computer_tool = next((tool for tool in agent.tools if isinstance(tool, ComputerTool)), None)
 
         for output in response.output:
@@ -314,7 +454,14 @@ class RunImpl:
                 continue
 
             # Handoffs
-            if output.name in handoff_map:
+            if agent.collapse_handoffs and output.name == ROUTER_TOOL_NAME:
+                items.append(HandoffCallItem(raw_item=output, agent=agent))
+                router = route_handoffs(agent, handoffs)
+                target, arguments = router.resolve(output.arguments)
+                run_handoffs.append(
+                    ToolRunHandoff(tool_call=output, handoff=target, arguments=arguments)
+                )
+            elif output.name in handoff_map:
                 items.append(HandoffCallItem(raw_item=output, agent=agent))
                 handoff = ToolRunHandoff(
                     tool_call=output,
@@ -323,7 +470,13 @@ class RunImpl:
                 run_handoffs.append(handoff)
             # Regular function tool call
             else:
-                if output.name not in function_map:
+                if output.name in function_map:
+                    function_tool = function_map[output.name]
+                elif agent.tool_selection:
+                    # The model may have guessed at a tool that wasn't sent. Rather than fail the
+                    # run, tell it the tool isn't available, and send it every tool from now on.
+                    function_tool = unavailable_tool(output.name, agent.name)
+                else:
                     _utils.attach_error_to_current_span(
                         SpanError(
                             message="Tool not found",
@@ -335,7 +488,7 @@ class RunImpl:
                 functions.append(
                     ToolRunFunction(
                         tool_call=output,
-                        function_tool=function_map[output.name],
+                        function_tool=function_tool,
                     )
                 )
 
@@ -355,13 +508,35 @@ class RunImpl:
         hooks: RunHooks[TContext],
         context_wrapper: RunContextWrapper[TContext],
         config: RunConfig,
+        on_tool_output: Callable[[RunItem], None] | None = None,
+        on_tool_progress: Callable[[StreamEvent], None] | None = None,
     ) -> list[RunItem]:
+        """Runs the function tools concurrently. The outputs are returned in the order of the tool
+        calls, and passed to `on_tool_output` in the order the tools complete. Progress reported by
+        the tools is passed to `on_tool_progress`.
+        """
+        turn_timing = context_wrapper.timings.current_turn if context_wrapper.timings else None
+
         async def run_single_tool(
             func_tool: FunctionTool, tool_call: ResponseFunctionToolCall
         ) -> str:
             with function_span(func_tool.name) as span_fn:
                 if config.trace_include_sensitive_data:
                     span_fn.span_data.input = tool_call.arguments
+                started_at = time.perf_counter()
+                if config.metrics:
+                    handled_errors: list[BaseException] = []
+                    errors_token = _tool_errors.set(handled_errors)
+                invocation: Awaitable[str]
+                if func_tool.policy:
+                    span_fn.span_data.policy = {}
+                    invocation = func_tool.policy.run(
+                        func_tool.name,
+                        lambda: func_tool.on_invoke_tool(context_wrapper, tool_call.arguments),
+                        span_fn.span_data.policy,
+                    )
+                else:
+                    invocation = func_tool.on_invoke_tool(context_wrapper, tool_call.arguments)
                 try:
                     _, _, result = await asyncio.gather(
                         hooks.on_tool_start(context_wrapper, agent, func_tool),
@@ -370,8 +545,16 @@ class RunImpl:
                             if agent.hooks
                             else _utils.noop_coroutine()
                         ),
-                        func_tool.on_invoke_tool(context_wrapper, tool_call.arguments),
+                        invocation,
                     )
+                    if turn_timing:
+                        turn_timing.tool_calls.append(
+                            ToolTiming(
+                                name=func_tool.name,
+                                call_id=tool_call.call_id,
+                                duration=time.perf_counter() - started_at,
+                            )
+                        )
 
                     await asyncio.gather(
                         hooks.on_tool_end(context_wrapper, agent, func_tool, result),
@@ -382,6 +565,10 @@ class RunImpl:
                         ),
                     )
                 except Exception as e:
+                    if config.metrics:
+                        config.metrics.record_tool_call(
+                            func_tool.name, time.perf_counter() - started_at, error=True
+                        )
                     _utils.attach_error_to_current_span(
                         SpanError(
                             message="Error running tool",
@@ -391,26 +578,108 @@ class RunImpl:
                     if isinstance(e, AgentsException):
                         raise e
                     raise UserError(f"Error running tool {func_tool.name}: {e}") from e
+                finally:
+                    if config.metrics:
+                        _tool_errors.reset(errors_token)
+
+                if config.metrics:
+                    config.metrics.record_tool_call(
+                        func_tool.name, time.perf_counter() - started_at, error=bool(handled_errors)
+                    )
 
                 if config.trace_include_sensitive_data:
                     span_fn.span_data.output = result
             return result
 
-        tasks = []
-        for tool_run in tool_runs:
-            function_tool = tool_run.function_tool
-            tasks.append(run_single_tool(function_tool, tool_run.tool_call))
+        async def run_tool_to_item(tool_run: ToolRunFunction) -> RunItem:
+            reporter = None
+            if on_tool_progress:
+                reporter = ToolProgressReporter(
+                    _tool_progress_emitter(on_tool_progress, tool_run, agent),
+                    config.tool_progress_interval,
+                )
+                # Each tool runs in its own task, so this only applies to this tool call
+                set_tool_progress_reporter(reporter)
+            try:
+                if tool_run.function_tool.background:
+                    # The model is sent a handle for now, and the output once it's ready
+                    result = start_background_tool_call(
+                        context_wrapper,
+                        tool_run.tool_call.call_id,
+                        tool_run.function_tool.name,
+                        run_single_tool(tool_run.function_tool, tool_run.tool_call),
+                    )
+                else:
+                    result = await run_single_tool(tool_run.function_tool, tool_run.tool_call)
+            finally:
+                if reporter:
+                    reporter.discard_pending()
+            output = str(result)
+            # Oversized outputs are replaced by a preview in the conversation history
+            model_output = (
+                await config.tool_output_policy.apply(output)
+                if config.tool_output_policy
+                else output
+            )
+            item = ToolCallOutputItem(
+                output=output,
+                raw_item=ItemHelpers.tool_call_output_item(tool_run.tool_call, model_output),
+                agent=agent,
+            )
+            if on_tool_output:
+                on_tool_output(item)
+            return item
 
-        results = await asyncio.gather(*tasks)
+        return list(await asyncio.gather(*[run_tool_to_item(tool_run) for tool_run in tool_runs]))
 
-        return [
-            ToolCallOutputItem(
-                output=str(result),
-                raw_item=ItemHelpers.tool_call_output_item(tool_run.tool_call, str(result)),
-                agent=agent,
+    @classmethod
+    async def collect_background_tool_outputs(
+        cls,
+        *,
+        agent: Agent[TContext],
+        context_wrapper: RunContextWrapper[TContext],
+        config: RunConfig,
+        wait: bool = False,
+    ) -> list[RunItem]:
+        """Returns items that add the outputs of completed background tool calls to the
+        conversation. Each output is added as a call to the await tool, since the background tool's
+        own call already has an output (its handle). If `wait`, waits for every background tool call
+        to complete first.
+        """
+        calls = undelivered_background_tool_calls(context_wrapper)
+        if not calls:
+            return []
+        if wait:
+            await asyncio.wait([call.task for call in calls])
+
+        items: list[RunItem] = []
+        for call in calls:
+            if not call.task.done():
+                continue
+            call.delivered = True
+            # Errors that the tool didn't handle end the run, as they would for other tools
+            output = str(call.task.result())
+            # Constructed without an id, which only output items from the model have
+            tool_call = ResponseFunctionToolCall.model_construct(
+                type="function_call",
+                call_id=f"{call.handle}_result",
+                name=AWAIT_TOOL_NAME,
+                arguments=json.dumps({"handle": call.handle}),
+            )
+            model_output = (
+                await config.tool_output_policy.apply(output)
+                if config.tool_output_policy
+                else output
             )
-            for tool_run, result in zip(tool_runs, results)
-        ]
+            items.append(ToolCallItem(raw_item=tool_call, agent=agent))
+            items.append(
+                ToolCallOutputItem(
+                    output=output,
+                    raw_item=ItemHelpers.tool_call_output_item(tool_call, model_output),
+                    agent=agent,
+                )
+            )
+        return items
 
     @classmethod
     async def execute_computer_actions(
@@ -421,19 +690,21 @@ class RunImpl:
         hooks: RunHooks[TContext],
         context_wrapper: RunContextWrapper[TContext],
         config: RunConfig,
+        on_tool_output: Callable[[RunItem], None] | None = None,
     ) -> list[RunItem]:
         results: list[RunItem] = []
         # Need to run these serially, because each action can affect the computer state
         for action in actions:
-            results.append(
-                await ComputerAction.execute(
-                    agent=agent,
-                    action=action,
-                    hooks=hooks,
-                    context_wrapper=context_wrapper,
-                    config=config,
-                )
+            item = await ComputerAction.execute(
+                agent=agent,
+                action=action,
+                hooks=hooks,
+                context_wrapper=context_wrapper,
+                config=config,
             )
+            if on_tool_output:
+                on_tool_output(item)
+            results.append(item)
 
         return results
 
@@ -470,9 +741,10 @@ class RunImpl:
         actual_handoff = run_handoffs[0]
         with handoff_span(from_agent=agent.name) as span_handoff:
             handoff = actual_handoff.handoff
-            new_agent: Agent[Any] = await handoff.on_invoke_handoff(
-                context_wrapper, actual_handoff.tool_call.arguments
-            )
+            arguments = actual_handoff.arguments
+            if arguments is None:
+                arguments = actual_handoff.tool_call.arguments
+            new_agent: Agent[Any] = await handoff.on_invoke_handoff(context_wrapper, arguments)
             span_handoff.span_data.to_agent = new_agent.name
 
             # Append a tool output item for the handoff
@@ -489,22 +761,23 @@ class RunImpl:
             )
 
             # Execute handoff hooks
-            await asyncio.gather(
-                hooks.on_handoff(
-                    context=context_wrapper,
-                    from_agent=agent,
-                    to_agent=new_agent,
-                ),
-                (
-                    agent.hooks.on_handoff(
-                        context_wrapper,
-                        agent=new_agent,
-                        source=agent,
-                    )
-                    if agent.hooks
-                    else _utils.noop_coroutine()
-                ),
-            )
+            with measure(context_wrapper.timings, "hooks"):
+                await asyncio.gather(
+                    hooks.on_handoff(
+                        context=context_wrapper,
+                        from_agent=agent,
+                        to_agent=new_agent,
+                    ),
+                    (
+                        agent.hooks.on_handoff(
+                            context_wrapper,
+                            agent=new_agent,
+                            source=agent,
+                        )
+                        if agent.hooks
+                        else _utils.noop_coroutine()
+                    ),
+                )
 
             # If there's an input filter, filter the input for the next agent
             input_filter = handoff.input_filter or (
@@ -569,7 +842,8 @@ class RunImpl:
         context_wrapper: RunContextWrapper[TContext],
     ) -> SingleStepResult:
         # Run the on_end hooks
-        await cls.run_final_output_hooks(agent, hooks, context_wrapper, final_output)
+        with measure(context_wrapper.timings, "hooks"):
+            await cls.run_final_output_hooks(agent, hooks, context_wrapper, final_output)
 
         return SingleStepResult(
             original_input=original_input,
@@ -601,10 +875,19 @@ class RunImpl:
         guardrail: InputGuardrail[TContext],
         input: str | list[TResponseInputItem],
         context: RunContextWrapper[TContext],
+        metrics: AgentMetrics | None = None,
     ) -> InputGuardrailResult:
         with guardrail_span(guardrail.get_name()) as span_guardrail:
+            started_at = time.perf_counter()
             result = await guardrail.run(agent, input, context)
             span_guardrail.span_data.triggered = result.output.tripwire_triggered
+            if metrics:
+                metrics.record_guardrail(
+                    guardrail.get_name(),
+                    "input",
+                    time.perf_counter() - started_at,
+                    tripped=result.output.tripwire_triggered,
+                )
             return result
 
     @classmethod
@@ -614,10 +897,19 @@ class RunImpl:
         agent: Agent[Any],
         agent_output: Any,
         context: RunContextWrapper[TContext],
+        metrics: AgentMetrics | None = None,
     ) -> OutputGuardrailResult:
         with guardrail_span(guardrail.get_name()) as span_guardrail:
+            started_at = time.perf_counter()
             result = await guardrail.run(agent=agent, agent_output=agent_output, context=context)
             span_guardrail.span_data.triggered = result.output.tripwire_triggered
+            if metrics:
+                metrics.record_guardrail(
+                    guardrail.get_name(),
+                    "output",
+                    time.perf_counter() - started_at,
+                    tripped=result.output.tripwire_triggered,
+                )
             return result
 
     @classmethod
@@ -626,7 +918,15 @@ class RunImpl:
         step_result: SingleStepResult,
         queue: asyncio.Queue[StreamEvent | QueueCompleteSentinel],
     ):
-        for item in step_result.new_step_items:
+        cls.stream_items_to_queue(step_result.new_step_items, queue)
+
+    @classmethod
+    def stream_items_to_queue(
+        cls,
+        items: list[RunItem],
+        queue: asyncio.Queue[StreamEvent | QueueCompleteSentinel],
+    ):
+        for item in items:
             if isinstance(item, MessageOutputItem):
                 event = RunItemStreamEvent(item=item, name="message_output_created")
             elif isinstance(item, HandoffCallItem):
@@ -647,6 +947,110 @@ class RunImpl:
                 queue.put_nowait(event)
 
 
+class StreamingOutputGuardrails:
+    """Runs the output guardrails that have a `streaming_check_interval` on the output of a streamed
+    turn while it's being generated. Checks run in the background, so they don't hold up the stream.
+    If one trips (or raises), the task that's streaming the turn is cancelled, so that the model
+    stream is closed right away.
+    """
+
+    def __init__(
+        self,
+        guardrails: list[OutputGuardrail[Any]],
+        agent: Agent[Any],
+        context: RunContextWrapper[Any],
+        metrics: AgentMetrics | None = None,
+    ):
+        self.guardrails = [g for g in guardrails if g.streaming_check_interval]
+        self.agent = agent
+        self.context = context
+        self.metrics = metrics
+
+        self.tripped: OutputGuardrailResult | None = None
+        """The result of the guardrail that tripped, if any."""
+
+        self.error: BaseException | None = None
+        """The exception raised by a guardrail check, if any."""
+
+        self.cancel_requested = False
+        """Whether the streaming task was cancelled because of a guardrail."""
+
+        # The output text length at which each guardrail checks next
+        self._next_check = {id(g): g.streaming_check_interval or 0 for g in self.guardrails}
+        self._pending: dict[int, asyncio.Task[OutputGuardrailResult]] = {}
+        self._streaming_task: asyncio.Task[Any] | None = None
+        self._stopped = False
+
+    def __bool__(self) -> bool:
+        return bool(self.guardrails)
+
+    def check(self, tracker: PartialOutputTracker) -> None:
+        """Starts a check for each guardrail whose interval has passed since its last check. A
+        guardrail is skipped while its previous check is still running, or while there's no valid
+        output yet.
+        """
+        if self._stopped or self.cancel_requested:
+            return
+
+        output: Any = None
+        for guardrail in self.guardrails:
+            key = id(guardrail)
+            if tracker.text_length < self._next_check[key] or key in self._pending:
+                continue
+            if output is None:
+                output = tracker.current_output()
+                if output is None:
+                    return
+
+            self._next_check[key] = tracker.text_length + (guardrail.streaming_check_interval or 0)
+            self._streaming_task = asyncio.current_task()
+            task = asyncio.create_task(
+                RunImpl.run_single_output_guardrail(
+                    guardrail, self.agent, output, self.context, self.metrics
+                )
+            )
+            self._pending[key] = task
+            task.add_done_callback(lambda t, key=key: self._on_check_done(key, t))  # type: ignore
+
+    def stop(self) -> None:
+        """Cancels any checks that are still running. Call once the stream has ended."""
+        self._stopped = True
+        for task in self._pending.values():
+            task.cancel()
+        self._pending.clear()
+
+    def raise_if_tripped(self) -> None:
+        """Raises `OutputGuardrailTripwireTriggered` if a guardrail tripped, or the exception a
+        guardrail check raised."""
+        if self.error is not None:
+            raise self.error
+        if self.tripped is not None:
+            _utils.attach_error_to_current_span(
+                SpanError(
+                    message="Guardrail tripwire triggered",
+                    data={"guardrail": self.tripped.guardrail.get_name(), "streaming": True},
+                )
+            )
+            raise OutputGuardrailTripwireTriggered(self.tripped)
+
+    def _on_check_done(self, key: int, task: asyncio.Task[OutputGuardrailResult]) -> None:
+        if self._pending.get(key) is task:
+            del self._pending[key]
+        if self._stopped or task.cancelled() or self.cancel_requested:
+            return
+
+        if task.exception() is not None:
+            self.error = task.exception()
+        elif task.result().output.tripwire_triggered:
+            self.tripped = task.result()
+        else:
+            return
+
+        self.cancel_requested = True
+        if self._streaming_task is not None:
+            self._streaming_task.cancel()
+
+
 class TraceCtxManager:
     """Creates a trace only if there is no current trace, and manages the trace lifecycle."""
 
@@ -742,26 +1146,27 @@ class ComputerAction:
         tool_call: ResponseComputerToolCall,
     ) -> str:
         action = tool_call.action
-        if isinstance(action, ActionClick):
-            computer.click(action.x, action.y, action.button)
-        elif isinstance(action, ActionDoubleClick):
-            computer.double_click(action.x, action.y)
-        elif isinstance(action, ActionDrag):
-            computer.drag([(p.x, p.y) for p in action.path])
-        elif isinstance(action, ActionKeypress):
-            computer.keypress(action.keys)
-        elif isinstance(action, ActionMove):
-            computer.move(action.x, action.y)
-        elif isinstance(action, ActionScreenshot):
-            computer.screenshot()
-        elif isinstance(action, ActionScroll):
-            computer.scroll(action.x, action.y, action.scroll_x, action.scroll_y)
-        elif isinstance(action, ActionType):
-            computer.type(action.text)
-        elif isinstance(action, ActionWait):
-            computer.wait()
-
-        return computer.screenshot()
+        with blocking_call(f"computer {action.type}"):
+            if isinstance(action, ActionClick):
+                computer.click(action.x, action.y, action.button)
+            elif isinstance(action, ActionDoubleClick):
+                computer.double_click(action.x, action.y)
+            elif isinstance(action, ActionDrag):
+                computer.drag([(p.x, p.y) for p in action.path])
+            elif isinstance(action, ActionKeypress):
+                computer.keypress(action.keys)
+            elif isinstance(action, ActionMove):
+                computer.move(action.x, action.y)
+            elif isinstance(action, ActionScreenshot):
+                computer.screenshot()
+            elif isinstance(action, ActionScroll):
+                computer.scroll(action.x, action.y, action.scroll_x, action.scroll_y)
+            elif isinstance(action, ActionType):
+                computer.type(action.text)
+            elif isinstance(action, ActionWait):
+                computer.wait()
+
+            return computer.screenshot()
 
     @classmethod
     async def _get_screenshot_async(
@@ -0,0 +1,149 @@
+"""A persistent, on-disk cache for the slow parts of `function_schema`: parsing the docstring and
+generating the strict JSON schema. Each entry is a JSON file, named after a hash of the function's
+qualified name, its source, the types it references, the options it was created with, and the SDK
+and pydantic versions. Changing any of those creates a new entry rather than reusing a stale one.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import enum
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, get_args, get_origin
+
+import pydantic
+from pydantic import BaseModel
+from typing_extensions import is_typeddict
+
+from .logger import logger
+from .version import __version__
+
+_FORMAT_VERSION = 1
+"""Bumped whenever the contents of an entry change."""
+
+_cache_dir: Path | None = (
+    Path(os.environ["OPENAI_AGENTS_FUNCTION_SCHEMA_CACHE_DIR"])
+    if os.environ.get("OPENAI_AGENTS_FUNCTION_SCHEMA_CACHE_DIR")
+    else None
+)
+
+
+def set_cache_dir(path: str | os.PathLike[str] | None) -> None:
+    global _cache_dir
+    _cache_dir = Path(path) if path is not None else None
+
+
+def get_cache_dir() -> Path | None:
+    return _cache_dir
+
+
+def cache_key(
+    func: Callable[..., Any], type_hints: dict[str, Any], options: tuple[Any, ...]
+) -> str | None:
+    """Returns the key of the cache entry for a function, or None if caching is disabled or the
+    function's source isn't available (e.g. it was defined in a REPL).
+    """
+    if _cache_dir is None:
+        return None
+
+    try:
+        source = inspect.getsource(func)
+    except (OSError, TypeError):
+        return None
+
+    seen: set[int] = set()
+    parts = [
+        str(_FORMAT_VERSION),
+        __version__,
+        pydantic.VERSION,
+        f"{func.__module__}.{func.__qualname__}",
+        hashlib.sha256(source.encode()).hexdigest(),
+        repr(options),
+        *(f"{name}: {_type_fingerprint(hint, seen)}" for name, hint in type_hints.items()),
+    ]
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+
+def load(key: str) -> dict[str, Any] | None:
+    if _cache_dir is None:
+        return None
+    try:
+        with open(_cache_dir / f"{key}.json", encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return entry if isinstance(entry, dict) else None
+
+
+def store(key: str, entry: dict[str, Any]) -> None:
+    if _cache_dir is None:
+        return
+    try:
+        _cache_dir.mkdir(parents=True, exist_ok=True)
+        # Written to a temporary file first, so that other processes never read a partial entry
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=_cache_dir, suffix=".tmp", delete=False
+        ) as f:
+            json.dump(entry, f)
+        os.replace(f.name, _cache_dir / f"{key}.json")
+    except (OSError, TypeError, ValueError) as e:
+        logger.debug(f"Could not write function schema cache entry {key}: {e}")
+
+
+def _type_fingerprint(tp: Any, seen: set[int]) -> str:
+    """Describes a type in enough detail that any change that could affect the JSON schema, such as
+    a field added to a referenced pydantic model, changes the description.
+    """
+    origin = get_origin(tp)
+    if origin is not None:
+        args = ", ".join(_type_fingerprint(arg, seen) for arg in get_args(tp))
+        return f"{_type_fingerprint(origin, seen)}[{args}]"
+
+    if not isinstance(tp, type):
+        return repr(tp)
+
+    name = f"{tp.__module__}.{tp.__qualname__}"
+    # Types that reference themselves are only described once
+    if id(tp) in seen:
+        return name
+    seen.add(id(tp))
+
+    if issubclass(tp, BaseModel):
+        fields = [
+            f"{field_name}: {_type_fingerprint(field.annotation, seen)} = {field!r}"
+            for field_name, field in tp.model_fields.items()
+        ]
+        return f"{name}({', '.join(fields)}) {tp.model_config!r} {tp.__doc__!r}"
+    if dataclasses.is_dataclass(tp):
+        fields = [
+            f"{field.name}: {_type_fingerprint(field.type, seen)}{_dataclass_default(field)}"
+            for field in dataclasses.fields(tp)
+        ]
+        return f"{name}({', '.join(fields)}) {tp.__doc__!r}"
+    if is_typeddict(tp):
+        fields = [
+            f"{field_name}: {_type_fingerprint(hint, seen)}"
+            for field_name, hint in tp.__annotations__.items()
+        ]
+        required = sorted(tp.__required_keys__)  # type: ignore[attr-defined]
+        return f"{name}({', '.join(fields)}) {required!r} {tp.__doc__!r}"
+    if issubclass(tp, enum.Enum):
+        members = [(member.name, member.value) for member in tp]
+        return f"{name}{members!r} {tp.__doc__!r}"
+    return name
+
+
+def _dataclass_default(field: dataclasses.Field[Any]) -> str:
+    # Described like pydantic describes them, since the repr of `MISSING` and of most factories
+    # includes a memory address, which would change the key in every process
+    if field.default is not dataclasses.MISSING:
+        return f" = {field.default!r}"
+    if field.default_factory is not dataclasses.MISSING:
+        factory = field.default_factory
+        return f" = default_factory={getattr(factory, '__qualname__', type(factory).__qualname__)}"
+    return ""
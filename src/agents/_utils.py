@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import inspect
 import re
 from collections.abc import Awaitable
 from typing import Any, Literal, Union
@@ -59,3 +60,16 @@ def attach_error_to_current_span(error: SpanError) -> None:
 
 async def noop_coroutine() -> None:
     pass
+
+
+async def aclose(iterator: Any) -> None:
+    """Closes an async iterator that may not have been read to the end, e.g. an async generator or
+    an OpenAI `AsyncStream` (which releases its HTTP connection). Does nothing if it can't be
+    closed.
+    """
+    close = getattr(iterator, "aclose", None) or getattr(iterator, "close", None)
+    if close is None:
+        return
+    result = close()
+    if inspect.isawaitable(result):
+        await result
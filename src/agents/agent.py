@@ -16,6 +16,8 @@ from .model_settings import ModelSettings
 from .models.interface import Model
 from .run_context import RunContextWrapper, TContext
 from .tool import Tool, function_tool
+from .tool_selection import ToolSelection
+from .watchdog import blocking_call
 
 if TYPE_CHECKING:
     from .lifecycle import AgentHooks
@@ -64,6 +66,12 @@ class Agent(Generic[TContext]):
     modularity.
     """
 
+    collapse_handoffs: bool = False
+    """If True, the handoffs are sent to the model as a single `transfer_to_agent` tool that takes
+    the agent to hand off to as a parameter, rather than one tool per handoff. Useful for agents
+    with many handoffs, to save prompt tokens. See `HandoffRouter`.
+    """
+
     model: str | Model | None = None
     """The model implementation to use when invoking the LLM.
 
@@ -78,6 +86,11 @@ class Agent(Generic[TContext]):
     tools: list[Tool] = field(default_factory=list)
     """A list of tools that the agent can use."""
 
+    tool_selection: ToolSelection | None = None
+    """If set, only the tools most relevant to the conversation are sent to the model each turn,
+    rather than every tool. Useful for agents with many tools. See `ToolSelection`.
+    """
+
     input_guardrails: list[InputGuardrail[TContext]] = field(default_factory=list)
     """A list of checks that run in parallel to the agent's execution, before generating a
     response. Runs only if the agent is the first agent in the chain.
@@ -152,7 +165,8 @@ class Agent(Generic[TContext]):
             if inspect.iscoroutinefunction(self.instructions):
                 return await cast(Awaitable[str], self.instructions(run_context, self))
             else:
-                return cast(str, self.instructions(run_context, self))
+                with blocking_call(f"{self.name} instructions"):
+                    return cast(str, self.instructions(run_context, self))
         elif self.instructions is not None:
             logger.error(f"Instructions must be a string or a function, got {self.instructions}")
 
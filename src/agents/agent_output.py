@@ -1,7 +1,7 @@
 from dataclasses import dataclass
 from typing import Any
 
-from pydantic import BaseModel, TypeAdapter
+from pydantic import BaseModel, TypeAdapter, ValidationError
 from typing_extensions import TypedDict, get_args, get_origin
 
 from . import _utils
@@ -113,6 +113,23 @@ class AgentOutputSchema:
             return validated[_WRAPPER_DICT_KEY]
         return validated
 
+    def validate_partial_python(self, value: Any) -> Any:
+        """Validate a partially generated output, already parsed from JSON, against the output
+        type. The last item of each list or dict may be incomplete, but required fields must be
+        present. Raises a `ModelBehaviorError` if it isn't valid (yet). Unlike `validate_json`,
+        errors are not attached to the current span, since partial outputs are often incomplete.
+        """
+        try:
+            validated = self._type_adapter.validate_python(value, experimental_allow_partial=True)
+        except ValidationError as e:
+            raise ModelBehaviorError(f"Invalid partial output: {e}") from e
+
+        if self._is_wrapped:
+            if not isinstance(validated, dict) or _WRAPPER_DICT_KEY not in validated:
+                raise ModelBehaviorError(f"Could not find key {_WRAPPER_DICT_KEY} in {validated}")
+            return validated[_WRAPPER_DICT_KEY]
+        return validated
+
     def output_type_name(self) -> str:
         """The name of the output type."""
         return _type_to_str(self.output_type)
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+from collections.abc import Coroutine
+from dataclasses import dataclass
+from typing import Any
+
+from .run_context import RunContextWrapper
+from .tool import FunctionTool, function_tool
+
+AWAIT_TOOL_NAME = "await_background_tool"
+
+
+@dataclass
+class BackgroundToolCall:
+    """A call to a background tool, made during a run."""
+
+    handle: str
+    """The handle the model uses to refer to the call: the call's id."""
+
+    tool_name: str
+    """The name of the tool."""
+
+    task: asyncio.Task[str]
+    """The task running the tool."""
+
+    delivered: bool = False
+    """Whether the model has been sent the tool's output."""
+
+
+def start_background_tool_call(
+    context_wrapper: RunContextWrapper[Any],
+    call_id: str,
+    tool_name: str,
+    invocation: Coroutine[Any, Any, str],
+) -> str:
+    """Runs a tool call in the background, and returns the output to send the model for now."""
+    task = asyncio.create_task(invocation)
+    context_wrapper._background_tool_calls[call_id] = BackgroundToolCall(
+        handle=call_id, tool_name=tool_name, task=task
+    )
+    return (
+        f'Tool {tool_name} is running in the background, with handle "{call_id}". Its result will '
+        "be added to the conversation when it's ready, so you can carry on in the meantime. To "
+        f"wait for the result now, call {AWAIT_TOOL_NAME} with this handle."
+    )
+
+
+def undelivered_background_tool_calls(
+    context_wrapper: RunContextWrapper[Any],
+) -> list[BackgroundToolCall]:
+    """The background tool calls whose outputs haven't been sent to the model yet."""
+    return [call for call in context_wrapper._background_tool_calls.values() if not call.delivered]
+
+
+def cancel_background_tool_calls(context_wrapper: RunContextWrapper[Any]) -> None:
+    """Cancels the background tool calls that are still running, e.g. when the run ends."""
+    for call in context_wrapper._background_tool_calls.values():
+        if not call.task.done():
+            call.task.cancel()
+        elif not call.task.cancelled():
+            # Retrieves the error of a call that failed before it was delivered, e.g. because the
+            # run failed first, so that asyncio doesn't log it as never retrieved
+            call.task.exception()
+
+
+@functools.cache
+def await_tool() -> FunctionTool:
+    """The tool that the model calls to wait for the output of a background tool call."""
+
+    async def await_background_tool(ctx: RunContextWrapper[Any], handle: str) -> str:
+        """Wait for a tool that's running in the background to finish, and return its result.
+
+        Args:
+            handle: The handle that was returned when the tool was called.
+        """
+        call = ctx._background_tool_calls.get(handle)
+        if call is None:
+            return f'There is no background tool call with handle "{handle}".'
+        try:
+            # Shielded, so that if this call is cancelled, the tool keeps running
+            return await asyncio.shield(call.task)
+        finally:
+            if call.task.done():
+                call.delivered = True
+
+    return function_tool(await_background_tool, name_override=AWAIT_TOOL_NAME)
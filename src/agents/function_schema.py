@@ -4,16 +4,24 @@ import contextlib
 import inspect
 import logging
 import re
-from dataclasses import dataclass
-from typing import Any, Callable, Literal, get_args, get_origin, get_type_hints
+from dataclasses import dataclass, field
+from typing import Annotated, Any, Callable, Literal, get_args, get_origin, get_type_hints
 
 from griffe import Docstring, DocstringSectionKind
-from pydantic import BaseModel, Field, create_model
+from pydantic import BaseModel, ConfigDict, Field, create_model
 
+from . import _schema_cache
 from .exceptions import UserError
+from .resources import Resource
 from .run_context import RunContextWrapper
 from .strict_schema import ensure_strict_json_schema
 
+# How `FuncSchema.to_call_args` passes each parameter
+_POSITIONAL = 0
+_KEYWORD = 1
+_VAR_POSITIONAL = 2
+_VAR_KEYWORD = 3
+
 
 @dataclass
 class FuncSchema:
@@ -33,14 +41,16 @@ class FuncSchema:
     """The signature of the function."""
     takes_context: bool = False
     """Whether the function takes a RunContextWrapper argument (must be the first argument)."""
+    resources: dict[str, Resource[Any]] = field(default_factory=dict)
+    """The parameters that are injected from a `ResourceRegistry`, rather than passed by the LLM,
+    and the resources they take."""
 
-    def to_call_args(self, data: BaseModel) -> tuple[list[Any], dict[str, Any]]:
-        """
-        Converts validated data from the Pydantic model into (args, kwargs), suitable for calling
-        the original function.
-        """
-        positional_args: list[Any] = []
-        keyword_args: dict[str, Any] = {}
+    _call_plan: tuple[tuple[str, int, bool], ...] = field(init=False, repr=False, compare=False)
+    """For each parameter passed by `to_call_args`, its name, how it's passed, and whether it's a
+    resource. Computed once, so the signature doesn't have to be walked on every call."""
+
+    def __post_init__(self) -> None:
+        plan: list[tuple[str, int, bool]] = []
         seen_var_positional = False
 
         # Use enumerate() so we can skip the first parameter if it's context.
@@ -49,23 +59,42 @@ class FuncSchema:
             if self.takes_context and idx == 0:
                 continue
 
-            value = getattr(data, name, None)
+            is_resource = name in self.resources
             if param.kind == param.VAR_POSITIONAL:
                 # e.g. *args: extend positional args and mark that *args is now seen
-                positional_args.extend(value or [])
+                plan.append((name, _VAR_POSITIONAL, is_resource))
                 seen_var_positional = True
             elif param.kind == param.VAR_KEYWORD:
                 # e.g. **kwargs handling
-                keyword_args.update(value or {})
+                plan.append((name, _VAR_KEYWORD, is_resource))
             elif param.kind in (param.POSITIONAL_ONLY, param.POSITIONAL_OR_KEYWORD):
                 # Before *args, add to positional args. After *args, add to keyword args.
-                if not seen_var_positional:
-                    positional_args.append(value)
-                else:
-                    keyword_args[name] = value
+                plan.append((name, _KEYWORD if seen_var_positional else _POSITIONAL, is_resource))
             else:
                 # For KEYWORD_ONLY parameters, always use keyword args.
+                plan.append((name, _KEYWORD, is_resource))
+        self._call_plan = tuple(plan)
+
+    def to_call_args(
+        self, data: BaseModel, resources: dict[str, Any] | None = None
+    ) -> tuple[list[Any], dict[str, Any]]:
+        """
+        Converts validated data from the Pydantic model into (args, kwargs), suitable for calling
+        the original function. `resources` maps the names of resource parameters to their values.
+        """
+        positional_args: list[Any] = []
+        keyword_args: dict[str, Any] = {}
+
+        for name, kind, is_resource in self._call_plan:
+            value = (resources or {}).get(name) if is_resource else getattr(data, name, None)
+            if kind == _POSITIONAL:
+                positional_args.append(value)
+            elif kind == _KEYWORD:
                 keyword_args[name] = value
+            elif kind == _VAR_POSITIONAL:
+                positional_args.extend(value or [])
+            else:
+                keyword_args.update(value or {})
         return positional_args, keyword_args
 
 
@@ -211,8 +240,31 @@ def function_schema(
         and other metadata.
     """
 
+    type_hints = get_type_hints(func)
+
+    # 0. If the function schema cache is enabled, look up the docstring info and JSON schema there
+    cache_key = _schema_cache.cache_key(
+        func,
+        type_hints,
+        (
+            docstring_style,
+            name_override,
+            description_override,
+            use_docstring_info,
+            strict_json_schema,
+        ),
+    )
+    cached = _schema_cache.load(cache_key) if cache_key else None
+
     # 1. Grab docstring info
-    if use_docstring_info:
+    if cached is not None:
+        doc_info = (
+            FuncDocumentation(name=func.__name__, **cached["doc_info"])
+            if cached["doc_info"] is not None
+            else None
+        )
+        param_descs = (doc_info.param_descriptions or {}) if doc_info else {}
+    elif use_docstring_info:
         doc_info = generate_func_documentation(func, docstring_style)
         param_descs = doc_info.param_descriptions or {}
     else:
@@ -221,9 +273,8 @@ def function_schema(
 
     func_name = name_override or doc_info.name if doc_info else func.__name__
 
-    # 2. Inspect function signature and get type hints
+    # 2. Inspect function signature
     sig = inspect.signature(func)
-    type_hints = get_type_hints(func)
     params = list(sig.parameters.items())
     takes_context = False
     filtered_params = []
@@ -241,8 +292,22 @@ def function_schema(
         else:
             filtered_params.append((first_name, first_param))
 
+    # Parameters annotated with `Annotated[T, resource]` are injected, so the LLM doesn't see them
+    resources: dict[str, Resource[Any]] = {}
+    for name, hint in get_type_hints(func, include_extras=True).items():
+        if get_origin(hint) is Annotated:
+            resource = next((m for m in hint.__metadata__ if isinstance(m, Resource)), None)
+            if resource is not None:
+                resources[name] = resource
+    if resources:
+        filtered_params = [
+            (name, param) for name, param in filtered_params if name not in resources
+        ]
+
     # For parameters other than the first, raise error if any use RunContextWrapper.
     for name, param in params[1:]:
+        if name in resources:
+            continue
         ann = type_hints.get(name, param.annotation)
         if ann != inspect._empty:
             origin = get_origin(ann) or ann
@@ -321,13 +386,34 @@ def function_schema(
                     Field(default=default, description=field_description),
                 )
 
-    # 3. Dynamically build a Pydantic model
-    dynamic_model = create_model(f"{func_name}_args", __base__=BaseModel, **fields)
+    # 3. Dynamically build a Pydantic model. With a cached JSON schema, nothing needs the model
+    # until the tool is first called, so building its validator is deferred until then.
+    dynamic_model = create_model(
+        f"{func_name}_args",
+        __config__=ConfigDict(defer_build=True) if cached is not None else None,
+        **fields,
+    )
 
     # 4. Build JSON schema from that model
-    json_schema = dynamic_model.model_json_schema()
-    if strict_json_schema:
-        json_schema = ensure_strict_json_schema(json_schema)
+    if cached is not None:
+        json_schema = cached["params_json_schema"]
+    else:
+        json_schema = dynamic_model.model_json_schema()
+        if strict_json_schema:
+            json_schema = ensure_strict_json_schema(json_schema)
+        if cache_key:
+            _schema_cache.store(
+                cache_key,
+                {
+                    "doc_info": {
+                        "description": doc_info.description,
+                        "param_descriptions": doc_info.param_descriptions,
+                    }
+                    if doc_info
+                    else None,
+                    "params_json_schema": json_schema,
+                },
+            )
 
     # 5. Return as a FuncSchema dataclass
     return FuncSchema(
@@ -337,4 +423,5 @@ def function_schema(
         params_json_schema=json_schema,
         signature=sig,
         takes_context=takes_context,
+        resources=resources,
     )
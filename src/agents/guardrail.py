@@ -11,6 +11,7 @@ from ._utils import MaybeAwaitable
 from .exceptions import UserError
 from .items import TResponseInputItem
 from .run_context import RunContextWrapper, TContext
+from .watchdog import blocking_call
 
 if TYPE_CHECKING:
     from .agent import Agent
@@ -111,7 +112,8 @@ class InputGuardrail(Generic[TContext]):
         if not callable(self.guardrail_function):
             raise UserError(f"Guardrail function must be callable, got {self.guardrail_function}")
 
-        output = self.guardrail_function(context, agent, input)
+        with blocking_call(self.get_name()):
+            output = self.guardrail_function(context, agent, input)
         if inspect.isawaitable(output):
             return InputGuardrailResult(
                 guardrail=self,
@@ -150,6 +152,15 @@ class OutputGuardrail(Generic[TContext]):
     function's name.
     """
 
+    streaming_check_interval: int | None = None
+    """If set, in streamed runs the guardrail also checks the output while the model is generating
+    it, each time this many more characters of output text have been generated. The guardrail then
+    receives the output so far: the text for plain text agents, or the partially validated output
+    for agents with an `output_type` (skipped while it isn't valid yet). If it trips, the model's
+    stream is cancelled right away and `OutputGuardrailTripwireTriggered` is raised. The guardrail
+    still runs on the complete final output.
+    """
+
     def get_name(self) -> str:
         if self.name:
             return self.name
@@ -162,7 +173,8 @@ class OutputGuardrail(Generic[TContext]):
         if not callable(self.guardrail_function):
             raise UserError(f"Guardrail function must be callable, got {self.guardrail_function}")
 
-        output = self.guardrail_function(context, agent, agent_output)
+        with blocking_call(self.get_name()):
+            output = self.guardrail_function(context, agent, agent_output)
         if inspect.isawaitable(output):
             return OutputGuardrailResult(
                 guardrail=self,
@@ -277,6 +289,7 @@ def output_guardrail(
 def output_guardrail(
     *,
     name: str | None = None,
+    streaming_check_interval: int | None = None,
 ) -> Callable[
     [_OutputGuardrailFuncSync[TContext_co] | _OutputGuardrailFuncAsync[TContext_co]],
     OutputGuardrail[TContext_co],
@@ -289,6 +302,7 @@ def output_guardrail(
     | None = None,
     *,
     name: str | None = None,
+    streaming_check_interval: int | None = None,
 ) -> (
     OutputGuardrail[TContext_co]
     | Callable[
@@ -305,12 +319,17 @@ def output_guardrail(
 
         @output_guardrail(name="guardrail_name")
         async def my_async_guardrail(...): ...
+
+        @output_guardrail(streaming_check_interval=200)
+        async def my_streaming_guardrail(...): ...
     """
 
     def decorator(
         f: _OutputGuardrailFuncSync[TContext_co] | _OutputGuardrailFuncAsync[TContext_co],
     ) -> OutputGuardrail[TContext_co]:
-        return OutputGuardrail(guardrail_function=f, name=name)
+        return OutputGuardrail(
+            guardrail_function=f, name=name, streaming_check_interval=streaming_check_interval
+        )
 
     if func is not None:
         # Decorator was used without parentheses
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import copy
+import json
+from collections import OrderedDict
+from collections.abc import Sequence
+from typing import TYPE_CHECKING, Any
+
+from . import _utils
+from .exceptions import ModelBehaviorError, UserError
+from .handoffs import Handoff
+from .logger import logger
+from .run_context import RunContextWrapper
+from .strict_schema import ensure_strict_json_schema, rename_refs
+from .tracing.spans import SpanError
+
+if TYPE_CHECKING:
+    from .agent import Agent
+
+ROUTER_TOOL_NAME = "transfer_to_agent"
+
+# A rough average, used to estimate prompt tokens from the size of tool definitions
+_CHARS_PER_TOKEN = 4
+
+_NO_INPUT_SCHEMA = ensure_strict_json_schema({})
+
+_MEMO_SIZE = 1024
+
+
+class HandoffRouter:
+    """Sends all of an agent's handoffs to the model as a single routing tool, whose `target`
+    parameter is an enum of the agents it can hand off to, instead of one tool per handoff. For
+    agents with many handoffs, this makes every request smaller.
+
+    When the model calls the routing tool, the call is resolved to the handoff for the target, which
+    runs as if the model had called it directly: its `input_type` is validated, and its
+    `input_filter` applies. Handoffs that take an input share an `input` parameter, whose schema
+    accepts the input of any of them.
+    """
+
+    def __init__(self, handoffs: Sequence[Handoff[Any]]):
+        self.targets: dict[str, Handoff[Any]] = {}
+        for handoff in handoffs:
+            target = handoff.tool_name.removeprefix("transfer_to_")
+            if target in self.targets:
+                raise UserError(f"Two handoffs have the same routing target: {target}")
+            self.targets[target] = handoff
+
+        self.handoff: Handoff[Any] = Handoff(
+            tool_name=ROUTER_TOOL_NAME,
+            tool_description=(
+                "Handoff to another agent to handle the request. Set target to the agent that "
+                "should handle it."
+            ),
+            input_json_schema=self._input_json_schema(),
+            on_invoke_handoff=self._invoke,
+            agent_name=ROUTER_TOOL_NAME,
+            strict_json_schema=all(handoff.strict_json_schema for handoff in handoffs),
+        )
+        """The routing tool to send to the model, in place of the handoffs."""
+
+        self.original_size = sum(_tool_size(handoff) for handoff in handoffs)
+        """The size of the handoffs' tool definitions, in characters of minified JSON."""
+
+        self.collapsed_size = _tool_size(self.handoff)
+        """The size of the routing tool's definition, in characters of minified JSON."""
+
+    @property
+    def saved_tokens(self) -> int:
+        """Roughly how many prompt tokens the routing tool saves on each request, compared to
+        sending every handoff.
+        """
+        return (self.original_size - self.collapsed_size) // _CHARS_PER_TOKEN
+
+    def resolve(self, arguments: str) -> tuple[Handoff[Any], str]:
+        """Returns the handoff that a call to the routing tool is for, and the arguments to invoke
+        it with.
+        """
+        try:
+            data = json.loads(arguments) if arguments else {}
+        except json.JSONDecodeError as e:
+            _utils.attach_error_to_current_span(
+                SpanError(
+                    message="Invalid JSON input for handoff routing tool",
+                    data={"tool_name": ROUTER_TOOL_NAME, "error": str(e)},
+                )
+            )
+            raise ModelBehaviorError(
+                f"Invalid JSON input for {ROUTER_TOOL_NAME}: {arguments}"
+            ) from e
+
+        target = data.get("target") if isinstance(data, dict) else None
+        handoff = self.targets.get(target) if isinstance(target, str) else None
+        if handoff is None:
+            _utils.attach_error_to_current_span(
+                SpanError(
+                    message="Handoff target not found",
+                    data={"tool_name": ROUTER_TOOL_NAME, "target": target},
+                )
+            )
+            raise ModelBehaviorError(f"Handoff target {target} not found")
+
+        if not _takes_input(handoff):
+            # What the model would have sent if it had called the handoff directly
+            return handoff, "{}"
+        return handoff, json.dumps(data.get("input"))
+
+    async def _invoke(self, ctx: RunContextWrapper[Any], input_json: str) -> Agent[Any]:
+        handoff, arguments = self.resolve(input_json)
+        return await handoff.on_invoke_handoff(ctx, arguments)
+
+    def _input_json_schema(self) -> dict[str, Any]:
+        lines = []
+        input_schemas: list[dict[str, Any]] = []
+        defs: dict[str, Any] = {}
+        for target, handoff in self.targets.items():
+            description = _short_description(handoff)
+            if _takes_input(handoff):
+                description = f"{description} Takes an input." if description else "Takes an input."
+                input_schema = copy.deepcopy(handoff.input_json_schema)
+                # Definitions can only be at the root, so they're moved there, under names that
+                # can't clash with other targets' definitions
+                for defs_key in ("$defs", "definitions"):
+                    target_defs = input_schema.pop(defs_key, None) or {}
+                    renames = {
+                        f"#/{defs_key}/{name}": f"#/$defs/{target}.{name}" for name in target_defs
+                    }
+                    rename_refs(input_schema, renames)
+                    rename_refs(target_defs, renames)
+                    defs.update({f"{target}.{name}": value for name, value in target_defs.items()})
+                input_schema["description"] = f"The input for {target}."
+                input_schemas.append(input_schema)
+            lines.append(f"- {target}: {description}" if description else f"- {target}")
+
+        properties: dict[str, Any] = {
+            "target": {
+                "type": "string",
+                "enum": list(self.targets),
+                "description": "The agent to hand off to:\n" + "\n".join(lines),
+            }
+        }
+        if input_schemas:
+            properties["input"] = {
+                "anyOf": [*input_schemas, {"type": "null"}],
+                "description": "The input for the target, if it takes one. Otherwise, null.",
+            }
+
+        schema: dict[str, Any] = {
+            "type": "object",
+            "properties": properties,
+            "required": list(properties),
+            "additionalProperties": False,
+        }
+        if defs:
+            schema["$defs"] = defs
+        return schema
+
+
+def _takes_input(handoff: Handoff[Any]) -> bool:
+    return bool(handoff.input_json_schema) and handoff.input_json_schema != _NO_INPUT_SCHEMA
+
+
+def _short_description(handoff: Handoff[Any]) -> str:
+    """The handoff's description, without the boilerplate that every default description starts
+    with."""
+    boilerplate = f"Handoff to the {handoff.agent_name} agent to handle the request."
+    return " ".join(handoff.tool_description.removeprefix(boilerplate).split())
+
+
+def _tool_size(handoff: Handoff[Any]) -> int:
+    return len(
+        json.dumps(
+            {
+                "name": handoff.tool_name,
+                "description": handoff.tool_description,
+                "parameters": handoff.input_json_schema,
+            },
+            separators=(",", ":"),
+        )
+    )
+
+
+_routers: OrderedDict[
+    int, tuple[Agent[Any], tuple[Agent[Any] | Handoff[Any], ...], HandoffRouter]
+] = OrderedDict()
+
+
+def route_handoffs(agent: Agent[Any], handoffs: list[Handoff[Any]]) -> HandoffRouter:
+    """Returns the router for an agent's handoffs, which are created from `agent.handoffs`, and
+    logs how many prompt tokens it saves when it's created. Since the runner creates the handoffs
+    anew each turn, routers are memoized by the agent and the items in `agent.handoffs`, so the
+    agents it hands off to shouldn't be mutated after the agent has run.
+    """
+    items = tuple(agent.handoffs)
+    memoized = _routers.get(id(agent))
+    if (
+        memoized is not None
+        and memoized[0] is agent
+        and len(memoized[1]) == len(items)
+        and all(a is b for a, b in zip(memoized[1], items))
+    ):
+        _routers.move_to_end(id(agent))
+        return memoized[2]
+
+    router = HandoffRouter(handoffs)
+    logger.debug(
+        f"Collapsed {len(handoffs)} handoffs into {ROUTER_TOOL_NAME}, saving about "
+        f"{router.saved_tokens} prompt tokens"
+    )
+    # The agent is kept alive while its router is memoized, so its id can't be reused
+    _routers[id(agent)] = (agent, items, router)
+    if len(_routers) > _MEMO_SIZE:
+        _routers.popitem(last=False)
+    return router
@@ -0,0 +1,550 @@
+from __future__ import annotations
+
+import abc
+import bisect
+import contextvars
+import math
+import threading
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Generic, Literal, TypeVar
+
+from .usage import Usage
+
+if TYPE_CHECKING:
+    from .stream_buffer import StreamBufferStats
+
+MetricType = Literal["counter", "gauge", "histogram"]
+
+DEFAULT_LATENCY_BUCKETS: tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+TURN_BUCKETS: tuple[float, ...] = (1, 2, 3, 5, 8, 13, 21, 34, 55)
+EVENT_LOOP_LAG_BUCKETS: tuple[float, ...] = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+QUEUE_DEPTH_BUCKETS: tuple[float, ...] = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+
+@dataclass
+class Sample:
+    """A single value of a metric, e.g. one bucket of a histogram for one set of labels."""
+
+    name: str
+    labels: dict[str, str]
+    value: float
+
+
+@dataclass
+class MetricFamily:
+    """A snapshot of a metric and all of its labelled values."""
+
+    name: str
+    type: MetricType
+    help: str
+    samples: list[Sample] = field(default_factory=list)
+
+
+class _ShardedValues:
+    """A fixed-size vector of floats that is updated without locks. Each thread writes only to its
+    own shard, so concurrent updates never race; readers sum over the shards. The lock is only
+    taken the first time a thread updates the vector.
+    """
+
+    __slots__ = ("_size", "_shards", "_lock")
+
+    def __init__(self, size: int):
+        self._size = size
+        self._shards: dict[int, list[float]] = {}
+        self._lock = threading.Lock()
+
+    def shard(self) -> list[float]:
+        ident = threading.get_ident()
+        shard = self._shards.get(ident)
+        if shard is None:
+            with self._lock:
+                shard = self._shards.setdefault(ident, [0.0] * self._size)
+        return shard
+
+    def totals(self) -> list[float]:
+        totals = [0.0] * self._size
+        for shard in list(self._shards.values()):
+            for i, value in enumerate(shard):
+                totals[i] += value
+        return totals
+
+
+class CounterChild:
+    """A counter for one set of label values."""
+
+    __slots__ = ("_values",)
+
+    def __init__(self) -> None:
+        self._values = _ShardedValues(1)
+
+    def inc(self, amount: float = 1.0) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only be incremented by non-negative amounts")
+        self._values.shard()[0] += amount
+
+    @property
+    def value(self) -> float:
+        return self._values.totals()[0]
+
+
+class GaugeChild:
+    """A gauge for one set of label values."""
+
+    __slots__ = ("_value", "_lock")
+
+    def __init__(self) -> None:
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class HistogramChild:
+    """A histogram for one set of label values."""
+
+    __slots__ = ("_buckets", "_values")
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self._buckets = buckets
+        # One slot per bucket, one for +Inf, then the sum and the count
+        self._values = _ShardedValues(len(buckets) + 3)
+
+    def observe(self, value: float) -> None:
+        shard = self._values.shard()
+        shard[bisect.bisect_left(self._buckets, value)] += 1
+        shard[-2] += value
+        shard[-1] += 1
+
+    @property
+    def count(self) -> float:
+        return self._values.totals()[-1]
+
+    @property
+    def sum(self) -> float:
+        return self._values.totals()[-2]
+
+
+TChild = TypeVar("TChild", CounterChild, GaugeChild, HistogramChild)
+
+
+class _Metric(abc.ABC, Generic[TChild]):
+    type: MetricType
+
+    def __init__(self, name: str, help: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self._children: dict[tuple[str, ...], TChild] = {}
+        self._lock = threading.Lock()
+
+    @abc.abstractmethod
+    def _new_child(self) -> TChild:
+        """Creates the child metric for a new set of label values."""
+
+    def labels(self, *values: str, **kwargs: str) -> TChild:
+        """Returns the child metric for the given label values, creating it if needed."""
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.label_names)
+        if len(values) != len(self.label_names):
+            raise ValueError(f"Expected labels {self.label_names} for metric {self.name}")
+
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = self._new_child()
+                    self._children[key] = child
+        return child
+
+    def _label_dict(self, key: tuple[str, ...]) -> dict[str, str]:
+        return dict(zip(self.label_names, key))
+
+    @abc.abstractmethod
+    def collect(self) -> MetricFamily:
+        """Returns the current values of the metric and its children."""
+
+
+class Counter(_Metric[CounterChild]):
+    """A monotonically increasing value, e.g. the number of tool calls."""
+
+    type: MetricType = "counter"
+
+    def _new_child(self) -> CounterChild:
+        return CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increments the counter. Only valid for counters without labels."""
+        self.labels().inc(amount)
+
+    def collect(self) -> MetricFamily:
+        family = MetricFamily(name=self.name, type=self.type, help=self.help)
+        for key, child in list(self._children.items()):
+            family.samples.append(
+                Sample(name=f"{self.name}_total", labels=self._label_dict(key), value=child.value)
+            )
+        return family
+
+
+class Gauge(_Metric[GaugeChild]):
+    """A value that can go up and down, e.g. the number of runs in progress."""
+
+    type: MetricType = "gauge"
+
+    def _new_child(self) -> GaugeChild:
+        return GaugeChild()
+
+    def set(self, value: float) -> None:
+        """Sets the gauge. Only valid for gauges without labels."""
+        self.labels().set(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increments the gauge. Only valid for gauges without labels."""
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        """Decrements the gauge. Only valid for gauges without labels."""
+        self.labels().dec(amount)
+
+    def collect(self) -> MetricFamily:
+        family = MetricFamily(name=self.name, type=self.type, help=self.help)
+        for key, child in list(self._children.items()):
+            family.samples.append(
+                Sample(name=self.name, labels=self._label_dict(key), value=child.value)
+            )
+        return family
+
+
+class Histogram(_Metric[HistogramChild]):
+    """A distribution of observed values, e.g. tool latencies, counted in buckets."""
+
+    type: MetricType = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ):
+        super().__init__(name, help, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> HistogramChild:
+        return HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        """Observes a value. Only valid for histograms without labels."""
+        self.labels().observe(value)
+
+    def collect(self) -> MetricFamily:
+        family = MetricFamily(name=self.name, type=self.type, help=self.help)
+        for key, child in list(self._children.items()):
+            labels = self._label_dict(key)
+            totals = child._values.totals()
+            running = 0.0
+            for bound, count in zip((*self.buckets, math.inf), totals):
+                running += count
+                family.samples.append(
+                    Sample(
+                        name=f"{self.name}_bucket",
+                        labels={**labels, "le": _format_value(bound)},
+                        value=running,
+                    )
+                )
+            family.samples.append(Sample(name=f"{self.name}_sum", labels=labels, value=totals[-2]))
+            family.samples.append(
+                Sample(name=f"{self.name}_count", labels=labels, value=totals[-1])
+            )
+        return family
+
+
+class MetricsRegistry:
+    """A collection of metrics. Use `collect()` to pull a snapshot of all metrics, or
+    `render_text()` to get them in the Prometheus text exposition format (e.g. to serve from a
+    `/metrics` endpoint).
+    """
+
+    def __init__(self) -> None:
+        self._metrics: dict[
+            str, _Metric[CounterChild] | _Metric[GaugeChild] | _Metric[HistogramChild]
+        ] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, metric_type: type[_Metric[TChild]], name: str, *args, **kwargs):
+        with self._lock:
+            existing = self._metrics.get(name)
+            if existing is not None:
+                if not isinstance(existing, metric_type):
+                    raise ValueError(f"Metric {name} is already registered as a {existing.type}")
+                return existing
+            metric = metric_type(name, *args, **kwargs)
+            self._metrics[name] = metric
+            return metric
+
+    def counter(self, name: str, help: str, label_names: Sequence[str] = ()) -> Counter:
+        """Returns the counter with the given name, creating it if needed."""
+        return self._get_or_create(Counter, name, help, label_names)  # type: ignore[no-any-return]
+
+    def gauge(self, name: str, help: str, label_names: Sequence[str] = ()) -> Gauge:
+        """Returns the gauge with the given name, creating it if needed."""
+        return self._get_or_create(Gauge, name, help, label_names)  # type: ignore[no-any-return]
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ) -> Histogram:
+        """Returns the histogram with the given name, creating it if needed."""
+        return self._get_or_create(  # type: ignore[no-any-return]
+            Histogram, name, help, label_names, buckets=buckets
+        )
+
+    def collect(self) -> list[MetricFamily]:
+        """Returns a snapshot of every metric in the registry."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return [metric.collect() for metric in metrics]
+
+    def render_text(self) -> str:
+        """Renders every metric in the Prometheus text exposition format."""
+        lines = []
+        for family in self.collect():
+            lines.append(f"# HELP {family.name} {_escape_help(family.help)}")
+            lines.append(f"# TYPE {family.name} {family.type}")
+            for sample in family.samples:
+                lines.append(
+                    f"{sample.name}{_format_labels(sample.labels)} {_format_value(sample.value)}"
+                )
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+class AgentMetrics:
+    """The metrics recorded by the runner when set on `RunConfig.metrics`. Covers model latency,
+    time to first token and token usage per model; latency, calls and errors per tool; latency,
+    runs and trips per guardrail; turns per run, handoffs, max turn errors, and the depth of the
+    streaming event queue. `EventLoopWatchdog` also records event loop lag and stalls here.
+
+    A single instance can (and should) be shared across runs and threads. Updates are lock-free.
+    """
+
+    def __init__(self, registry: MetricsRegistry | None = None):
+        """
+        Args:
+            registry: The registry to create the metrics in. A new one is created if not provided.
+        """
+        self.registry = registry or MetricsRegistry()
+        r = self.registry
+
+        self.model_request_duration = r.histogram(
+            "agents_model_request_duration_seconds",
+            "Time taken by model requests, including streaming the full response.",
+            ["model"],
+        )
+        self.model_time_to_first_token = r.histogram(
+            "agents_model_time_to_first_token_seconds",
+            "Time from starting a streamed model request until the first output delta.",
+            ["model"],
+        )
+        self.model_input_tokens = r.counter(
+            "agents_model_input_tokens", "Input tokens sent to the model.", ["model"]
+        )
+        self.model_output_tokens = r.counter(
+            "agents_model_output_tokens", "Output tokens received from the model.", ["model"]
+        )
+        self.tool_duration = r.histogram(
+            "agents_tool_duration_seconds", "Time taken by function tool calls.", ["tool"]
+        )
+        self.tool_calls = r.counter("agents_tool_calls", "Function tool calls.", ["tool"])
+        self.tool_errors = r.counter(
+            "agents_tool_errors",
+            "Function tool calls that failed, whether or not the error was sent to the model.",
+            ["tool"],
+        )
+        self.guardrail_duration = r.histogram(
+            "agents_guardrail_duration_seconds",
+            "Time taken by guardrails.",
+            ["guardrail", "kind"],
+        )
+        self.guardrail_runs = r.counter(
+            "agents_guardrail_runs", "Guardrail runs.", ["guardrail", "kind"]
+        )
+        self.guardrail_trips = r.counter(
+            "agents_guardrail_tripwire_triggered",
+            "Guardrail runs that triggered the tripwire.",
+            ["guardrail", "kind"],
+        )
+        self.run_turns = r.histogram(
+            "agents_run_turns", "Turns taken per agent run.", buckets=TURN_BUCKETS
+        )
+        self.handoffs = r.counter(
+            "agents_handoffs", "Handoffs between agents.", ["from_agent", "to_agent"]
+        )
+        self.max_turns_exceeded = r.counter(
+            "agents_max_turns_exceeded", "Runs that failed with MaxTurnsExceeded."
+        )
+        self.stream_event_queue_depth = r.histogram(
+            "agents_stream_event_queue_depth",
+            "Events waiting in a streamed run's event queue, sampled on every enqueue.",
+            buckets=QUEUE_DEPTH_BUCKETS,
+        )
+        self.stream_buffer_high_water_mark = r.histogram(
+            "agents_stream_buffer_high_water_mark",
+            "The largest number of events buffered at once during a streamed run.",
+            buckets=QUEUE_DEPTH_BUCKETS,
+        )
+        self.stream_events_dropped = r.counter(
+            "agents_stream_events_dropped", "Raw stream deltas dropped because the buffer was full."
+        )
+        self.stream_events_coalesced = r.counter(
+            "agents_stream_events_coalesced",
+            "Raw stream deltas merged into a buffered delta because the buffer was full.",
+        )
+        self.stream_buffer_blocked = r.counter(
+            "agents_stream_buffer_blocked_seconds",
+            "Time streamed runs spent waiting for the consumer to make room in the buffer.",
+        )
+        self.event_loop_lag = r.histogram(
+            "agents_event_loop_lag_seconds",
+            "How late the event loop ran a scheduled callback, measured by EventLoopWatchdog.",
+            buckets=EVENT_LOOP_LAG_BUCKETS,
+        )
+        self.event_loop_stalls = r.counter(
+            "agents_event_loop_stalls",
+            "Times the event loop was blocked for longer than the watchdog threshold, by culprit "
+            "(e.g. the sync tool), or 'unmarked' for code outside a blocking_call().",
+            ["culprit"],
+        )
+
+    def record_model_request(self, model: str, duration: float, usage: Usage) -> None:
+        self.model_request_duration.labels(model).observe(duration)
+        if usage.input_tokens:
+            self.model_input_tokens.labels(model).inc(usage.input_tokens)
+        if usage.output_tokens:
+            self.model_output_tokens.labels(model).inc(usage.output_tokens)
+
+    def record_time_to_first_token(self, model: str, seconds: float) -> None:
+        self.model_time_to_first_token.labels(model).observe(seconds)
+
+    def record_tool_call(self, tool: str, duration: float, error: bool) -> None:
+        self.tool_duration.labels(tool).observe(duration)
+        self.tool_calls.labels(tool).inc()
+        if error:
+            self.tool_errors.labels(tool).inc()
+
+    def record_guardrail(
+        self, guardrail: str, kind: Literal["input", "output"], duration: float, tripped: bool
+    ) -> None:
+        self.guardrail_duration.labels(guardrail, kind).observe(duration)
+        self.guardrail_runs.labels(guardrail, kind).inc()
+        if tripped:
+            self.guardrail_trips.labels(guardrail, kind).inc()
+
+    def record_run(self, turns: int) -> None:
+        self.run_turns.observe(turns)
+
+    def record_handoff(self, from_agent: str, to_agent: str) -> None:
+        self.handoffs.labels(from_agent, to_agent).inc()
+
+    def record_max_turns_exceeded(self) -> None:
+        self.max_turns_exceeded.inc()
+
+    def record_event_queue_depth(self, depth: int) -> None:
+        self.stream_event_queue_depth.observe(depth)
+
+    def record_stream_buffer(self, stats: StreamBufferStats) -> None:
+        self.stream_buffer_high_water_mark.observe(stats.high_water_mark)
+        if stats.dropped:
+            self.stream_events_dropped.inc(stats.dropped)
+        if stats.coalesced:
+            self.stream_events_coalesced.inc(stats.coalesced)
+        if stats.blocked_time:
+            self.stream_buffer_blocked.inc(stats.blocked_time)
+
+    def record_event_loop_lag(self, lag: float) -> None:
+        self.event_loop_lag.observe(lag)
+
+    def record_event_loop_stall(self, culprit: str) -> None:
+        self.event_loop_stalls.labels(culprit).inc()
+
+
+# Function tools convert exceptions into error messages for the model, so the runner can't see
+# them. The runner sets a fresh list here around each tool call, and the tool appends to it.
+_tool_errors: contextvars.ContextVar[list[BaseException] | None] = contextvars.ContextVar(
+    "tool_errors", default=None
+)
+
+
+def record_handled_tool_error(error: BaseException) -> None:
+    """Records an error that a tool handled itself (e.g. by returning an error message)."""
+    errors = _tool_errors.get()
+    if errors is not None:
+        errors.append(error)
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels.items():
+        escaped = value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{key}="{escaped}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
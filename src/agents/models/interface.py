@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import abc
+import contextvars
 import enum
 from collections.abc import AsyncIterator
 from typing import TYPE_CHECKING
@@ -14,6 +15,29 @@ if TYPE_CHECKING:
     from ..model_settings import ModelSettings
 
 
+# The event types the consumer of the current streamed run subscribed to, or None for all of them
+_subscribed_stream_events: contextvars.ContextVar[frozenset[str] | None] = contextvars.ContextVar(
+    "subscribed_stream_events", default=None
+)
+
+
+def is_stream_event_wanted(event_type: str) -> bool:
+    """Whether the consumer of the current streamed run wants raw response events of the given type
+    (e.g. `response.output_text.delta`). Model implementations can check this in
+    `stream_response()` to avoid building events that would be discarded. See the `events` argument
+    of `Runner.run_streamed()`.
+
+    The runner always needs `response.completed`, so it's always wanted.
+    """
+    subscribed = _subscribed_stream_events.get()
+    return (
+        subscribed is None
+        or event_type == "response.completed"
+        or "raw_response_event" in subscribed
+        or event_type in subscribed
+    )
+
+
 class ModelTracing(enum.Enum):
     DISABLED = 0
     """Tracing is disabled entirely."""
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
+import asyncio
 import dataclasses
 import json
 import time
-from collections.abc import AsyncIterator, Iterable
+from collections.abc import AsyncIterator, Iterable, Iterator
 from dataclasses import dataclass, field
 from typing import TYPE_CHECKING, Any, Literal, cast, overload
 
@@ -54,20 +55,20 @@ from openai.types.responses import (
 )
 from openai.types.responses.response_input_param import FunctionCallOutput, ItemReference, Message
 
-from .. import _debug
+from .. import _debug, _utils
 from ..agent_output import AgentOutputSchema
 from ..exceptions import AgentsException, UserError
 from ..handoffs import Handoff
 from ..items import ModelResponse, TResponseInputItem, TResponseOutputItem, TResponseStreamEvent
 from ..logger import logger
 from ..tool import FunctionTool, Tool
-from ..tracing import generation_span
+from ..tracing import SpanError, generation_span
 from ..tracing.span_data import GenerationSpanData
 from ..tracing.spans import Span
 from ..usage import Usage
 from ..version import __version__
 from .fake_id import FAKE_RESPONSES_ID
-from .interface import Model, ModelTracing
+from .interface import Model, ModelTracing, is_stream_event_wanted
 
 if TYPE_CHECKING:
     from ..model_settings import ModelSettings
@@ -78,11 +79,271 @@ _HEADERS = {"User-Agent": _USER_AGENT}
 
 
 @dataclass
+class _StreamingFunctionCall:
+    call_id: list[str] = field(default_factory=list)
+    name: list[str] = field(default_factory=list)
+    arguments: list[str] = field(default_factory=list)
+    output_index: int | None = None
+    """Set once the call has started, i.e. once its name is complete."""
+    item: ResponseFunctionToolCall | None = None
+    """Set once the call is done."""
+
+
 class _StreamingState:
-    started: bool = False
-    text_content_index_and_output: tuple[int, ResponseOutputText] | None = None
-    refusal_content_index_and_output: tuple[int, ResponseOutputRefusal] | None = None
-    function_calls: dict[int, ResponseFunctionToolCall] = field(default_factory=dict)
+    """Converts a stream of chat completion chunks into Responses API stream events.
+
+    Text, refusals and tool call fragments are collected in lists and joined once, so handling a
+    chunk doesn't depend on how much has been streamed so far. Each tool call's events are sent as
+    soon as possible: it starts once its name is complete (i.e. a chunk for it doesn't extend the
+    name), and it's done once the next tool call starts, since tool calls are streamed one at a
+    time.
+    """
+
+    def __init__(self, response: Response):
+        self.response = response
+        self.started = False
+        self.usage: CompletionUsage | None = None
+
+        self.message_output_index: int | None = None
+        self.text_content_index: int | None = None
+        self.text: list[str] = []
+        self.refusal_content_index: int | None = None
+        self.refusal: list[str] = []
+        self.function_calls: dict[int, _StreamingFunctionCall] = {}
+        self._next_output_index = 0
+        self._next_content_index = 0
+
+        # Skip building events that the consumer of the run didn't subscribe to
+        self.emit_created = is_stream_event_wanted("response.created")
+        self.emit_item_added = is_stream_event_wanted("response.output_item.added")
+        self.emit_part_added = is_stream_event_wanted("response.content_part.added")
+        self.emit_text_delta = is_stream_event_wanted("response.output_text.delta")
+        self.emit_refusal_delta = is_stream_event_wanted("response.refusal.delta")
+        self.emit_args_delta = is_stream_event_wanted("response.function_call_arguments.delta")
+        self.emit_part_done = is_stream_event_wanted("response.content_part.done")
+        self.emit_item_done = is_stream_event_wanted("response.output_item.done")
+
+    def handle_chunk(self, chunk: ChatCompletionChunk) -> Iterator[TResponseStreamEvent]:
+        if not self.started:
+            self.started = True
+            if self.emit_created:
+                yield ResponseCreatedEvent(response=self.response, type="response.created")
+
+        # The usage is only available in the last chunk
+        self.usage = chunk.usage
+
+        if not chunk.choices or not chunk.choices[0].delta:
+            return
+
+        delta = chunk.choices[0].delta
+
+        # Handle text
+        if delta.content:
+            if self.text_content_index is None:
+                yield from self._start_message()
+                self.text_content_index = self._next_content_index
+                self._next_content_index += 1
+                if self.emit_part_added:
+                    yield ResponseContentPartAddedEvent(
+                        content_index=self.text_content_index,
+                        item_id=FAKE_RESPONSES_ID,
+                        output_index=self.message_output_index,  # type: ignore[arg-type]
+                        part=ResponseOutputText(text="", type="output_text", annotations=[]),
+                        type="response.content_part.added",
+                    )
+            self.text.append(delta.content)
+            if self.emit_text_delta:
+                yield ResponseTextDeltaEvent(
+                    content_index=self.text_content_index,
+                    delta=delta.content,
+                    item_id=FAKE_RESPONSES_ID,
+                    output_index=self.message_output_index,  # type: ignore[arg-type]
+                    type="response.output_text.delta",
+                )
+
+        # Handle refusals (model declines to answer)
+        if delta.refusal:
+            if self.refusal_content_index is None:
+                yield from self._start_message()
+                self.refusal_content_index = self._next_content_index
+                self._next_content_index += 1
+                if self.emit_part_added:
+                    yield ResponseContentPartAddedEvent(
+                        content_index=self.refusal_content_index,
+                        item_id=FAKE_RESPONSES_ID,
+                        output_index=self.message_output_index,  # type: ignore[arg-type]
+                        part=ResponseOutputRefusal(refusal="", type="refusal"),
+                        type="response.content_part.added",
+                    )
+            self.refusal.append(delta.refusal)
+            if self.emit_refusal_delta:
+                yield ResponseRefusalDeltaEvent(
+                    content_index=self.refusal_content_index,
+                    delta=delta.refusal,
+                    item_id=FAKE_RESPONSES_ID,
+                    output_index=self.message_output_index,  # type: ignore[arg-type]
+                    type="response.refusal.delta",
+                )
+
+        # Handle tool calls
+        for tc_delta in delta.tool_calls or []:
+            call = self.function_calls.get(tc_delta.index)
+            if call is None:
+                # Tool calls are streamed one at a time, so the previous ones are complete
+                for previous in self.function_calls.values():
+                    yield from self._end_function_call(previous)
+                call = self.function_calls[tc_delta.index] = _StreamingFunctionCall()
+
+            if tc_delta.id:
+                call.call_id.append(tc_delta.id)
+            name = tc_delta.function.name if tc_delta.function else None
+            arguments = tc_delta.function.arguments if tc_delta.function else None
+            if name:
+                call.name.append(name)
+            if arguments:
+                call.arguments.append(arguments)
+
+            if call.output_index is None:
+                if call.name and not name:
+                    # This chunk didn't extend the name, so it's complete
+                    yield from self._start_function_call(call)
+            elif arguments and self.emit_args_delta:
+                yield ResponseFunctionCallArgumentsDeltaEvent(
+                    delta=arguments,
+                    item_id=FAKE_RESPONSES_ID,
+                    output_index=call.output_index,
+                    type="response.function_call_arguments.delta",
+                )
+
+    def finish(self) -> Iterator[TResponseStreamEvent]:
+        """Ends all the output items, then sends the completed response."""
+        outputs: list[tuple[int, ResponseOutputItem]] = []
+
+        if self.message_output_index is not None:
+            assistant_msg = ResponseOutputMessage(
+                id=FAKE_RESPONSES_ID,
+                content=[],
+                role="assistant",
+                type="message",
+                status="completed",
+            )
+            parts: list[tuple[int, ResponseOutputText | ResponseOutputRefusal]] = []
+            if self.text_content_index is not None:
+                parts.append(
+                    (
+                        self.text_content_index,
+                        ResponseOutputText(
+                            text="".join(self.text), type="output_text", annotations=[]
+                        ),
+                    )
+                )
+            if self.refusal_content_index is not None:
+                parts.append(
+                    (
+                        self.refusal_content_index,
+                        ResponseOutputRefusal(refusal="".join(self.refusal), type="refusal"),
+                    )
+                )
+            for content_index, part in sorted(parts, key=lambda p: p[0]):
+                assistant_msg.content.append(part)
+                # Send end event for this content part
+                if self.emit_part_done:
+                    yield ResponseContentPartDoneEvent(
+                        content_index=content_index,
+                        item_id=FAKE_RESPONSES_ID,
+                        output_index=self.message_output_index,
+                        part=part,
+                        type="response.content_part.done",
+                    )
+
+            # send a ResponseOutputItemDone for the assistant message
+            if self.emit_item_done:
+                yield ResponseOutputItemDoneEvent(
+                    item=assistant_msg,
+                    output_index=self.message_output_index,
+                    type="response.output_item.done",
+                )
+            outputs.append((self.message_output_index, assistant_msg))
+
+        for call in self.function_calls.values():
+            yield from self._end_function_call(call)
+            assert call.output_index is not None and call.item is not None
+            outputs.append((call.output_index, call.item))
+
+        final_response = self.response.model_copy(
+            update={
+                "output": [item for _, item in sorted(outputs, key=lambda o: o[0])],
+                "usage": self.usage,
+            }
+        )
+        yield ResponseCompletedEvent(response=final_response, type="response.completed")
+
+    def _start_message(self) -> Iterator[TResponseStreamEvent]:
+        if self.message_output_index is not None:
+            return
+
+        self.message_output_index = self._next_output_index
+        self._next_output_index += 1
+        # Notify consumers of the start of a new output message
+        if self.emit_item_added:
+            yield ResponseOutputItemAddedEvent(
+                item=ResponseOutputMessage(
+                    id=FAKE_RESPONSES_ID,
+                    content=[],
+                    role="assistant",
+                    type="message",
+                    status="in_progress",
+                ),
+                output_index=self.message_output_index,
+                type="response.output_item.added",
+            )
+
+    def _start_function_call(self, call: _StreamingFunctionCall) -> Iterator[TResponseStreamEvent]:
+        if call.output_index is not None:
+            return
+
+        call.output_index = self._next_output_index
+        self._next_output_index += 1
+        if self.emit_item_added:
+            yield ResponseOutputItemAddedEvent(
+                item=ResponseFunctionToolCall(
+                    id=FAKE_RESPONSES_ID,
+                    call_id="".join(call.call_id),
+                    arguments="",
+                    name="".join(call.name),
+                    type="function_call",
+                ),
+                output_index=call.output_index,
+                type="response.output_item.added",
+            )
+        # Send the arguments that arrived before the name was complete
+        if call.arguments and self.emit_args_delta:
+            yield ResponseFunctionCallArgumentsDeltaEvent(
+                delta="".join(call.arguments),
+                item_id=FAKE_RESPONSES_ID,
+                output_index=call.output_index,
+                type="response.function_call_arguments.delta",
+            )
+
+    def _end_function_call(self, call: _StreamingFunctionCall) -> Iterator[TResponseStreamEvent]:
+        if call.item is not None:
+            return
+
+        yield from self._start_function_call(call)
+        assert call.output_index is not None
+        call.item = ResponseFunctionToolCall(
+            id=FAKE_RESPONSES_ID,
+            call_id="".join(call.call_id),
+            arguments="".join(call.arguments),
+            name="".join(call.name),
+            type="function_call",
+        )
+        if self.emit_item_done:
+            yield ResponseOutputItemDoneEvent(
+                item=call.item,
+                output_index=call.output_index,
+                type="response.output_item.done",
+            )
 
 
 class OpenAIChatCompletionsModel(Model):
@@ -188,229 +449,27 @@ class OpenAIChatCompletionsModel(Model):
                 stream=True,
             )
 
-            usage: CompletionUsage | None = None
-            state = _StreamingState()
-
-            async for chunk in stream:
-                if not state.started:
-                    state.started = True
-                    yield ResponseCreatedEvent(
-                        response=response,
-                        type="response.created",
-                    )
-
-                # The usage is only available in the last chunk
-                usage = chunk.usage
-
-                if not chunk.choices or not chunk.choices[0].delta:
-                    continue
-
-                delta = chunk.choices[0].delta
-
-                # Handle text
-                if delta.content:
-                    if not state.text_content_index_and_output:
-                        # Initialize a content tracker for streaming text
-                        state.text_content_index_and_output = (
-                            0 if not state.refusal_content_index_and_output else 1,
-                            ResponseOutputText(
-                                text="",
-                                type="output_text",
-                                annotations=[],
-                            ),
-                        )
-                        # Start a new assistant message stream
-                        assistant_item = ResponseOutputMessage(
-                            id=FAKE_RESPONSES_ID,
-                            content=[],
-                            role="assistant",
-                            type="message",
-                            status="in_progress",
-                        )
-                        # Notify consumers of the start of a new output message + first content part
-                        yield ResponseOutputItemAddedEvent(
-                            item=assistant_item,
-                            output_index=0,
-                            type="response.output_item.added",
-                        )
-                        yield ResponseContentPartAddedEvent(
-                            content_index=state.text_content_index_and_output[0],
-                            item_id=FAKE_RESPONSES_ID,
-                            output_index=0,
-                            part=ResponseOutputText(
-                                text="",
-                                type="output_text",
-                                annotations=[],
-                            ),
-                            type="response.content_part.added",
-                        )
-                    # Emit the delta for this segment of content
-                    yield ResponseTextDeltaEvent(
-                        content_index=state.text_content_index_and_output[0],
-                        delta=delta.content,
-                        item_id=FAKE_RESPONSES_ID,
-                        output_index=0,
-                        type="response.output_text.delta",
-                    )
-                    # Accumulate the text into the response part
-                    state.text_content_index_and_output[1].text += delta.content
-
-                # Handle refusals (model declines to answer)
-                if delta.refusal:
-                    if not state.refusal_content_index_and_output:
-                        # Initialize a content tracker for streaming refusal text
-                        state.refusal_content_index_and_output = (
-                            0 if not state.text_content_index_and_output else 1,
-                            ResponseOutputRefusal(refusal="", type="refusal"),
-                        )
-                        # Start a new assistant message if one doesn't exist yet (in-progress)
-                        assistant_item = ResponseOutputMessage(
-                            id=FAKE_RESPONSES_ID,
-                            content=[],
-                            role="assistant",
-                            type="message",
-                            status="in_progress",
-                        )
-                        # Notify downstream that assistant message + first content part are starting
-                        yield ResponseOutputItemAddedEvent(
-                            item=assistant_item,
-                            output_index=0,
-                            type="response.output_item.added",
-                        )
-                        yield ResponseContentPartAddedEvent(
-                            content_index=state.refusal_content_index_and_output[0],
-                            item_id=FAKE_RESPONSES_ID,
-                            output_index=0,
-                            part=ResponseOutputText(
-                                text="",
-                                type="output_text",
-                                annotations=[],
-                            ),
-                            type="response.content_part.added",
-                        )
-                    # Emit the delta for this segment of refusal
-                    yield ResponseRefusalDeltaEvent(
-                        content_index=state.refusal_content_index_and_output[0],
-                        delta=delta.refusal,
-                        item_id=FAKE_RESPONSES_ID,
-                        output_index=0,
-                        type="response.refusal.delta",
-                    )
-                    # Accumulate the refusal string in the output part
-                    state.refusal_content_index_and_output[1].refusal += delta.refusal
-
-                # Handle tool calls
-                # Because we don't know the name of the function until the end of the stream, we'll
-                # save everything and yield events at the end
-                if delta.tool_calls:
-                    for tc_delta in delta.tool_calls:
-                        if tc_delta.index not in state.function_calls:
-                            state.function_calls[tc_delta.index] = ResponseFunctionToolCall(
-                                id=FAKE_RESPONSES_ID,
-                                arguments="",
-                                name="",
-                                type="function_call",
-                                call_id="",
-                            )
-                        tc_function = tc_delta.function
-
-                        state.function_calls[tc_delta.index].arguments += (
-                            tc_function.arguments if tc_function else ""
-                        ) or ""
-                        state.function_calls[tc_delta.index].name += (
-                            tc_function.name if tc_function else ""
-                        ) or ""
-                        state.function_calls[tc_delta.index].call_id += tc_delta.id or ""
-
-            function_call_starting_index = 0
-            if state.text_content_index_and_output:
-                function_call_starting_index += 1
-                # Send end event for this content part
-                yield ResponseContentPartDoneEvent(
-                    content_index=state.text_content_index_and_output[0],
-                    item_id=FAKE_RESPONSES_ID,
-                    output_index=0,
-                    part=state.text_content_index_and_output[1],
-                    type="response.content_part.done",
-                )
-
-            if state.refusal_content_index_and_output:
-                function_call_starting_index += 1
-                # Send end event for this content part
-                yield ResponseContentPartDoneEvent(
-                    content_index=state.refusal_content_index_and_output[0],
-                    item_id=FAKE_RESPONSES_ID,
-                    output_index=0,
-                    part=state.refusal_content_index_and_output[1],
-                    type="response.content_part.done",
-                )
-
-            # Actually send events for the function calls
-            for function_call in state.function_calls.values():
-                # First, a ResponseOutputItemAdded for the function call
-                yield ResponseOutputItemAddedEvent(
-                    item=ResponseFunctionToolCall(
-                        id=FAKE_RESPONSES_ID,
-                        call_id=function_call.call_id,
-                        arguments=function_call.arguments,
-                        name=function_call.name,
-                        type="function_call",
-                    ),
-                    output_index=function_call_starting_index,
-                    type="response.output_item.added",
-                )
-                # Then, yield the args
-                yield ResponseFunctionCallArgumentsDeltaEvent(
-                    delta=function_call.arguments,
-                    item_id=FAKE_RESPONSES_ID,
-                    output_index=function_call_starting_index,
-                    type="response.function_call_arguments.delta",
-                )
-                # Finally, the ResponseOutputItemDone
-                yield ResponseOutputItemDoneEvent(
-                    item=ResponseFunctionToolCall(
-                        id=FAKE_RESPONSES_ID,
-                        call_id=function_call.call_id,
-                        arguments=function_call.arguments,
-                        name=function_call.name,
-                        type="function_call",
-                    ),
-                    output_index=function_call_starting_index,
-                    type="response.output_item.done",
-                )
-
-            # Finally, send the Response completed event
-            outputs: list[ResponseOutputItem] = []
-            if state.text_content_index_and_output or state.refusal_content_index_and_output:
-                assistant_msg = ResponseOutputMessage(
-                    id=FAKE_RESPONSES_ID,
-                    content=[],
-                    role="assistant",
-                    type="message",
-                    status="completed",
-                )
-                if state.text_content_index_and_output:
-                    assistant_msg.content.append(state.text_content_index_and_output[1])
-                if state.refusal_content_index_and_output:
-                    assistant_msg.content.append(state.refusal_content_index_and_output[1])
-                outputs.append(assistant_msg)
-
-                # send a ResponseOutputItemDone for the assistant message
-                yield ResponseOutputItemDoneEvent(
-                    item=assistant_msg,
-                    output_index=0,
-                    type="response.output_item.done",
-                )
-
-            for function_call in state.function_calls.values():
-                outputs.append(function_call)
-
-            final_response = response.model_copy(update={"output": outputs, "usage": usage})
-
-            yield ResponseCompletedEvent(
-                response=final_response,
-                type="response.completed",
-            )
+            state = _StreamingState(response)
+            try:
+                async for chunk in stream:
+                    for event in state.handle_chunk(chunk):
+                        yield event
+            except (asyncio.CancelledError, GeneratorExit):
+                # The consumer went away before the response completed
+                span_generation.set_error(SpanError(message="Stream cancelled", data={}))
+                raise
+            finally:
+                # Release the connection, even if the stream wasn't read to the end
+                await _utils.aclose(stream)
+
+            final_response: Response | None = None
+            for event in state.finish():
+                if isinstance(event, ResponseCompletedEvent):
+                    final_response = event.response
+                yield event
+
+            assert final_response is not None
+            usage = state.usage
             if tracing.include_data():
                 span_generation.span_data.output = [final_response.model_dump()]
 
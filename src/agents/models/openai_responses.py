@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import json
 from collections.abc import AsyncIterator
 from dataclasses import dataclass
@@ -17,7 +18,7 @@ from openai.types.responses import (
     response_create_params,
 )
 
-from .. import _debug
+from .. import _debug, _utils
 from ..agent_output import AgentOutputSchema
 from ..exceptions import UserError
 from ..handoffs import Handoff
@@ -149,10 +150,18 @@ class OpenAIResponsesModel(Model):
 
                 final_response: Response | None = None
 
-                async for chunk in stream:
-                    if isinstance(chunk, ResponseCompletedEvent):
-                        final_response = chunk.response
-                    yield chunk
+                try:
+                    async for chunk in stream:
+                        if isinstance(chunk, ResponseCompletedEvent):
+                            final_response = chunk.response
+                        yield chunk
+                except (asyncio.CancelledError, GeneratorExit):
+                    # The consumer went away before the response completed
+                    span_response.set_error(SpanError(message="Stream cancelled", data={}))
+                    raise
+                finally:
+                    # Release the connection, even if the stream wasn't read to the end
+                    await _utils.aclose(stream)
 
                 if final_response and tracing.include_data():
                     span_response.span_data.response = final_response
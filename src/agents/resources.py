@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+from collections.abc import AsyncIterator, Awaitable
+from dataclasses import dataclass
+from typing import Any, Callable, Generic, Optional, TypeVar, overload
+
+from .exceptions import UserError
+from .logger import logger
+
+T = TypeVar("T")
+
+_Close = Optional[Callable[[], Awaitable[None]]]
+
+
+@dataclass(eq=False)
+class Resource(Generic[T]):
+    """Something that function tools share across runs, and that's expensive to create, such as a
+    database connection pool, an HTTP session or a loaded model. A resource is set up the first
+    time a tool needs it (or when it's warmed up), kept in a `ResourceRegistry` until the registry
+    is shut down, and injected into any function tool with a parameter annotated as
+    `Annotated[T, resource]`. Like `RunContextWrapper`, injected parameters aren't part of the
+    tool's JSON schema.
+
+    ```python
+    async def create_pool() -> Pool:
+        return await create_database_pool(DSN)
+
+    db_pool = Resource(create_pool, teardown=lambda pool: pool.close())
+
+    @function_tool
+    async def lookup_order(pool: Annotated[Pool, db_pool], order_id: str) -> str:
+        ...
+    ```
+    """
+
+    setup: Callable[[], Awaitable[T]]
+    """Creates the resource."""
+
+    teardown: Callable[[T], Awaitable[None]] | None = None
+    """Releases the resource, when the registry is shut down."""
+
+    name: str | None = None
+    """A name for the resource, used in logs. Defaults to the name of the setup function."""
+
+    def __post_init__(self) -> None:
+        if self.name is None:
+            self.name = getattr(self.setup, "__name__", "resource")
+
+    async def _open(self) -> tuple[T, _Close]:
+        """Sets up the resource, and returns it along with a function that tears it down."""
+        value = await self.setup()
+        if self.teardown is None:
+            return value, None
+        teardown = self.teardown
+        return value, lambda: teardown(value)
+
+
+class _GeneratorResource(Resource[T]):
+    """A resource defined by an async generator, which yields the resource once, and tears it down
+    after the yield."""
+
+    def __init__(self, func: Callable[[], AsyncIterator[T]], name: str | None = None):
+        self._func = func
+        super().__init__(setup=self._setup, name=name or func.__name__)
+
+    async def _setup(self) -> T:
+        # Without the generator, the resource couldn't be torn down
+        raise UserError(f"Resource {self.name} can only be set up by a ResourceRegistry")
+
+    async def _open(self) -> tuple[T, _Close]:
+        iterator = self._func()
+        value = await iterator.__anext__()
+
+        async def close() -> None:
+            try:
+                await iterator.__anext__()
+            except StopAsyncIteration:
+                return
+            raise UserError(f"Resource {self.name} yielded more than once")
+
+        return value, close
+
+
+@overload
+def resource(func: Callable[[], AsyncIterator[T]], *, name: str | None = None) -> Resource[T]: ...
+
+
+@overload
+def resource(func: Callable[[], Awaitable[T]], *, name: str | None = None) -> Resource[T]: ...
+
+
+def resource(
+    func: Callable[[], AsyncIterator[T]] | Callable[[], Awaitable[T]],
+    *,
+    name: str | None = None,
+) -> Resource[T]:
+    """Creates a resource from an async function that returns it, or from an async generator that
+    yields it once and then tears it down:
+
+    ```python
+    @resource
+    async def http_session():
+        async with aiohttp.ClientSession() as session:
+            yield session
+    ```
+    """
+    if inspect.isasyncgenfunction(func):
+        return _GeneratorResource(func, name=name)
+    return Resource(setup=func, name=name)  # type: ignore[arg-type]
+
+
+class ResourceRegistry:
+    """Holds the resources that have been set up, so that they're shared by every run. Resources
+    are set up on first use, or ahead of time with `warm_up()`, and torn down, in the reverse of
+    the order they were set up in, by `shutdown()`. A registry can also be used as an async context
+    manager, which shuts it down on exit.
+
+    Resources such as connection pools usually belong to the event loop they were created in, so a
+    registry should only be used from one event loop.
+    """
+
+    def __init__(self) -> None:
+        self._values: dict[Resource[Any], Any] = {}
+        self._opened: list[tuple[Resource[Any], _Close]] = []
+        self._locks: dict[Resource[Any], asyncio.Lock] = {}
+
+    async def get(self, resource: Resource[T]) -> T:
+        """Returns a resource, setting it up if it isn't already."""
+        if resource in self._values:
+            return self._values[resource]  # type: ignore[no-any-return]
+
+        lock = self._locks.get(resource)
+        if lock is None:
+            lock = self._locks[resource] = asyncio.Lock()
+        # Concurrent tool calls that need the same resource only set it up once
+        async with lock:
+            if resource in self._values:
+                return self._values[resource]  # type: ignore[no-any-return]
+            logger.debug(f"Setting up resource {resource.name}")
+            value, close = await resource._open()
+            self._values[resource] = value
+            self._opened.append((resource, close))
+        return value
+
+    def is_ready(self, resource: Resource[Any]) -> bool:
+        """Whether a resource has been set up."""
+        return resource in self._values
+
+    async def warm_up(self, *resources: Resource[Any]) -> None:
+        """Sets up resources ahead of time, e.g. at startup, so the first tool calls that need them
+        don't have to wait. The resources are set up concurrently.
+        """
+        await asyncio.gather(*(self.get(resource) for resource in resources))
+
+    async def shutdown(self) -> None:
+        """Tears down every resource that has been set up, in the reverse of the order they were
+        set up in. Errors are logged rather than raised, so that one failed teardown doesn't stop
+        the others. Resources are set up again if they're used after a shutdown.
+        """
+        opened, self._opened = self._opened, []
+        self._values.clear()
+        self._locks.clear()
+        for resource, close in reversed(opened):
+            if close is None:
+                continue
+            logger.debug(f"Tearing down resource {resource.name}")
+            try:
+                await close()
+            except Exception as e:
+                logger.error(f"Error tearing down resource {resource.name}: {e}")
+
+    async def __aenter__(self) -> ResourceRegistry:
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        await self.shutdown()
+
+
+_default_registry = ResourceRegistry()
+
+
+def get_default_resource_registry() -> ResourceRegistry:
+    """Returns the registry that resources are injected into function tools from."""
+    return _default_registry
+
+
+def set_default_resource_registry(registry: ResourceRegistry) -> None:
+    """Sets the registry that resources are injected into function tools from."""
+    global _default_registry
+    _default_registry = registry
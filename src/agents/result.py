@@ -2,12 +2,13 @@ from __future__ import annotations
 
 import abc
 import asyncio
-from collections.abc import AsyncIterator
+from collections.abc import AsyncIterator, Iterable
 from dataclasses import dataclass, field
 from typing import TYPE_CHECKING, Any, cast
 
 from typing_extensions import TypeVar
 
+from . import _utils
 from ._run_impl import QueueCompleteSentinel
 from .agent import Agent
 from .agent_output import AgentOutputSchema
@@ -15,8 +16,18 @@ from .exceptions import InputGuardrailTripwireTriggered, MaxTurnsExceeded
 from .guardrail import InputGuardrailResult, OutputGuardrailResult
 from .items import ItemHelpers, ModelResponse, RunItem, TResponseInputItem
 from .logger import logger
+from .stream_buffer import (
+    StreamBroadcast,
+    StreamBufferStats,
+    StreamEventQueue,
+    StreamSubscription,
+    event_matches,
+)
 from .stream_events import StreamEvent
-from .tracing import Trace
+from .timing import RunTimings
+from .tracing import Trace, get_current_trace
+from .tracing.scope import Scope
+from .usage import Usage
 
 if TYPE_CHECKING:
     from ._run_impl import QueueCompleteSentinel
@@ -84,6 +95,11 @@ class RunResultBase(abc.ABC):
 class RunResult(RunResultBase):
     _last_agent: Agent[Any]
 
+    timings: RunTimings | None = None
+    """Where the time went during the run, turn by turn. Only set if `RunConfig.collect_timings`
+    is enabled.
+    """
+
     @property
     def last_agent(self) -> Agent[Any]:
         """The last agent that was run."""
@@ -119,10 +135,23 @@ class RunResultStreaming(RunResultBase):
     is_complete: bool = False
     """Whether the agent has finished running."""
 
+    timings: RunTimings | None = None
+    """Where the time went during the run, turn by turn. Only set if `RunConfig.collect_timings`
+    is enabled. Updates as the run progresses; the totals are set once the run completes.
+    """
+
+    usage: Usage = field(default_factory=Usage)
+    """The usage of the run so far, updated as each model response completes. Model requests that
+    were cut short by a cancellation are counted in `Usage.cancelled_requests`.
+    """
+
+    is_cancelled: bool = False
+    """Whether the run was cancelled, either with `cancel()` or because the consumer stopped
+    reading `stream_events()` before the run completed.
+    """
+
     # Queues that the background run_loop writes to
-    _event_queue: asyncio.Queue[StreamEvent | QueueCompleteSentinel] = field(
-        default_factory=asyncio.Queue, repr=False
-    )
+    _event_queue: StreamEventQueue = field(default_factory=StreamEventQueue, repr=False)
     _input_guardrail_queue: asyncio.Queue[InputGuardrailResult] = field(
         default_factory=asyncio.Queue, repr=False
     )
@@ -133,6 +162,12 @@ class RunResultStreaming(RunResultBase):
     _output_guardrails_task: asyncio.Task[Any] | None = field(default=None, repr=False)
     _stored_exception: Exception | None = field(default=None, repr=False)
 
+    # Broadcast mode, started by the first call to subscribe()
+    _broadcast_buffer_size: int = field(default=1000, repr=False)
+    _broadcast: StreamBroadcast | None = field(default=None, repr=False)
+    _broadcast_task: asyncio.Task[Any] | None = field(default=None, repr=False)
+    _broadcast_queue_offset: int = field(default=0, repr=False)
+
     @property
     def last_agent(self) -> Agent[Any]:
         """The last agent that was run. Updates as the agent run progresses, so the true last agent
@@ -140,46 +175,178 @@ class RunResultStreaming(RunResultBase):
         """
         return self.current_agent
 
-    async def stream_events(self) -> AsyncIterator[StreamEvent]:
+    @property
+    def buffer_stats(self) -> StreamBufferStats:
+        """Metrics for the buffer of events waiting to be consumed by `stream_events()`, e.g. its
+        high-water mark. See `RunConfig.stream_buffer_size`.
+        """
+        return self._event_queue.stats
+
+    async def stream_events(
+        self, include: Iterable[str] | None = None
+    ) -> AsyncIterator[StreamEvent]:
         """Stream deltas for new items as they are generated. We're using the types from the
         OpenAI Responses API, so these are semantic events: each event has a `type` field that
         describes the type of the event, along with the data for that event.
 
+        Args:
+            include: If provided, only these events are yielded. Can contain stream event types,
+                raw response event types and run item event names. Other events are still built
+                and buffered, then skipped; use the `events` argument of `Runner.run_streamed()` to
+                avoid that.
+
+        Only one consumer can read this stream, unless the run is in broadcast mode (see
+        `subscribe()`), in which case this returns a new subscription.
+
         This will raise:
         - A MaxTurnsExceeded exception if the agent exceeds the max_turns limit.
         - A GuardrailTripwireTriggered exception if a guardrail is tripped.
         """
-        while True:
-            self._check_errors()
-            if self._stored_exception:
-                logger.debug("Breaking due to stored exception")
-                self.is_complete = True
-                break
-
-            if self.is_complete and self._event_queue.empty():
-                break
-
-            try:
-                item = await self._event_queue.get()
-            except asyncio.CancelledError:
-                break
-
-            if isinstance(item, QueueCompleteSentinel):
-                self._event_queue.task_done()
-                # Check for errors, in case the queue was completed due to an exception
+        if self._broadcast is not None:
+            # Reading the queue directly would steal events from the subscribers
+            async for event in self.subscribe(include):
+                yield event
+            return
+
+        events = self._read_event_queue(
+            frozenset(include) if include is not None else None, reset_current_trace=True
+        )
+        try:
+            async for event in events:
+                yield event
+        finally:
+            # If the consumer stopped early, this cancels the run
+            await _utils.aclose(events)
+
+    def cancel(self) -> None:
+        """Cancels the run. The task running the agent is cancelled, which closes the model stream
+        (releasing its connection) and ends the run's spans, recording the cancellation on them.
+        `stream_events()` then stops without raising. Does nothing if the run already completed.
+
+        This is also done automatically if the consumer stops reading `stream_events()` before the
+        run completes, e.g. when a client disconnects.
+        """
+        if self.is_cancelled or self._run_impl_task is None or self._run_impl_task.done():
+            return
+
+        logger.debug("Cancelling the run")
+        self.is_cancelled = True
+        self.is_complete = True
+        # Finish the trace once the run's spans are finished
+        self._run_impl_task.add_done_callback(lambda _: self._finish_trace(reset_current=False))
+        self._release_current_trace()
+        self._cleanup_tasks()
+        # Wake up the consumer, if it's waiting for the next event
+        self._event_queue.put_nowait(QueueCompleteSentinel())
+
+    async def _read_event_queue(
+        self, included: frozenset[str] | None, reset_current_trace: bool
+    ) -> AsyncIterator[StreamEvent]:
+        finished = False
+        try:
+            while True:
                 self._check_errors()
-                break
+                if self._stored_exception:
+                    logger.debug("Breaking due to stored exception")
+                    self.is_complete = True
+                    break
+
+                if self.is_complete and self._event_queue.empty():
+                    break
+
+                try:
+                    item = await self._event_queue.get()
+                except asyncio.CancelledError:
+                    break
+
+                if isinstance(item, QueueCompleteSentinel):
+                    self._event_queue.task_done()
+                    # Check for errors, in case the queue was completed due to an exception
+                    self._check_errors()
+                    break
+
+                if included is None or event_matches(item, included):
+                    yield item
+                self._event_queue.task_done()
+            finished = True
+        finally:
+            if not finished:
+                # The consumer stopped reading before the run completed
+                self.cancel()
+            if self.is_cancelled:
+                self._release_current_trace()
+            else:
+                self._finish_trace(reset_current=reset_current_trace)
+            self._cleanup_tasks()
 
-            yield item
-            self._event_queue.task_done()
+        if self._stored_exception:
+            raise self._stored_exception
 
-        if self._trace:
-            self._trace.finish(reset_current=True)
+    def subscribe(
+        self, include: Iterable[str] | None = None, from_turn_start: bool = True
+    ) -> StreamSubscription:
+        """Subscribe to the events of the run. Unlike `stream_events()`, any number of subscribers
+        can read the same run, e.g. a UI, an audit log and a metrics tap. Each reads at its own
+        pace from a shared buffer of the most recent `RunConfig.stream_broadcast_buffer_size`
+        events, so a slow subscriber doesn't hold up the others. If it falls further behind than
+        that, it skips the events it missed; see `StreamSubscription.missed`.
 
-        self._cleanup_tasks()
+        The first call switches the run to broadcast mode. From then on, events are read from the
+        run as they arrive regardless of the subscribers, so `RunConfig.stream_buffer_policy` no
+        longer applies, and `stream_events()` returns a new subscription.
 
-        if self._stored_exception:
-            raise self._stored_exception
+        Args:
+            include: If provided, only these events are yielded. Accepts the same values as
+                `stream_events()`.
+            from_turn_start: Whether to replay the events of the current turn that were already
+                sent (if they're still buffered), starting with the agent update if the turn
+                started with a handoff. If False, the subscription starts at the next event.
+
+        Returns:
+            An async iterator of events, which raises the same exceptions as `stream_events()`
+            once the run ends.
+        """
+        if self._broadcast is None:
+            # The broadcast numbers events from the first one it takes from the queue, which is
+            # preceded by any that `stream_events()` already took
+            self._broadcast_queue_offset = self._event_queue.taken
+            self._broadcast = StreamBroadcast(self._broadcast_buffer_size)
+            self._broadcast_task = asyncio.create_task(self._run_broadcast(self._broadcast))
+            # The trace is finished by the broadcast task, which can't reset it as the current
+            # trace here, so do that now. The run itself keeps using it.
+            self._release_current_trace()
+
+        start = None
+        if from_turn_start:
+            # If the turn started before the broadcast did, replay from the broadcast's first event
+            start = max(0, self._event_queue.turn_start - self._broadcast_queue_offset)
+        return self._broadcast.subscribe(include, start=start)
+
+    async def _run_broadcast(self, broadcast: StreamBroadcast) -> None:
+        try:
+            async for event in self._read_event_queue(None, reset_current_trace=False):
+                broadcast.publish(event)
+        except Exception as e:
+            broadcast.close(e)
+        else:
+            broadcast.close()
+
+    def _release_current_trace(self) -> None:
+        """Stops the run's trace from being the current trace in this context, without finishing
+        it."""
+        if self._trace and get_current_trace() is self._trace:
+            Scope.set_current_trace(None)
+
+    def _finish_trace(self, reset_current: bool) -> None:
+        trace, self._trace = self._trace, None
+        if trace is None:
+            return
+        try:
+            trace.finish(reset_current=reset_current)
+        except ValueError:
+            # The trace can only be reset as the current trace in the context that started it,
+            # which isn't the case if e.g. the stream was closed by the garbage collector
+            logger.debug("Finished the trace outside of the context it was started in")
 
     def _check_errors(self):
         if self.current_turn > self.max_turns:
@@ -192,7 +359,11 @@ class RunResultStreaming(RunResultBase):
                 self._stored_exception = InputGuardrailTripwireTriggered(guardrail_result)
 
         # Check the tasks for any exceptions
-        if self._run_impl_task and self._run_impl_task.done():
+        if (
+            self._run_impl_task
+            and self._run_impl_task.done()
+            and not self._run_impl_task.cancelled()
+        ):
             exc = self._run_impl_task.exception()
             if exc and isinstance(exc, Exception):
                 self._stored_exception = exc
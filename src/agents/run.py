@@ -2,12 +2,15 @@ from __future__ import annotations
 
 import asyncio
 import copy
+import time
+from collections.abc import Iterable
 from dataclasses import dataclass, field
 from typing import Any, cast
 
 from openai.types.responses import ResponseCompletedEvent
 
 from . import Model, _utils
+from ._partial_output import PartialOutputTracker
 from ._run_impl import (
     NextStepFinalOutput,
     NextStepHandoff,
@@ -15,11 +18,17 @@ from ._run_impl import (
     QueueCompleteSentinel,
     RunImpl,
     SingleStepResult,
+    StreamingOutputGuardrails,
     TraceCtxManager,
     get_model_tracing_impl,
 )
 from .agent import Agent
 from .agent_output import AgentOutputSchema
+from .background_tools import (
+    await_tool,
+    cancel_background_tool_calls,
+    undelivered_background_tool_calls,
+)
 from .exceptions import (
     AgentsException,
     InputGuardrailTripwireTriggered,
@@ -28,16 +37,33 @@ from .exceptions import (
     OutputGuardrailTripwireTriggered,
 )
 from .guardrail import InputGuardrail, InputGuardrailResult, OutputGuardrail, OutputGuardrailResult
+from .handoff_router import route_handoffs
 from .handoffs import Handoff, HandoffInputFilter, handoff
 from .items import ItemHelpers, ModelResponse, RunItem, TResponseInputItem
 from .lifecycle import RunHooks
 from .logger import logger
+from .metrics import AgentMetrics
 from .model_settings import ModelSettings
-from .models.interface import ModelProvider
+from .models.interface import ModelProvider, _subscribed_stream_events, is_stream_event_wanted
 from .models.openai_provider import OpenAIProvider
 from .result import RunResult, RunResultStreaming
 from .run_context import RunContextWrapper, TContext
-from .stream_events import AgentUpdatedStreamEvent, RawResponsesStreamEvent
+from .schema_compaction import compact_handoff, compact_output_schema, compact_tool
+from .stream_buffer import (
+    StreamBufferPolicy,
+    StreamEventQueue,
+    TextDeltaCoalescer,
+    TextDeltaCoalescing,
+)
+from .stream_events import (
+    AgentUpdatedStreamEvent,
+    PartialOutputStreamEvent,
+    RawResponsesStreamEvent,
+    StreamEvent,
+)
+from .timing import RunTimings, measure
+from .tool import FunctionTool, Tool
+from .tool_output_store import ToolOutputPolicy
 from .tracing import Span, SpanError, agent_span, get_current_trace, trace
 from .tracing.span_data import AgentSpanData
 from .usage import Usage
@@ -74,6 +100,26 @@ class RunConfig:
     output_guardrails: list[OutputGuardrail[Any]] | None = None
     """A list of output guardrails to run on the final output of the run."""
 
+    hold_tools_for_input_guardrails: bool = False
+    """The input guardrails run at the same time as the first turn. If one trips, the turn is
+    cancelled straight away, but tools (and handoffs) that already started may have had side
+    effects. If True, the first turn still calls the model while the input guardrails run, but
+    waits for them to pass before running any tools.
+    """
+
+    compact_schemas: bool = False
+    """Whether to compact the JSON schemas of tools, handoffs and the output type before sending
+    them to the model, to save prompt tokens. Keys like `title` are removed, descriptions are
+    minified and redundant definitions are removed, without changing what the schemas accept. See
+    `compact_json_schema()`.
+    """
+
+    tool_output_policy: ToolOutputPolicy | None = None
+    """If set, function tool outputs longer than `tool_output_policy.max_chars` are stored outside
+    the conversation, and the model is sent a preview and a handle instead, along with a tool to
+    page through the full output. See `ToolOutputPolicy`.
+    """
+
     tracing_disabled: bool = False
     """Whether tracing is disabled for the agent run. If disabled, we will not trace the agent run.
     """
@@ -103,6 +149,56 @@ class RunConfig:
     An optional dictionary of additional metadata to include with the trace.
     """
 
+    stream_buffer_size: int | None = None
+    """For streamed runs, the maximum number of raw response events buffered while waiting for
+    `stream_events()` to consume them. If None, the buffer is unbounded, so a slow consumer makes
+    the run buffer every delta in memory. See `stream_buffer_policy` for what happens when the
+    buffer is full.
+    """
+
+    stream_buffer_policy: StreamBufferPolicy = "block"
+    """What to do with raw response events when the stream buffer is full: `block` the run until
+    the consumer catches up, `coalesce` deltas into the buffered ones, or `drop` deltas. Semantic
+    events (e.g. run items) are always delivered.
+    """
+
+    stream_broadcast_buffer_size: int = 1000
+    """How many of the most recent events are kept for subscribers once a streamed run is in
+    broadcast mode (see `RunResultStreaming.subscribe()`). Subscribers that fall further behind
+    skip the events they missed.
+    """
+
+    text_delta_coalescing: TextDeltaCoalescing | None = None
+    """For streamed runs, if set, consecutive text deltas for the same content are merged into a
+    single `RawResponsesStreamEvent`, flushed by count or interval and always at item boundaries.
+    """
+
+    partial_output_interval: float | None = None
+    """For streamed runs of agents with an `output_type`, if set, a `PartialOutputStreamEvent` with
+    the output parsed so far is sent while the model generates it, at most once per this many
+    seconds (and once more when the model's response completes). The output is parsed
+    incrementally as text deltas arrive. 0 sends an event for every text delta.
+    """
+
+    tool_progress_interval: float = 0.1
+    """For streamed runs, the minimum number of seconds between `ToolProgressStreamEvent`s for each
+    tool call. Progress reported in between replaces any progress waiting to be sent, so only the
+    latest is sent. 0 sends progress as often as the event loop allows.
+    """
+
+    collect_timings: bool = False
+    """Whether to collect a timing profile of the run, showing where the time went in each turn
+    (model, tools, guardrails, hooks and framework overhead). If enabled, it's available as
+    `timings` on the run result. Timings are collected even if tracing is disabled.
+    """
+
+    metrics: AgentMetrics | None = None
+    """If set, the run records latency, token, tool, guardrail and turn metrics into this object.
+    Share a single `AgentMetrics` across runs, and expose its registry (e.g. via
+    `metrics.registry.render_text()`) to scrape them. Metrics are recorded even if tracing is
+    disabled.
+    """
+
 
 class Runner:
     @classmethod
@@ -163,6 +259,7 @@ class Runner:
 
             context_wrapper: RunContextWrapper[TContext] = RunContextWrapper(
                 context=context,  # type: ignore
+                timings=RunTimings() if run_config.collect_timings else None,
             )
 
             input_guardrail_results: list[InputGuardrailResult] = []
@@ -200,21 +297,28 @@ class Runner:
                                 data={"max_turns": max_turns},
                             ),
                         )
+                        if run_config.metrics:
+                            run_config.metrics.record_max_turns_exceeded()
                         raise MaxTurnsExceeded(f"Max turns ({max_turns}) exceeded")
 
                     logger.debug(
                         f"Running agent {current_agent.name} (turn {current_turn})",
                     )
+                    if context_wrapper.timings:
+                        context_wrapper.timings.start_turn(current_turn, current_agent.name)
 
                     if current_turn == 1:
-                        input_guardrail_results, turn_result = await asyncio.gather(
+                        input_guardrails_task = asyncio.create_task(
                             cls._run_input_guardrails(
                                 starting_agent,
                                 starting_agent.input_guardrails
                                 + (run_config.input_guardrails or []),
                                 copy.deepcopy(input),
                                 context_wrapper,
-                            ),
+                                metrics=run_config.metrics,
+                            )
+                        )
+                        first_turn_task = asyncio.create_task(
                             cls._run_single_turn(
                                 agent=current_agent,
                                 original_input=original_input,
@@ -223,7 +327,15 @@ class Runner:
                                 context_wrapper=context_wrapper,
                                 run_config=run_config,
                                 should_run_agent_start_hooks=should_run_agent_start_hooks,
-                            ),
+                                tools_gate=(
+                                    input_guardrails_task
+                                    if run_config.hold_tools_for_input_guardrails
+                                    else None
+                                ),
+                            )
+                        )
+                        input_guardrail_results, turn_result = await cls._wait_for_first_turn(
+                            input_guardrails_task, first_turn_task
                         )
                     else:
                         turn_result = await cls._run_single_turn(
@@ -247,6 +359,7 @@ class Runner:
                             current_agent,
                             turn_result.next_step.output,
                             context_wrapper,
+                            metrics=run_config.metrics,
                         )
                         return RunResult(
                             input=original_input,
@@ -256,8 +369,13 @@ class Runner:
                             _last_agent=current_agent,
                             input_guardrail_results=input_guardrail_results,
                             output_guardrail_results=output_guardrail_results,
+                            timings=context_wrapper.timings,
                         )
                     elif isinstance(turn_result.next_step, NextStepHandoff):
+                        if run_config.metrics:
+                            run_config.metrics.record_handoff(
+                                current_agent.name, turn_result.next_step.new_agent.name
+                            )
                         current_agent = cast(Agent[TContext], turn_result.next_step.new_agent)
                         current_span.finish(reset_current=True)
                         current_span = None
@@ -269,6 +387,11 @@ class Runner:
                             f"Unknown next step type: {type(turn_result.next_step)}"
                         )
             finally:
+                cancel_background_tool_calls(context_wrapper)
+                if context_wrapper.timings:
+                    context_wrapper.timings.end_run()
+                if run_config.metrics:
+                    run_config.metrics.record_run(min(current_turn, max_turns))
                 if current_span:
                     current_span.finish(reset_current=True)
 
@@ -335,6 +458,7 @@ class Runner:
         max_turns: int = DEFAULT_MAX_TURNS,
         hooks: RunHooks[TContext] | None = None,
         run_config: RunConfig | None = None,
+        events: Iterable[str] | None = None,
     ) -> RunResultStreaming:
         """Run a workflow starting at the given agent in streaming mode. The returned result object
         contains a method you can use to stream semantic events as they are generated.
@@ -361,6 +485,11 @@ class Runner:
                 AI invocation (including any tool calls that might occur).
             hooks: An object that receives callbacks on various lifecycle events.
             run_config: Global settings for the entire agent run.
+            events: The events to stream. If provided, other events are never buffered, and the
+                model skips building raw events that weren't subscribed to. Can contain stream
+                event types (e.g. `"run_item_stream_event"`), raw response event types (e.g.
+                `"response.output_text.delta"`) and run item event names (e.g. `"tool_output"`).
+                If None, all events are streamed.
 
         Returns:
             A result object that contains data about the run, as well as a method to stream events.
@@ -391,7 +520,8 @@ class Runner:
 
         output_schema = cls._get_output_schema(starting_agent)
         context_wrapper: RunContextWrapper[TContext] = RunContextWrapper(
-            context=context  # type: ignore
+            context=context,  # type: ignore
+            timings=RunTimings() if run_config.collect_timings else None,
         )
 
         streamed_result = RunResultStreaming(
@@ -407,6 +537,14 @@ class Runner:
             output_guardrail_results=[],
             _current_agent_output_schema=output_schema,
             _trace=new_trace,
+            timings=context_wrapper.timings,
+            _event_queue=StreamEventQueue(
+                run_config.stream_buffer_size,
+                run_config.stream_buffer_policy,
+                include=frozenset(events) if events is not None else None,
+            ),
+            _broadcast_buffer_size=run_config.stream_broadcast_buffer_size,
+            usage=context_wrapper.usage,
         )
 
         # Kick off the actual agent loop in the background and return the streamed result object.
@@ -432,13 +570,15 @@ class Runner:
         context: RunContextWrapper[TContext],
         streamed_result: RunResultStreaming,
         parent_span: Span[Any],
+        metrics: AgentMetrics | None = None,
     ):
         queue = streamed_result._input_guardrail_queue
+        started_at = time.perf_counter()
 
         # We'll run the guardrails and push them onto the queue as they complete
         guardrail_tasks = [
             asyncio.create_task(
-                RunImpl.run_single_input_guardrail(agent, guardrail, input, context)
+                RunImpl.run_single_input_guardrail(agent, guardrail, input, context, metrics)
             )
             for guardrail in guardrails
         ]
@@ -446,6 +586,8 @@ class Runner:
         try:
             for done in asyncio.as_completed(guardrail_tasks):
                 result = await done
+                queue.put_nowait(result)
+                guardrail_results.append(result)
                 if result.output.tripwire_triggered:
                     _utils.attach_error_to_span(
                         parent_span,
@@ -457,14 +599,23 @@ class Runner:
                             },
                         ),
                     )
-                queue.put_nowait(result)
-                guardrail_results.append(result)
+                    for t in guardrail_tasks:
+                        t.cancel()
+                    # Stop the run straight away, instead of when the consumer sees the result
+                    run_task = streamed_result._run_impl_task
+                    if run_task and not run_task.done():
+                        run_task.cancel()
+                    streamed_result.is_complete = True
+                    streamed_result._event_queue.put_nowait(QueueCompleteSentinel())
+                    break
         except Exception:
             for t in guardrail_tasks:
                 t.cancel()
             raise
 
         streamed_result.input_guardrail_results = guardrail_results
+        if context.timings:
+            context.timings.input_guardrails += time.perf_counter() - started_at
 
     @classmethod
     async def _run_streamed_impl(
@@ -509,6 +660,7 @@ class Runner:
 
                 current_turn += 1
                 streamed_result.current_turn = current_turn
+                streamed_result._event_queue.mark_turn_start()
 
                 if current_turn > max_turns:
                     _utils.attach_error_to_span(
@@ -518,9 +670,14 @@ class Runner:
                             data={"max_turns": max_turns},
                         ),
                     )
+                    if run_config.metrics:
+                        run_config.metrics.record_max_turns_exceeded()
                     streamed_result._event_queue.put_nowait(QueueCompleteSentinel())
                     break
 
+                if context_wrapper.timings:
+                    context_wrapper.timings.start_turn(current_turn, current_agent.name)
+
                 if current_turn == 1:
                     # Run the input guardrails in the background and put the results on the queue
                     streamed_result._input_guardrails_task = asyncio.create_task(
@@ -531,6 +688,7 @@ class Runner:
                             context_wrapper,
                             streamed_result,
                             current_span,
+                            metrics=run_config.metrics,
                         )
                     )
                 try:
@@ -541,6 +699,11 @@ class Runner:
                         context_wrapper,
                         run_config,
                         should_run_agent_start_hooks,
+                        tools_gate=(
+                            streamed_result._input_guardrails_task
+                            if current_turn == 1 and run_config.hold_tools_for_input_guardrails
+                            else None
+                        ),
                     )
                     should_run_agent_start_hooks = False
 
@@ -551,6 +714,10 @@ class Runner:
                     streamed_result.new_items = turn_result.generated_items
 
                     if isinstance(turn_result.next_step, NextStepHandoff):
+                        if run_config.metrics:
+                            run_config.metrics.record_handoff(
+                                current_agent.name, turn_result.next_step.new_agent.name
+                            )
                         current_agent = turn_result.next_step.new_agent
                         current_span.finish(reset_current=True)
                         current_span = None
@@ -566,6 +733,7 @@ class Runner:
                                 current_agent,
                                 turn_result.next_step.output,
                                 context_wrapper,
+                                metrics=run_config.metrics,
                             )
                         )
 
@@ -595,7 +763,21 @@ class Runner:
                     raise
 
             streamed_result.is_complete = True
+        except asyncio.CancelledError:
+            if current_span:
+                _utils.attach_error_to_span(
+                    current_span,
+                    SpanError(message="Run cancelled", data={"turn": current_turn}),
+                )
+            streamed_result.is_complete = True
+            raise
         finally:
+            cancel_background_tool_calls(context_wrapper)
+            if context_wrapper.timings:
+                context_wrapper.timings.end_run()
+            if run_config.metrics:
+                run_config.metrics.record_run(min(current_turn, max_turns))
+                run_config.metrics.record_stream_buffer(streamed_result.buffer_stats)
             if current_span:
                 current_span.finish(reset_current=True)
 
@@ -608,16 +790,18 @@ class Runner:
         context_wrapper: RunContextWrapper[TContext],
         run_config: RunConfig,
         should_run_agent_start_hooks: bool,
+        tools_gate: asyncio.Future[Any] | None = None,
     ) -> SingleStepResult:
         if should_run_agent_start_hooks:
-            await asyncio.gather(
-                hooks.on_agent_start(context_wrapper, agent),
-                (
-                    agent.hooks.on_start(context_wrapper, agent)
-                    if agent.hooks
-                    else _utils.noop_coroutine()
-                ),
-            )
+            with measure(context_wrapper.timings, "hooks"):
+                await asyncio.gather(
+                    hooks.on_agent_start(context_wrapper, agent),
+                    (
+                        agent.hooks.on_start(context_wrapper, agent)
+                        if agent.hooks
+                        else _utils.noop_coroutine()
+                    ),
+                )
 
         output_schema = cls._get_output_schema(agent)
 
@@ -635,41 +819,145 @@ class Runner:
         input = ItemHelpers.input_to_new_input_list(streamed_result.input)
         input.extend([item.to_input_item() for item in streamed_result.new_items])
 
+        coalescer = (
+            TextDeltaCoalescer(run_config.text_delta_coalescing)
+            if run_config.text_delta_coalescing
+            else None
+        )
+        streaming_guardrails = StreamingOutputGuardrails(
+            agent.output_guardrails + (run_config.output_guardrails or []),
+            agent,
+            context_wrapper,
+            run_config.metrics,
+        )
+        send_partial_output = (
+            output_schema is not None
+            and not output_schema.is_plain_text()
+            and _wants_partial_output(run_config, streamed_result._event_queue.include)
+        )
+        partial_output = (
+            PartialOutputTracker(output_schema)
+            if send_partial_output or streaming_guardrails
+            else None
+        )
+        partial_output_sent_at = 0.0
+
+        # This runs in the run's own task, so the subscription only applies to this run's models
+        subscribed = streamed_result._event_queue.include
+        if subscribed is not None and partial_output:
+            # Partial outputs are parsed from the text deltas, so the model must still send them
+            subscribed = subscribed | {"response.output_text.delta"}
+        _subscribed_stream_events.set(subscribed)
+
+        metrics = run_config.metrics
+        turn_timing = context_wrapper.timings.current_turn if context_wrapper.timings else None
+        started_at = time.perf_counter()
+        first_token_at: float | None = None
+        if metrics:
+            model_name = _model_name(model)
+
         # 1. Stream the output events
-        async for event in model.stream_response(
+        stream = model.stream_response(
             system_prompt,
             input,
             model_settings,
-            agent.tools,
-            output_schema,
-            handoffs,
+            *_schemas_for_model(
+                agent, input, model_settings, output_schema, handoffs, context_wrapper, run_config
+            ),
             get_model_tracing_impl(
                 run_config.tracing_disabled, run_config.trace_include_sensitive_data
             ),
-        ):
-            if isinstance(event, ResponseCompletedEvent):
-                usage = (
-                    Usage(
-                        requests=1,
-                        input_tokens=event.response.usage.input_tokens,
-                        output_tokens=event.response.usage.output_tokens,
-                        total_tokens=event.response.usage.total_tokens,
+        )
+        try:
+            async for event in stream:
+                if isinstance(event, ResponseCompletedEvent):
+                    usage = (
+                        Usage(
+                            requests=1,
+                            input_tokens=event.response.usage.input_tokens,
+                            output_tokens=event.response.usage.output_tokens,
+                            total_tokens=event.response.usage.total_tokens,
+                        )
+                        if event.response.usage
+                        else Usage()
                     )
-                    if event.response.usage
-                    else Usage()
-                )
-                final_response = ModelResponse(
-                    output=event.response.output,
-                    usage=usage,
-                    referenceable_id=event.response.id,
-                )
+                    final_response = ModelResponse(
+                        output=event.response.output,
+                        usage=usage,
+                        referenceable_id=event.response.id,
+                    )
+                    context_wrapper.usage.add(usage)
+
+                if not is_stream_event_wanted(event.type):
+                    # The consumer didn't subscribe to this event
+                    pass
+                elif coalescer:
+                    for coalesced_event in coalescer.add(event):
+                        await streamed_result._event_queue.put_raw(
+                            RawResponsesStreamEvent(data=coalesced_event)
+                        )
+                else:
+                    await streamed_result._event_queue.put_raw(RawResponsesStreamEvent(data=event))
+
+                if partial_output:
+                    partial_output.add(event)
+                    if streaming_guardrails:
+                        streaming_guardrails.check(partial_output)
+                    if (
+                        send_partial_output
+                        and partial_output.changed
+                        and (
+                            isinstance(event, ResponseCompletedEvent)
+                            or time.monotonic() - partial_output_sent_at
+                            >= cast(float, run_config.partial_output_interval)
+                        )
+                    ):
+                        partial_output_sent_at = time.monotonic()
+                        cls._send_partial_output(streamed_result, agent, partial_output)
+
+                if first_token_at is None and event.type.endswith(".delta"):
+                    first_token_at = time.perf_counter()
+                    if turn_timing:
+                        turn_timing.time_to_first_token = first_token_at - started_at
+                    if metrics:
+                        metrics.record_time_to_first_token(model_name, first_token_at - started_at)
+                if metrics:
+                    metrics.record_event_queue_depth(streamed_result._event_queue.qsize())
+
+            if coalescer:
+                for coalesced_event in coalescer.flush():
+                    await streamed_result._event_queue.put_raw(
+                        RawResponsesStreamEvent(data=coalesced_event)
+                    )
+        except asyncio.CancelledError:
+            if final_response is None:
+                # The model's response was cut short, so its token usage isn't known
+                context_wrapper.usage.add(Usage(requests=1, cancelled_requests=1))
+            if not streaming_guardrails.cancel_requested:
+                raise
+            # A guardrail tripped, and cancelled the turn to stop the model stream
+            task = asyncio.current_task()
+            if task and hasattr(task, "uncancel"):
+                task.uncancel()
+        finally:
+            streaming_guardrails.stop()
+            # Close the model stream (and its connection) if it wasn't read to the end
+            await _utils.aclose(stream)
+
+        if turn_timing:
+            turn_timing.model += time.perf_counter() - started_at
 
-            streamed_result._event_queue.put_nowait(RawResponsesStreamEvent(data=event))
+        streaming_guardrails.raise_if_tripped()
 
         # 2. At this point, the streaming is complete for this turn of the agent loop.
         if not final_response:
             raise ModelBehaviorError("Model did not produce a final response!")
 
+        if metrics:
+            metrics.record_model_request(
+                model_name, time.perf_counter() - started_at, final_response.usage
+            )
+
         # 3. Now, we can process the turn as we do in the non-streaming case
         single_step_result = await cls._get_single_step_result_from_response(
             agent=agent,
@@ -681,11 +969,30 @@ class Runner:
             hooks=hooks,
             context_wrapper=context_wrapper,
             run_config=run_config,
+            tools_gate=tools_gate,
+            event_queue=streamed_result._event_queue,
         )
-
-        RunImpl.stream_step_result_to_queue(single_step_result, streamed_result._event_queue)
         return single_step_result
 
+    @classmethod
+    def _send_partial_output(
+        cls,
+        streamed_result: RunResultStreaming,
+        agent: Agent[Any],
+        partial_output: PartialOutputTracker,
+    ) -> None:
+        partial_output.mark_seen()
+        json_value = partial_output.partial_json()
+        if json_value is None:
+            return
+        streamed_result._event_queue.put_nowait(
+            PartialOutputStreamEvent(
+                output=partial_output.partial_output(json_value),
+                json_value=json_value,
+                agent=agent,
+            )
+        )
+
     @classmethod
     async def _run_single_turn(
         cls,
@@ -697,17 +1004,19 @@ class Runner:
         context_wrapper: RunContextWrapper[TContext],
         run_config: RunConfig,
         should_run_agent_start_hooks: bool,
+        tools_gate: asyncio.Future[Any] | None = None,
     ) -> SingleStepResult:
         # Ensure we run the hooks before anything else
         if should_run_agent_start_hooks:
-            await asyncio.gather(
-                hooks.on_agent_start(context_wrapper, agent),
-                (
-                    agent.hooks.on_start(context_wrapper, agent)
-                    if agent.hooks
-                    else _utils.noop_coroutine()
-                ),
-            )
+            with measure(context_wrapper.timings, "hooks"):
+                await asyncio.gather(
+                    hooks.on_agent_start(context_wrapper, agent),
+                    (
+                        agent.hooks.on_start(context_wrapper, agent)
+                        if agent.hooks
+                        else _utils.noop_coroutine()
+                    ),
+                )
 
         system_prompt = await agent.get_system_prompt(context_wrapper)
 
@@ -736,6 +1045,7 @@ class Runner:
             hooks=hooks,
             context_wrapper=context_wrapper,
             run_config=run_config,
+            tools_gate=tools_gate,
         )
 
     @classmethod
@@ -751,13 +1061,20 @@ class Runner:
         hooks: RunHooks[TContext],
         context_wrapper: RunContextWrapper[TContext],
         run_config: RunConfig,
+        tools_gate: asyncio.Future[Any] | None = None,
+        event_queue: asyncio.Queue[StreamEvent | QueueCompleteSentinel] | None = None,
     ) -> SingleStepResult:
         processed_response = RunImpl.process_model_response(
             agent=agent,
             response=new_response,
             output_schema=output_schema,
             handoffs=handoffs,
+            run_tools=_run_tools(run_config, agent, context_wrapper),
         )
+        if tools_gate is not None and processed_response.has_tools_to_run():
+            # Hold the tools' side effects until the input guardrails have passed. If one trips,
+            # this turn is cancelled (or the guardrail's exception is raised here).
+            await asyncio.shield(tools_gate)
         return await RunImpl.execute_tools_and_side_effects(
             agent=agent,
             original_input=original_input,
@@ -768,8 +1085,39 @@ class Runner:
             hooks=hooks,
             context_wrapper=context_wrapper,
             run_config=run_config,
+            event_queue=event_queue,
         )
 
+    @classmethod
+    async def _wait_for_first_turn(
+        cls,
+        input_guardrails_task: asyncio.Task[list[InputGuardrailResult]],
+        first_turn_task: asyncio.Task[SingleStepResult],
+    ) -> tuple[list[InputGuardrailResult], SingleStepResult]:
+        """Waits for the input guardrails and the first turn, which run at the same time. If either
+        fails, e.g. because a guardrail tripped, the other is cancelled right away, so a tripped
+        guardrail doesn't leave the model call and its tools running in the background.
+        """
+        tasks = [input_guardrails_task, first_turn_task]
+        try:
+            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        except asyncio.CancelledError:
+            for t in tasks:
+                t.cancel()
+            raise
+
+        # Every exception is retrieved, even those that aren't raised, so that asyncio doesn't log
+        # them as never retrieved
+        failed = [t for t in tasks if t in done and not t.cancelled() and t.exception() is not None]
+        if failed:
+            for t in pending:
+                t.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            # The guardrails go first, since the first turn may fail because of them
+            raise cast(BaseException, failed[0].exception())
+
+        return input_guardrails_task.result(), first_turn_task.result()
+
     @classmethod
     async def _run_input_guardrails(
         cls,
@@ -777,35 +1125,45 @@ class Runner:
         guardrails: list[InputGuardrail[TContext]],
         input: str | list[TResponseInputItem],
         context: RunContextWrapper[TContext],
+        metrics: AgentMetrics | None = None,
     ) -> list[InputGuardrailResult]:
         if not guardrails:
             return []
 
+        started_at = time.perf_counter()
         guardrail_tasks = [
             asyncio.create_task(
-                RunImpl.run_single_input_guardrail(agent, guardrail, input, context)
+                RunImpl.run_single_input_guardrail(agent, guardrail, input, context, metrics)
             )
             for guardrail in guardrails
         ]
 
         guardrail_results = []
 
-        for done in asyncio.as_completed(guardrail_tasks):
-            result = await done
-            if result.output.tripwire_triggered:
-                # Cancel all guardrail tasks if a tripwire is triggered.
-                for t in guardrail_tasks:
-                    t.cancel()
-                _utils.attach_error_to_current_span(
-                    SpanError(
-                        message="Guardrail tripwire triggered",
-                        data={"guardrail": result.guardrail.get_name()},
+        try:
+            for done in asyncio.as_completed(guardrail_tasks):
+                result = await done
+                if result.output.tripwire_triggered:
+                    # Cancel all guardrail tasks if a tripwire is triggered.
+                    for t in guardrail_tasks:
+                        t.cancel()
+                    _utils.attach_error_to_current_span(
+                        SpanError(
+                            message="Guardrail tripwire triggered",
+                            data={"guardrail": result.guardrail.get_name()},
+                        )
                     )
-                )
-                raise InputGuardrailTripwireTriggered(result)
-            else:
-                guardrail_results.append(result)
+                    raise InputGuardrailTripwireTriggered(result)
+                else:
+                    guardrail_results.append(result)
+        except asyncio.CancelledError:
+            # The first turn failed, so the guardrails are no longer needed
+            for t in guardrail_tasks:
+                t.cancel()
+            raise
 
+        if context.timings:
+            context.timings.input_guardrails += time.perf_counter() - started_at
         return guardrail_results
 
     @classmethod
@@ -815,34 +1173,38 @@ class Runner:
         agent: Agent[TContext],
         agent_output: Any,
         context: RunContextWrapper[TContext],
+        metrics: AgentMetrics | None = None,
     ) -> list[OutputGuardrailResult]:
         if not guardrails:
             return []
 
         guardrail_tasks = [
             asyncio.create_task(
-                RunImpl.run_single_output_guardrail(guardrail, agent, agent_output, context)
+                RunImpl.run_single_output_guardrail(
+                    guardrail, agent, agent_output, context, metrics
+                )
             )
             for guardrail in guardrails
         ]
 
         guardrail_results = []
 
-        for done in asyncio.as_completed(guardrail_tasks):
-            result = await done
-            if result.output.tripwire_triggered:
-                # Cancel all guardrail tasks if a tripwire is triggered.
-                for t in guardrail_tasks:
-                    t.cancel()
-                _utils.attach_error_to_current_span(
-                    SpanError(
-                        message="Guardrail tripwire triggered",
-                        data={"guardrail": result.guardrail.get_name()},
+        with measure(context.timings, "guardrails"):
+            for done in asyncio.as_completed(guardrail_tasks):
+                result = await done
+                if result.output.tripwire_triggered:
+                    # Cancel all guardrail tasks if a tripwire is triggered.
+                    for t in guardrail_tasks:
+                        t.cancel()
+                    _utils.attach_error_to_current_span(
+                        SpanError(
+                            message="Guardrail tripwire triggered",
+                            data={"guardrail": result.guardrail.get_name()},
+                        )
                     )
-                )
-                raise OutputGuardrailTripwireTriggered(result)
-            else:
-                guardrail_results.append(result)
+                    raise OutputGuardrailTripwireTriggered(result)
+                else:
+                    guardrail_results.append(result)
 
         return guardrail_results
 
@@ -859,20 +1221,30 @@ class Runner:
     ) -> ModelResponse:
         model = cls._get_model(agent, run_config)
         model_settings = agent.model_settings.resolve(run_config.model_settings)
-        new_response = await model.get_response(
-            system_instructions=system_prompt,
-            input=input,
-            model_settings=model_settings,
-            tools=agent.tools,
-            output_schema=output_schema,
-            handoffs=handoffs,
-            tracing=get_model_tracing_impl(
-                run_config.tracing_disabled, run_config.trace_include_sensitive_data
-            ),
+        tools, output_schema, handoffs = _schemas_for_model(
+            agent, input, model_settings, output_schema, handoffs, context_wrapper, run_config
         )
+        started_at = time.perf_counter()
+        with measure(context_wrapper.timings, "model"):
+            new_response = await model.get_response(
+                system_instructions=system_prompt,
+                input=input,
+                model_settings=model_settings,
+                tools=tools,
+                output_schema=output_schema,
+                handoffs=handoffs,
+                tracing=get_model_tracing_impl(
+                    run_config.tracing_disabled, run_config.trace_include_sensitive_data
+                ),
+            )
 
         context_wrapper.usage.add(new_response.usage)
 
+        if run_config.metrics:
+            run_config.metrics.record_model_request(
+                _model_name(model), time.perf_counter() - started_at, new_response.usage
+            )
+
         return new_response
 
     @classmethod
@@ -902,3 +1274,71 @@ class Runner:
             return agent.model
 
         return run_config.model_provider.get_model(agent.model)
+
+
+def _schemas_for_model(
+    agent: Agent[Any],
+    input: list[TResponseInputItem],
+    model_settings: ModelSettings,
+    output_schema: AgentOutputSchema | None,
+    handoffs: list[Handoff],
+    context_wrapper: RunContextWrapper[Any],
+    run_config: RunConfig,
+) -> tuple[list[Tool], AgentOutputSchema | None, list[Handoff]]:
+    """The tools, output schema and handoffs to send to the model. Only the relevant tools are sent
+    if the agent has a `tool_selection`, tools added by the run are included, the handoffs are
+    collapsed into a routing tool if the agent has `collapse_handoffs` set, and the schemas are
+    compacted if `run_config.compact_schemas` is set."""
+    tools = agent.tools
+    if agent.tool_selection:
+        tools = agent.tool_selection.select(
+            tools,
+            input,
+            model_settings,
+            expanded=agent.name in context_wrapper._expanded_tool_selections,
+        )
+        if len(tools) < len(agent.tools):
+            logger.debug(f"Sending {len(tools)} of {len(agent.tools)} tools for {agent.name}")
+
+    run_tools = _run_tools(run_config, agent, context_wrapper)
+    if run_tools:
+        # The agent's own tools take precedence over tools with the same name added by the run
+        agent_tool_names = {tool.name for tool in agent.tools}
+        tools = [*tools, *(tool for tool in run_tools if tool.name not in agent_tool_names)]
+
+    if agent.collapse_handoffs and handoffs:
+        handoffs = [route_handoffs(agent, handoffs).handoff]
+
+    if not run_config.compact_schemas:
+        return tools, output_schema, handoffs
+    return (
+        [compact_tool(tool) for tool in tools],
+        compact_output_schema(output_schema) if output_schema else None,
+        [compact_handoff(handoff) for handoff in handoffs],
+    )
+
+
+def _run_tools(
+    run_config: RunConfig, agent: Agent[Any], context_wrapper: RunContextWrapper[Any]
+) -> list[Tool]:
+    """Tools that the run adds to the agent."""
+    tools: list[Tool] = []
+    if run_config.tool_output_policy:
+        tools.append(run_config.tool_output_policy.retrieval_tool)
+    if undelivered_background_tool_calls(context_wrapper) or any(
+        isinstance(tool, FunctionTool) and tool.background for tool in agent.tools
+    ):
+        tools.append(await_tool())
+    return tools
+
+
+def _wants_partial_output(run_config: RunConfig, subscribed: frozenset[str] | None) -> bool:
+    return run_config.partial_output_interval is not None and (
+        subscribed is None or "partial_output_stream_event" in subscribed
+    )
+
+
+def _model_name(model: Model) -> str:
+    """The label to record model metrics under, e.g. the model name for OpenAI models."""
+    name = getattr(model, "model", None)
+    return name if isinstance(name, str) else type(model).__name__
@@ -1,10 +1,14 @@
 from dataclasses import dataclass, field
-from typing import Any, Generic
+from typing import TYPE_CHECKING, Any, Generic, Optional
 
 from typing_extensions import TypeVar
 
+from .timing import RunTimings
 from .usage import Usage
 
+if TYPE_CHECKING:
+    from .background_tools import BackgroundToolCall
+
 TContext = TypeVar("TContext", default=Any)
 
 
@@ -24,3 +28,17 @@ class RunContextWrapper(Generic[TContext]):
     """The usage of the agent run so far. For streamed responses, the usage will be stale until the
     last chunk of the stream is processed.
     """
+
+    timings: Optional[RunTimings] = None
+    """The timing profile of the agent run so far. Only collected if `RunConfig.collect_timings` is
+    set.
+    """
+
+    _expanded_tool_selections: set[str] = field(default_factory=set, init=False, repr=False)
+    """The names of agents that called a tool they don't have, so `ToolSelection` sends them every
+    tool for the rest of the run."""
+
+    _background_tool_calls: "dict[str, BackgroundToolCall]" = field(
+        default_factory=dict, init=False, repr=False
+    )
+    """The calls to background tools made during the run, by handle."""
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import copy
+import dataclasses
+import json
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from .agent_output import AgentOutputSchema
+from .handoffs import Handoff
+from .logger import logger
+from .strict_schema import rename_refs
+from .tool import FunctionTool, Tool
+
+_MEMO_SIZE = 1024
+
+# Keywords whose value is a schema
+_SCHEMA_KEYWORDS = frozenset({"items", "additionalProperties", "not", "contains", "if", "then"})
+# Keywords whose value is a list of schemas
+_SCHEMA_LIST_KEYWORDS = frozenset({"anyOf", "allOf", "oneOf", "prefixItems"})
+# Keywords whose value maps names to schemas
+_SCHEMA_MAP_KEYWORDS = frozenset({"properties", "patternProperties", "$defs", "definitions"})
+# Keywords that don't affect what's valid, and aren't useful to the model
+_NON_SEMANTIC_KEYWORDS = frozenset({"title", "$comment"})
+
+
+@dataclass(frozen=True)
+class CompactedSchema:
+    """A JSON schema after compaction, along with its size before and after."""
+
+    schema: dict[str, Any]
+    """The compacted schema."""
+
+    original_size: int
+    """The size of the original schema, in characters of minified JSON."""
+
+    compacted_size: int
+    """The size of the compacted schema, in characters of minified JSON."""
+
+    @property
+    def saved(self) -> int:
+        """How many characters compaction saved."""
+        return self.original_size - self.compacted_size
+
+
+_compacted: OrderedDict[int, tuple[dict[str, Any], CompactedSchema]] = OrderedDict()
+_output_schemas: OrderedDict[Any, AgentOutputSchema] = OrderedDict()
+
+
+def compact_json_schema(schema: dict[str, Any]) -> CompactedSchema:
+    """Shrinks a JSON schema without changing what it accepts, so that it takes fewer prompt
+    tokens. `title` and `$comment` keys are removed, whitespace in descriptions is collapsed,
+    definitions that are no longer referenced (e.g. because they were inlined by
+    `ensure_strict_json_schema`) are removed, and identical definitions are merged. A strict schema
+    stays strict.
+
+    The schema isn't modified. Results are memoized by the identity of the schema, so the schema
+    shouldn't be mutated after it has been compacted.
+    """
+    memoized = _compacted.get(id(schema))
+    if memoized is not None and memoized[0] is schema:
+        _compacted.move_to_end(id(schema))
+        return memoized[1]
+
+    compacted = _compact(schema)
+    _remove_redundant_defs(compacted)
+    result = CompactedSchema(
+        schema=compacted,
+        original_size=_size(schema),
+        compacted_size=_size(compacted),
+    )
+    logger.debug(
+        f"Compacted JSON schema from {result.original_size} to {result.compacted_size} characters"
+    )
+
+    # The schema is kept alive while it's memoized, so its id can't be reused by another object
+    _compacted[id(schema)] = (schema, result)
+    if len(_compacted) > _MEMO_SIZE:
+        _compacted.popitem(last=False)
+    return result
+
+
+def compact_tool(tool: Tool) -> Tool:
+    """Returns a copy of a function tool with a compacted parameters schema. Other tools are
+    returned as-is.
+    """
+    if not isinstance(tool, FunctionTool):
+        return tool
+    return dataclasses.replace(
+        tool, params_json_schema=compact_json_schema(tool.params_json_schema).schema
+    )
+
+
+def compact_handoff(handoff: Handoff[Any]) -> Handoff[Any]:
+    """Returns a copy of a handoff with a compacted input schema."""
+    return dataclasses.replace(
+        handoff, input_json_schema=compact_json_schema(handoff.input_json_schema).schema
+    )
+
+
+def compact_output_schema(output_schema: AgentOutputSchema) -> AgentOutputSchema:
+    """Returns a copy of an output schema whose JSON schema is compacted. Validation is
+    unchanged. Since the runner creates a new output schema each turn, copies are also memoized by
+    output type.
+    """
+    if output_schema.is_plain_text():
+        return output_schema
+
+    key: tuple[Any, bool] | None = (output_schema.output_type, output_schema.strict_json_schema)
+    try:
+        memoized = _output_schemas.get(key)
+    except TypeError:
+        # An unhashable output type
+        key, memoized = None, None
+    if memoized is not None:
+        return memoized
+
+    compacted = copy.copy(output_schema)
+    compacted._output_schema = compact_json_schema(output_schema.json_schema()).schema
+    if key is not None:
+        _output_schemas[key] = compacted
+        if len(_output_schemas) > _MEMO_SIZE:
+            _output_schemas.popitem(last=False)
+    return compacted
+
+
+def _compact(schema: Any) -> Any:
+    if not isinstance(schema, dict):
+        return schema
+
+    compacted: dict[str, Any] = {}
+    for key, value in schema.items():
+        if key in _NON_SEMANTIC_KEYWORDS:
+            continue
+        if key == "description" and isinstance(value, str):
+            compacted[key] = " ".join(value.split())
+        elif key in _SCHEMA_KEYWORDS and isinstance(value, dict):
+            compacted[key] = _compact(value)
+        elif key in _SCHEMA_LIST_KEYWORDS and isinstance(value, list):
+            compacted[key] = [_compact(item) for item in value]
+        elif key in _SCHEMA_MAP_KEYWORDS and isinstance(value, dict):
+            compacted[key] = {name: _compact(item) for name, item in value.items()}
+        else:
+            compacted[key] = value
+    return compacted
+
+
+def _remove_redundant_defs(schema: dict[str, Any]) -> None:
+    """Merges identical definitions at the root of the schema, and removes unreferenced ones."""
+    for defs_key in ("$defs", "definitions"):
+        defs = schema.get(defs_key)
+        if not isinstance(defs, dict):
+            continue
+
+        prefix = f"#/{defs_key}/"
+        # Merging two definitions can make the ones that reference them identical too
+        while True:
+            canonical: dict[str, str] = {}
+            renames: dict[str, str] = {}
+            for name, definition in defs.items():
+                text = json.dumps(definition, sort_keys=True)
+                if text in canonical:
+                    renames[prefix + name] = prefix + canonical[text]
+                else:
+                    canonical[text] = name
+            if not renames:
+                break
+            for ref in renames:
+                defs.pop(ref[len(prefix) :])
+            rename_refs(schema, renames)
+
+        # Only keep the definitions that are reachable from outside the definitions
+        used: set[str] = set()
+        pending = _refs({key: value for key, value in schema.items() if key != defs_key})
+        while pending:
+            ref = pending.pop()
+            if not ref.startswith(prefix) or ref in used:
+                continue
+            used.add(ref)
+            pending.extend(_refs(defs.get(ref[len(prefix) :])))
+
+        for name in list(defs):
+            if prefix + name not in used:
+                del defs[name]
+        if not defs:
+            del schema[defs_key]
+
+
+def _refs(value: Any) -> list[str]:
+    if isinstance(value, dict):
+        refs = [value["$ref"]] if isinstance(value.get("$ref"), str) else []
+        for item in value.values():
+            refs.extend(_refs(item))
+        return refs
+    if isinstance(value, list):
+        return [ref for item in value for ref in _refs(item)]
+    return []
+
+
+def _size(schema: dict[str, Any]) -> int:
+    return len(json.dumps(schema, separators=(",", ":")))
@@ -0,0 +1,370 @@
+from __future__ import annotations
+
+import asyncio
+import collections
+import time
+from collections.abc import AsyncIterator, Iterable
+from dataclasses import dataclass
+from typing import Literal, Union
+
+from openai.types.responses import (
+    ResponseFunctionCallArgumentsDeltaEvent,
+    ResponseRefusalDeltaEvent,
+    ResponseTextDeltaEvent,
+)
+
+from ._run_impl import QueueCompleteSentinel
+from .items import TResponseStreamEvent
+from .stream_events import (
+    AgentUpdatedStreamEvent,
+    RawResponsesStreamEvent,
+    RunItemStreamEvent,
+    StreamEvent,
+)
+
+StreamBufferPolicy = Literal["block", "coalesce", "drop"]
+"""What to do with raw response events when a streamed run's event buffer is full:
+- `block`: wait for the consumer to make room. This pauses the run (and reading from the model's
+  HTTP stream) until `stream_events()` catches up.
+- `coalesce`: merge the incoming text, refusal or function call argument delta into the last
+  buffered delta for the same content, so the consumer receives fewer, larger deltas.
+- `drop`: discard the incoming delta.
+
+Semantic events (run items, agent updates) are never blocked, coalesced or dropped. With `coalesce`
+and `drop`, the buffer size is a soft limit: raw events that aren't deltas (e.g.
+`response.output_item.added`) are buffered even if the buffer is full, and so is a delta that
+can't be coalesced because no delta for the same content is buffered (e.g. the first delta of a
+new content part). Every other delta is coalesced or dropped, so the buffer only grows past its
+size by one event per output item or content part.
+"""
+
+# Delta events whose `delta` is a string that can be concatenated
+_CoalescableDelta = Union[
+    ResponseTextDeltaEvent, ResponseRefusalDeltaEvent, ResponseFunctionCallArgumentsDeltaEvent
+]
+_COALESCABLE_DELTA_TYPES = (
+    ResponseTextDeltaEvent,
+    ResponseRefusalDeltaEvent,
+    ResponseFunctionCallArgumentsDeltaEvent,
+)
+
+
+@dataclass
+class StreamBufferStats:
+    """Metrics for the event buffer of a streamed run."""
+
+    max_size: int | None
+    """The maximum number of raw response events buffered at once, or None for no limit."""
+
+    policy: StreamBufferPolicy
+    """What happens to raw response events when the buffer is full."""
+
+    high_water_mark: int = 0
+    """The largest number of events (of any kind) that have been buffered at once."""
+
+    raw_high_water_mark: int = 0
+    """The largest number of raw response events that have been buffered at once."""
+
+    dropped: int = 0
+    """Raw response deltas dropped because the buffer was full."""
+
+    coalesced: int = 0
+    """Raw response deltas merged into an already buffered delta because the buffer was full."""
+
+    blocked_time: float = 0.0
+    """Seconds the run spent waiting for the consumer to make room in the buffer."""
+
+
+class StreamEventQueue(asyncio.Queue[Union[StreamEvent, QueueCompleteSentinel]]):
+    """The event buffer between a streamed run and `RunResultStreaming.stream_events()`. Only raw
+    response events count towards `max_size`, and only they are subject to the `policy`.
+    """
+
+    def __init__(
+        self,
+        max_size: int | None = None,
+        policy: StreamBufferPolicy = "block",
+        include: frozenset[str] | None = None,
+    ):
+        super().__init__()
+        self.max_size = max_size
+        self.policy = policy
+        self.include = include
+        self.stats = StreamBufferStats(max_size=max_size, policy=policy)
+        self.turn_start = 0
+        """The number of events buffered before the current turn started."""
+        self.taken = 0
+        """The number of events taken from the buffer. Events are taken in the order they were
+        buffered, so event `n` (counting from 0) is the one that `turn_start` refers to when
+        `turn_start == n`."""
+        self._buffered = 0
+        self._last_buffered: StreamEvent | QueueCompleteSentinel | None = None
+        self._raw_events = 0
+        self._has_room: asyncio.Event | None = None
+        # Deltas merged into a buffered event, keyed by the id of that event. They are joined once,
+        # when the event is taken from the buffer.
+        self._coalesced_deltas: dict[int, list[str]] = {}
+        # The most recently buffered delta for each content, which incoming deltas for the same
+        # content are merged into
+        self._last_deltas: dict[tuple[object, ...], RawResponsesStreamEvent] = {}
+
+    def _init(self, maxsize: int) -> None:
+        self._queue: collections.deque[StreamEvent | QueueCompleteSentinel] = collections.deque()
+
+    def put_nowait(self, item: StreamEvent | QueueCompleteSentinel) -> None:
+        """Buffers an event, unless the consumer didn't subscribe to it."""
+        if self.include is None or event_matches(item, self.include):
+            super().put_nowait(item)
+
+    def mark_turn_start(self) -> None:
+        """Records that a new turn is starting. If the last event was an agent update (e.g. after a
+        handoff), it counts as part of the new turn, so replaying the turn starts with it.
+        """
+        self.turn_start = self._buffered
+        if isinstance(self._last_buffered, AgentUpdatedStreamEvent):
+            self.turn_start -= 1
+
+    async def put_raw(self, event: RawResponsesStreamEvent) -> None:
+        """Buffers a raw response event, applying the policy if the buffer is full."""
+        if self.max_size is None or self._raw_events < self.max_size:
+            self.put_nowait(event)
+            return
+
+        if self.policy == "block":
+            started_at = time.monotonic()
+            if self._has_room is None:
+                self._has_room = asyncio.Event()
+            while self._raw_events >= self.max_size:
+                self._has_room.clear()
+                await self._has_room.wait()
+            self.stats.blocked_time += time.monotonic() - started_at
+            self.put_nowait(event)
+        elif not event.data.type.endswith(".delta"):
+            self.put_nowait(event)
+        elif self.policy == "coalesce" and self._coalesce(event):
+            self.stats.coalesced += 1
+        elif self.policy == "drop":
+            self.stats.dropped += 1
+        else:
+            # Nothing to coalesce with, e.g. the first delta of a new content part
+            self.put_nowait(event)
+
+    def _coalesce(self, event: RawResponsesStreamEvent) -> bool:
+        if not isinstance(event.data, _COALESCABLE_DELTA_TYPES):
+            return False
+
+        last = self._last_deltas.get(_content_key(event.data))
+        if last is None or not isinstance(last.data, _COALESCABLE_DELTA_TYPES):
+            return False
+
+        deltas = self._coalesced_deltas.setdefault(id(last), [last.data.delta])
+        deltas.append(event.data.delta)
+        return True
+
+    def _put(self, item: StreamEvent | QueueCompleteSentinel) -> None:
+        super()._put(item)
+        self._buffered += 1
+        self._last_buffered = item
+        if isinstance(item, RawResponsesStreamEvent):
+            self._raw_events += 1
+            self.stats.raw_high_water_mark = max(self.stats.raw_high_water_mark, self._raw_events)
+            if isinstance(item.data, _COALESCABLE_DELTA_TYPES):
+                self._last_deltas[_content_key(item.data)] = item
+        self.stats.high_water_mark = max(self.stats.high_water_mark, len(self._queue))
+
+    def _get(self) -> StreamEvent | QueueCompleteSentinel:
+        item = super()._get()
+        self.taken += 1
+        if isinstance(item, RawResponsesStreamEvent):
+            self._raw_events -= 1
+            if self._has_room is not None:
+                self._has_room.set()
+            if isinstance(item.data, _COALESCABLE_DELTA_TYPES):
+                key = _content_key(item.data)
+                if self._last_deltas.get(key) is item:
+                    del self._last_deltas[key]
+            deltas = self._coalesced_deltas.pop(id(item), None)
+            if deltas is not None:
+                item = RawResponsesStreamEvent(
+                    data=item.data.model_copy(update={"delta": "".join(deltas)})
+                )
+        return item
+
+
+class StreamBroadcast:
+    """Fans the events of a streamed run out to any number of subscribers. Events are kept in a
+    shared ring buffer, and each subscriber reads it at its own pace, so a slow subscriber never
+    holds up the others or the run. A subscriber that falls more than `max_size` events behind
+    skips the events that were overwritten, and they are counted in `StreamSubscription.missed`.
+    """
+
+    def __init__(self, max_size: int):
+        if max_size < 1:
+            raise ValueError("The broadcast buffer must hold at least one event")
+        self.max_size = max_size
+        self._buffer: list[StreamEvent | None] = [None] * max_size
+        # The sequence number of the next event. Event `seq` is stored at `seq % max_size`.
+        self._next_seq = 0
+        self._closed = False
+        self._exception: BaseException | None = None
+        self._new_events = asyncio.Event()
+
+    @property
+    def first_seq(self) -> int:
+        """The sequence number of the oldest event still in the buffer."""
+        return max(0, self._next_seq - self.max_size)
+
+    def publish(self, event: StreamEvent) -> None:
+        """Adds an event to the buffer, overwriting the oldest one if it's full."""
+        self._buffer[self._next_seq % self.max_size] = event
+        self._next_seq += 1
+        self._wake_subscribers()
+
+    def close(self, exception: BaseException | None = None) -> None:
+        """Ends the stream. Subscribers raise `exception` (if provided) once they've read the
+        buffered events.
+        """
+        self._closed = True
+        self._exception = exception
+        self._wake_subscribers()
+
+    def subscribe(
+        self, include: Iterable[str] | None = None, start: int | None = None
+    ) -> StreamSubscription:
+        """Returns a new subscriber, starting at sequence number `start`, or at the next event if
+        None.
+        """
+        return StreamSubscription(
+            self,
+            frozenset(include) if include is not None else None,
+            self._next_seq if start is None else start,
+        )
+
+    def _wake_subscribers(self) -> None:
+        self._new_events.set()
+        self._new_events = asyncio.Event()
+
+
+class StreamSubscription(AsyncIterator[StreamEvent]):
+    """One subscriber's cursor over a `StreamBroadcast`."""
+
+    def __init__(self, broadcast: StreamBroadcast, include: frozenset[str] | None, start: int):
+        self._broadcast = broadcast
+        self._include = include
+        self._cursor = start
+        self.missed = 0
+        """Events this subscriber skipped because it fell behind and they were overwritten."""
+
+    def __aiter__(self) -> StreamSubscription:
+        return self
+
+    async def __anext__(self) -> StreamEvent:
+        broadcast = self._broadcast
+        while True:
+            if self._cursor < broadcast.first_seq:
+                self.missed += broadcast.first_seq - self._cursor
+                self._cursor = broadcast.first_seq
+
+            if self._cursor < broadcast._next_seq:
+                event = broadcast._buffer[self._cursor % broadcast.max_size]
+                self._cursor += 1
+                assert event is not None
+                if self._include is None or event_matches(event, self._include):
+                    return event
+                continue
+
+            if broadcast._closed:
+                if broadcast._exception is not None:
+                    raise broadcast._exception
+                raise StopAsyncIteration
+
+            await broadcast._new_events.wait()
+
+
+def event_matches(event: StreamEvent | QueueCompleteSentinel, include: frozenset[str]) -> bool:
+    """Whether the event is one of the subscribed types. `include` can contain stream event types
+    (e.g. `run_item_stream_event`), raw response event types (e.g. `response.output_text.delta`) and
+    run item event names (e.g. `tool_output`).
+    """
+    if isinstance(event, QueueCompleteSentinel) or event.type in include:
+        return True
+    if isinstance(event, RawResponsesStreamEvent):
+        return event.data.type in include
+    if isinstance(event, RunItemStreamEvent):
+        return event.name in include
+    return False
+
+
+def _content_key(delta: _CoalescableDelta) -> tuple[object, ...]:
+    """Identifies the content a delta belongs to. Only deltas with the same key are merged."""
+    return (
+        delta.type,
+        delta.item_id,
+        delta.output_index,
+        getattr(delta, "content_index", None),
+    )
+
+
+@dataclass
+class TextDeltaCoalescing:
+    """Settings for merging consecutive text deltas in streamed runs. Each model token is
+    otherwise a separate `ResponseTextDeltaEvent`; merging them means fewer events to queue, yield
+    and forward downstream.
+
+    Pending deltas are always flushed before any other event, so a merged delta never spans an
+    item or content part boundary, and the final `ResponseCompletedEvent` is unchanged. The interval
+    is checked as deltas arrive.
+    """
+
+    max_deltas: int = 16
+    """Flush once this many deltas have been merged."""
+
+    max_interval: float = 0.03
+    """Flush once the oldest pending delta has waited this long, in seconds."""
+
+
+class TextDeltaCoalescer:
+    """Merges consecutive `response.output_text.delta` events for the same content part."""
+
+    def __init__(self, settings: TextDeltaCoalescing):
+        self.settings = settings
+        self._pending: list[ResponseTextDeltaEvent] = []
+        self._pending_since = 0.0
+
+    def add(self, event: TResponseStreamEvent) -> list[TResponseStreamEvent]:
+        """Adds an event from the model. Returns the events that should be emitted now."""
+        if not isinstance(event, ResponseTextDeltaEvent):
+            return [*self.flush(), event]
+
+        emitted: list[TResponseStreamEvent] = []
+        if self._pending and not _same_text_content(self._pending[0], event):
+            emitted.extend(self.flush())
+
+        if not self._pending:
+            self._pending_since = time.monotonic()
+        self._pending.append(event)
+
+        if (
+            len(self._pending) >= self.settings.max_deltas
+            or time.monotonic() - self._pending_since >= self.settings.max_interval
+        ):
+            emitted.extend(self.flush())
+        return emitted
+
+    def flush(self) -> list[TResponseStreamEvent]:
+        """Returns the pending deltas merged into a single event, if there are any."""
+        if not self._pending:
+            return []
+
+        pending, self._pending = self._pending, []
+        if len(pending) == 1:
+            return [pending[0]]
+        return [pending[0].model_copy(update={"delta": "".join(e.delta for e in pending)})]
+
+
+def _same_text_content(a: ResponseTextDeltaEvent, b: ResponseTextDeltaEvent) -> bool:
+    return (
+        a.item_id == b.item_id
+        and a.output_index == b.output_index
+        and a.content_index == b.content_index
+    )
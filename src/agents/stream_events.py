@@ -43,6 +43,17 @@ class RunItemStreamEvent:
 
     type: Literal["run_item_stream_event"] = "run_item_stream_event"
 
+    @property
+    def call_id(self) -> str | None:
+        """The id of the tool call that the item is for, on tool call, tool output and handoff
+        events. Tool outputs are streamed in the order the tools complete, so use this to match
+        each output to its call.
+        """
+        raw_item: Any = self.item.raw_item
+        if isinstance(raw_item, dict):
+            return raw_item.get("call_id")
+        return getattr(raw_item, "call_id", None)
+
 
 @dataclass
 class AgentUpdatedStreamEvent:
@@ -54,5 +65,55 @@ class AgentUpdatedStreamEvent:
     type: Literal["agent_updated_stream_event"] = "agent_updated_stream_event"
 
 
-StreamEvent: TypeAlias = Union[RawResponsesStreamEvent, RunItemStreamEvent, AgentUpdatedStreamEvent]
+@dataclass
+class PartialOutputStreamEvent:
+    """Event with the final output generated so far, for agents with an `output_type`. Sent while
+    the model streams its output if `RunConfig.partial_output_interval` is set.
+    """
+
+    output: Any
+    """The output so far, validated against the agent's output type. The last item of each list
+    or dict may be incomplete, and strings may be cut off. None if it isn't valid yet, e.g. because
+    a required field hasn't been generated.
+    """
+
+    json_value: Any
+    """The JSON parsed from the output so far, before validation."""
+
+    agent: Agent[Any]
+    """The agent generating the output."""
+
+    type: Literal["partial_output_stream_event"] = "partial_output_stream_event"
+
+
+@dataclass
+class ToolProgressStreamEvent:
+    """Event with the progress of a function tool that's still running: a value yielded by an
+    async generator tool (other than the last, which is the tool's output), or passed to
+    `report_tool_progress()`. Sent at most once per `RunConfig.tool_progress_interval` for each
+    tool call.
+    """
+
+    progress: Any
+    """The progress reported by the tool."""
+
+    tool_name: str
+    """The name of the tool."""
+
+    call_id: str
+    """The id of the tool call, which the tool's output will also have."""
+
+    agent: Agent[Any]
+    """The agent running the tool."""
+
+    type: Literal["tool_progress_stream_event"] = "tool_progress_stream_event"
+
+
+StreamEvent: TypeAlias = Union[
+    RawResponsesStreamEvent,
+    RunItemStreamEvent,
+    AgentUpdatedStreamEvent,
+    PartialOutputStreamEvent,
+    ToolProgressStreamEvent,
+]
 """A streaming event from an agent."""
@@ -148,6 +148,19 @@ def resolve_ref(*, root: dict[str, object], ref: str) -> object:
     return resolved
 
 
+def rename_refs(value: Any, renames: dict[str, str]) -> None:
+    """Replaces the `$ref`s in a schema that are keys of `renames` with their values, in place."""
+    if isinstance(value, dict):
+        ref = value.get("$ref")
+        if isinstance(ref, str) and ref in renames:
+            value["$ref"] = renames[ref]
+        for item in value.values():
+            rename_refs(item, renames)
+    elif isinstance(value, list):
+        for item in value:
+            rename_refs(item, renames)
+
+
 def is_dict(obj: object) -> TypeGuard[dict[str, object]]:
     # just pretend that we know there are only `str` keys
     # as that check is not worth the performance cost
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import contextlib
+import time
+from collections.abc import Iterator
+from dataclasses import asdict, dataclass, field
+from typing import Any, Literal
+
+TurnPhase = Literal["model", "tools", "guardrails", "hooks"]
+
+
+@dataclass
+class ToolTiming:
+    """How long a single function tool call took."""
+
+    name: str
+    """The name of the tool."""
+
+    call_id: str
+    """The ID of the tool call, as generated by the model."""
+
+    duration: float
+    """Seconds taken by the tool, including any `on_tool_start` hooks, which run concurrently with
+    the tool."""
+
+
+@dataclass
+class TurnTiming:
+    """Where the time went during a single turn of the agent loop. All times are in seconds."""
+
+    turn: int
+    """The turn number, starting at 1."""
+
+    agent: str
+    """The name of the agent that ran this turn."""
+
+    total: float = 0.0
+    """Wall time of the whole turn, including output guardrails if this was the final turn."""
+
+    model: float = 0.0
+    """Time spent waiting on the model, including streaming the full response."""
+
+    time_to_first_token: float | None = None
+    """For streamed runs, the time from starting the model request until the first output delta.
+    """
+
+    tools: float = 0.0
+    """Wall time of executing the tool calls, including the tool hooks. Tools run concurrently, so
+    this can be less than the sum of the individual tool times."""
+
+    tool_calls: list[ToolTiming] = field(default_factory=list)
+    """The time taken by each function tool call."""
+
+    guardrails: float = 0.0
+    """Time spent running output guardrails. Input guardrails run concurrently with the first turn,
+    so they are reported in `RunTimings.input_guardrails` instead."""
+
+    hooks: float = 0.0
+    """Time spent in the agent start, agent end and handoff hooks. Tool hooks run alongside the
+    tools, so they are included in `tools`."""
+
+    _started_at: float = field(default_factory=time.perf_counter, repr=False)
+
+    @property
+    def overhead(self) -> float:
+        """Time not accounted for by the model, tools, guardrails or hooks, e.g. building the model
+        input, processing the response and handing off."""
+        return max(0.0, self.total - self.model - self.tools - self.guardrails - self.hooks)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "turn": self.turn,
+            "agent": self.agent,
+            "total": self.total,
+            "model": self.model,
+            "time_to_first_token": self.time_to_first_token,
+            "tools": self.tools,
+            "tool_calls": [asdict(tool_call) for tool_call in self.tool_calls],
+            "guardrails": self.guardrails,
+            "hooks": self.hooks,
+            "overhead": self.overhead,
+        }
+
+
+@dataclass
+class RunTimings:
+    """A timing profile for an agent run, collected when `RunConfig.collect_timings` is set. It
+    doesn't depend on tracing, so it's available even if tracing is disabled.
+    """
+
+    turns: list[TurnTiming] = field(default_factory=list)
+    """The timings of each turn, in order."""
+
+    total: float = 0.0
+    """Wall time of the whole run. For streamed runs, this is set once the run completes."""
+
+    input_guardrails: float = 0.0
+    """Wall time of the input guardrails, which run concurrently with the first turn."""
+
+    _started_at: float = field(default_factory=time.perf_counter, repr=False)
+
+    @property
+    def current_turn(self) -> TurnTiming | None:
+        """The turn currently running (or the last turn, if the run is complete)."""
+        return self.turns[-1] if self.turns else None
+
+    @property
+    def model(self) -> float:
+        """Total time spent waiting on the model."""
+        return sum(turn.model for turn in self.turns)
+
+    @property
+    def tools(self) -> float:
+        """Total wall time spent executing tools."""
+        return sum(turn.tools for turn in self.turns)
+
+    @property
+    def guardrails(self) -> float:
+        """Total time spent running guardrails, including the input guardrails."""
+        return self.input_guardrails + sum(turn.guardrails for turn in self.turns)
+
+    @property
+    def hooks(self) -> float:
+        """Total time spent in lifecycle hooks."""
+        return sum(turn.hooks for turn in self.turns)
+
+    @property
+    def overhead(self) -> float:
+        """Total time not accounted for by the model, tools, guardrails or hooks."""
+        return sum(turn.overhead for turn in self.turns)
+
+    def start_turn(self, turn: int, agent: str) -> TurnTiming:
+        """Ends the current turn, if any, and starts timing a new one."""
+        self._end_current_turn()
+        turn_timing = TurnTiming(turn=turn, agent=agent)
+        self.turns.append(turn_timing)
+        return turn_timing
+
+    def end_run(self) -> None:
+        """Ends the current turn, and the run."""
+        self._end_current_turn()
+        self.total = time.perf_counter() - self._started_at
+
+    def _end_current_turn(self) -> None:
+        turn = self.current_turn
+        if turn is not None and not turn.total:
+            turn.total = time.perf_counter() - turn._started_at
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "total": self.total,
+            "model": self.model,
+            "tools": self.tools,
+            "guardrails": self.guardrails,
+            "hooks": self.hooks,
+            "overhead": self.overhead,
+            "input_guardrails": self.input_guardrails,
+            "turns": [turn.to_dict() for turn in self.turns],
+        }
+
+
+@contextlib.contextmanager
+def measure(timings: RunTimings | None, phase: TurnPhase) -> Iterator[None]:
+    """Adds the time taken by the body to the given phase of the current turn. Does nothing if
+    timings aren't being collected."""
+    turn = timings.current_turn if timings else None
+    if turn is None:
+        yield
+        return
+
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        setattr(turn, phase, getattr(turn, phase) + time.perf_counter() - started_at)
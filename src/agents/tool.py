@@ -1,24 +1,31 @@
 from __future__ import annotations
 
+import dataclasses
+import functools
 import inspect
-import json
-from collections.abc import Awaitable
+import logging
+from collections.abc import AsyncIterator, Awaitable
 from dataclasses import dataclass
 from typing import Any, Callable, Literal, Union, overload
 
 from openai.types.responses.file_search_tool_param import Filters, RankingOptions
 from openai.types.responses.web_search_tool_param import UserLocation
-from pydantic import ValidationError
+from pydantic import BaseModel, TypeAdapter, ValidationError
 from typing_extensions import Concatenate, ParamSpec
 
 from . import _debug, _utils
 from ._utils import MaybeAwaitable
 from .computer import AsyncComputer, Computer
-from .exceptions import ModelBehaviorError
+from .exceptions import ModelBehaviorError, UserError
 from .function_schema import DocstringStyle, function_schema
 from .logger import logger
+from .metrics import record_handled_tool_error
+from .resources import get_default_resource_registry
 from .run_context import RunContextWrapper
+from .tool_policy import ToolPolicy
+from .tool_progress import discard_pending_tool_progress, report_tool_progress
 from .tracing import SpanError
+from .watchdog import blocking_call
 
 ToolParams = ParamSpec("ToolParams")
 
@@ -58,6 +65,16 @@ class FunctionTool:
     """Whether the JSON schema is in strict mode. We **strongly** recommend setting this to True,
     as it increases the likelihood of correct JSON input."""
 
+    policy: ToolPolicy | None = None
+    """Limits on how the tool is executed: concurrency, timeouts and a circuit breaker. See
+    `ToolPolicy`."""
+
+    background: bool = False
+    """Whether the tool runs in the background. The model is sent a handle right away and can
+    carry on, and the tool's output is added to the conversation once it's ready. The model can
+    also wait for the output by calling the `await_background_tool` tool, which is added to agents
+    with background tools. A run doesn't end while its background tools are still running."""
+
 
 @dataclass
 class FileSearchTool:
@@ -128,6 +145,46 @@ def default_tool_error_function(ctx: RunContextWrapper[Any], error: Exception) -
 ToolErrorFunction = Callable[[RunContextWrapper[Any], Exception], MaybeAwaitable[str]]
 
 
+def _tool_output_to_str(result: Any) -> str:
+    """Converts the return value of a function tool into the string sent to the LLM. Pydantic models
+    and dataclasses are serialized to JSON; anything else is converted with `str()`.
+    """
+    if isinstance(result, str):
+        return result
+    try:
+        if isinstance(result, BaseModel):
+            return result.model_dump_json()
+        if dataclasses.is_dataclass(result) and not isinstance(result, type):
+            return _dataclass_adapter(type(result)).dump_json(result).decode()
+    except Exception:
+        # e.g. a field that can't be serialized to JSON
+        pass
+    return str(result)
+
+
+_NOTHING_YIELDED = object()
+
+
+async def _run_async_generator(name: str, generator: AsyncIterator[Any]) -> Any:
+    """Runs an async generator tool. Every value it yields is reported as progress, apart from the
+    last, which is the tool's output.
+    """
+    result: Any = _NOTHING_YIELDED
+    async for value in generator:
+        result = value
+        report_tool_progress(value)
+    # The last value is the output, so it isn't sent as progress too
+    discard_pending_tool_progress()
+    if result is _NOTHING_YIELDED:
+        raise UserError(f"Tool {name} didn't yield an output")
+    return result
+
+
+@functools.lru_cache(maxsize=256)
+def _dataclass_adapter(cls: type[Any]) -> TypeAdapter[Any]:
+    return TypeAdapter(cls)
+
+
 @overload
 def function_tool(
     func: ToolFunction[...],
@@ -137,6 +194,8 @@ def function_tool(
     docstring_style: DocstringStyle | None = None,
     use_docstring_info: bool = True,
     failure_error_function: ToolErrorFunction | None = None,
+    policy: ToolPolicy | None = None,
+    background: bool = False,
 ) -> FunctionTool:
     """Overload for usage as @function_tool (no parentheses)."""
     ...
@@ -150,6 +209,8 @@ def function_tool(
     docstring_style: DocstringStyle | None = None,
     use_docstring_info: bool = True,
     failure_error_function: ToolErrorFunction | None = None,
+    policy: ToolPolicy | None = None,
+    background: bool = False,
 ) -> Callable[[ToolFunction[...]], FunctionTool]:
     """Overload for usage as @function_tool(...)."""
     ...
@@ -163,6 +224,8 @@ def function_tool(
     docstring_style: DocstringStyle | None = None,
     use_docstring_info: bool = True,
     failure_error_function: ToolErrorFunction | None = default_tool_error_function,
+    policy: ToolPolicy | None = None,
+    background: bool = False,
 ) -> FunctionTool | Callable[[ToolFunction[...]], FunctionTool]:
     """
     Decorator to create a FunctionTool from a function. By default, we will:
@@ -172,7 +235,12 @@ def function_tool(
     The docstring style is detected automatically, but you can override it.
 
     If the function takes a `RunContextWrapper` as the first argument, it *must* match the
-    context type of the agent that uses the tool.
+    context type of the agent that uses the tool. Parameters annotated as `Annotated[T, resource]`,
+    where `resource` is a `Resource`, are injected from the default `ResourceRegistry`.
+
+    The function can also be an async generator. Each value it yields, other than the last, is
+    reported as progress (sent as a `ToolProgressStreamEvent` in streamed runs), and the last value
+    it yields is the tool's output.
 
     Args:
         func: The function to wrap.
@@ -186,6 +254,10 @@ def function_tool(
         failure_error_function: If provided, use this function to generate an error message when
             the tool call fails. The error message is sent to the LLM. If you pass None, then no
             error message will be sent and instead an Exception will be raised.
+        policy: If provided, limits on how the tool is executed, such as a maximum concurrency, a
+            timeout and a circuit breaker.
+        background: If True, the tool runs in the background, so the model doesn't wait for it.
+            See `FunctionTool.background`.
     """
 
     def _create_function_tool(the_func: ToolFunction[...]) -> FunctionTool:
@@ -197,54 +269,71 @@ def function_tool(
             use_docstring_info=use_docstring_info,
         )
 
+        # Everything that doesn't change between calls is looked up once, when the tool is created
+        name = schema.name
+        validate_json = schema.params_pydantic_model.model_validate_json
+        to_call_args = schema.to_call_args
+        takes_context = schema.takes_context
+        resources = schema.resources
+        is_async = inspect.iscoroutinefunction(the_func)
+        is_async_generator = inspect.isasyncgenfunction(the_func)
+
         async def _on_invoke_tool_impl(ctx: RunContextWrapper[Any], input: str) -> str:
-            try:
-                json_data: dict[str, Any] = json.loads(input) if input else {}
-            except Exception as e:
+            debug = logger.isEnabledFor(logging.DEBUG)
+            if debug:
                 if _debug.DONT_LOG_TOOL_DATA:
-                    logger.debug(f"Invalid JSON input for tool {schema.name}")
+                    logger.debug(f"Invoking tool {name}")
                 else:
-                    logger.debug(f"Invalid JSON input for tool {schema.name}: {input}")
-                raise ModelBehaviorError(
-                    f"Invalid JSON input for tool {schema.name}: {input}"
-                ) from e
-
-            if _debug.DONT_LOG_TOOL_DATA:
-                logger.debug(f"Invoking tool {schema.name}")
-            else:
-                logger.debug(f"Invoking tool {schema.name} with input {input}")
+                    logger.debug(f"Invoking tool {name} with input {input}")
 
+            # Parses and validates the input in a single pass
             try:
-                parsed = (
-                    schema.params_pydantic_model(**json_data)
-                    if json_data
-                    else schema.params_pydantic_model()
-                )
+                parsed = validate_json(input or "{}")
             except ValidationError as e:
-                raise ModelBehaviorError(f"Invalid JSON input for tool {schema.name}: {e}") from e
-
-            args, kwargs_dict = schema.to_call_args(parsed)
+                if any(error["type"] == "json_invalid" for error in e.errors()):
+                    if _debug.DONT_LOG_TOOL_DATA:
+                        logger.debug(f"Invalid JSON input for tool {name}")
+                    else:
+                        logger.debug(f"Invalid JSON input for tool {name}: {input}")
+                    raise ModelBehaviorError(f"Invalid JSON input for tool {name}: {input}") from e
+                raise ModelBehaviorError(f"Invalid JSON input for tool {name}: {e}") from e
+
+            if resources:
+                registry = get_default_resource_registry()
+                resource_values = {
+                    param: await registry.get(resource) for param, resource in resources.items()
+                }
+                args, kwargs_dict = to_call_args(parsed, resource_values)
+            else:
+                args, kwargs_dict = to_call_args(parsed)
 
-            if not _debug.DONT_LOG_TOOL_DATA:
+            if debug and not _debug.DONT_LOG_TOOL_DATA:
                 logger.debug(f"Tool call args: {args}, kwargs: {kwargs_dict}")
 
-            if inspect.iscoroutinefunction(the_func):
-                if schema.takes_context:
+            if is_async_generator:
+                if takes_context:
+                    result = await _run_async_generator(name, the_func(ctx, *args, **kwargs_dict))
+                else:
+                    result = await _run_async_generator(name, the_func(*args, **kwargs_dict))
+            elif is_async:
+                if takes_context:
                     result = await the_func(ctx, *args, **kwargs_dict)
                 else:
                     result = await the_func(*args, **kwargs_dict)
             else:
-                if schema.takes_context:
-                    result = the_func(ctx, *args, **kwargs_dict)
-                else:
-                    result = the_func(*args, **kwargs_dict)
+                with blocking_call(name):
+                    if takes_context:
+                        result = the_func(ctx, *args, **kwargs_dict)
+                    else:
+                        result = the_func(*args, **kwargs_dict)
 
-            if _debug.DONT_LOG_TOOL_DATA:
-                logger.debug(f"Tool {schema.name} completed.")
-            else:
-                logger.debug(f"Tool {schema.name} returned {result}")
+            if debug:
+                if _debug.DONT_LOG_TOOL_DATA:
+                    logger.debug(f"Tool {name} completed.")
+                else:
+                    logger.debug(f"Tool {name} returned {result}")
 
-            return str(result)
+            return _tool_output_to_str(result)
 
         async def _on_invoke_tool(ctx: RunContextWrapper[Any], input: str) -> str:
             try:
@@ -253,6 +342,7 @@ def function_tool(
                 if failure_error_function is None:
                     raise
 
+                record_handled_tool_error(e)
                 result = failure_error_function(ctx, e)
                 if inspect.isawaitable(result):
                     return await result
@@ -273,6 +363,8 @@ def function_tool(
             description=schema.description or "",
             params_json_schema=schema.params_json_schema,
             on_invoke_tool=_on_invoke_tool,
+            policy=policy,
+            background=background,
         )
 
     # If func is actually a callable, we were used as @function_tool with no parentheses
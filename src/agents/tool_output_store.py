@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .tool import FunctionTool, function_tool
+
+RETRIEVAL_TOOL_NAME = "read_stored_tool_output"
+
+
+class ToolOutputStore:
+    """A content-addressed store for tool outputs, in a local directory. Each output is stored once,
+    in a file named after the SHA-256 hash of its contents, so identical outputs (e.g. from
+    different runs, or different processes sharing the directory) share a single file.
+    """
+
+    def __init__(self, directory: str | os.PathLike[str] | None = None):
+        """
+        Args:
+            directory: The directory to store outputs in. Defaults to
+                `openai-agents/tool-outputs` in the system's temporary directory.
+        """
+        self.directory = (
+            Path(directory)
+            if directory is not None
+            else Path(tempfile.gettempdir()) / "openai-agents" / "tool-outputs"
+        )
+
+    def put(self, output: str) -> str:
+        """Stores an output, if it isn't already stored, and returns its handle."""
+        data = output.encode("utf-8")
+        handle = hashlib.sha256(data).hexdigest()
+        path = self._path(handle)
+        if not path.exists():
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # Written to a temporary file first, so that readers never see a partial output
+            with tempfile.NamedTemporaryFile(dir=self.directory, suffix=".tmp", delete=False) as f:
+                f.write(data)
+            os.replace(f.name, path)
+        return handle
+
+    def get(self, handle: str) -> str | None:
+        """Returns a stored output, or None if there's no output with that handle."""
+        # Handles are hex digests; anything else could be a path outside the store
+        if len(handle) != 64 or any(c not in "0123456789abcdef" for c in handle):
+            return None
+        try:
+            return self._path(handle).read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return None
+
+    def _path(self, handle: str) -> Path:
+        return self.directory / f"{handle}.txt"
+
+
+@dataclass
+class ToolOutputPolicy:
+    """Limits the size of function tool outputs sent to the model. Every tool output stays in the
+    conversation history, and so is resent on every later turn. Outputs longer than `max_chars`
+    are stored in `store` instead, and the model is sent a preview of the output along with a
+    handle. A `read_stored_tool_output` tool is added to the agent's tools, which the model can
+    call to page through the full output.
+    """
+
+    max_chars: int = 20_000
+    """Outputs longer than this many characters are stored, and replaced by a preview."""
+
+    preview_chars: int = 2_000
+    """How many characters from the start of a stored output are sent to the model."""
+
+    page_chars: int = 10_000
+    """How many characters of a stored output the retrieval tool returns per call."""
+
+    store: ToolOutputStore = field(default_factory=ToolOutputStore)
+    """Where oversized outputs are stored."""
+
+    _retrieval_tool: FunctionTool | None = field(default=None, init=False, repr=False)
+
+    async def apply(self, output: str) -> str:
+        """Returns the output to send to the model: the output itself if it's short enough,
+        otherwise a preview and the handle of the stored output.
+        """
+        if len(output) <= self.max_chars:
+            return output
+
+        # Writing the output can take a while, so it's done off the event loop
+        handle = await asyncio.to_thread(self.store.put, output)
+        preview = output[: self.preview_chars]
+        return (
+            f"{preview}\n\n"
+            f"[Output truncated: showing the first {len(preview)} of {len(output)} characters. "
+            f'The full output is stored with handle "{handle}". To read more, call '
+            f"{RETRIEVAL_TOOL_NAME} with this handle and offset={len(preview)}.]"
+        )
+
+    @property
+    def retrieval_tool(self) -> FunctionTool:
+        """The tool that the model calls to read stored outputs."""
+        if self._retrieval_tool is None:
+            self._retrieval_tool = self._create_retrieval_tool()
+        return self._retrieval_tool
+
+    def _create_retrieval_tool(self) -> FunctionTool:
+        store = self.store
+        page_chars = self.page_chars
+
+        async def read_stored_tool_output(handle: str, offset: int = 0) -> str:
+            """Read part of a tool output that was too long to be sent in full.
+
+            Args:
+                handle: The handle of the stored output.
+                offset: The character to start reading from.
+            """
+            output = await asyncio.to_thread(store.get, handle)
+            if output is None:
+                return f'There is no stored output with handle "{handle}".'
+            if offset < 0 or offset >= len(output):
+                return f"The offset must be between 0 and {len(output) - 1}."
+
+            end = min(offset + page_chars, len(output))
+            page = output[offset:end]
+            if end < len(output):
+                return (
+                    f"{page}\n\n[Characters {offset} to {end} of {len(output)}. To read more, "
+                    f"call {RETRIEVAL_TOOL_NAME} again with offset={end}.]"
+                )
+            return f"{page}\n\n[Characters {offset} to {end} of {len(output)}. End of output.]"
+
+        return function_tool(read_stored_tool_output, name_override=RETRIEVAL_TOOL_NAME)
@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+import weakref
+from collections.abc import Awaitable
+from dataclasses import dataclass, field
+from typing import Any, Callable, Literal
+
+from . import _utils
+from .exceptions import UserError
+from .logger import logger
+from .metrics import _tool_errors, record_handled_tool_error
+from .tracing import SpanError
+
+CircuitState = Literal["closed", "open", "half_open"]
+
+ToolPolicyDecision = Literal[
+    "succeeded", "failed", "timed_out", "rejected_circuit_open", "rejected_bulkhead_full"
+]
+
+
+class _CircuitBreaker:
+    """Counts consecutive failures, and opens after `failure_threshold` of them. Once
+    `reset_timeout` seconds have passed, a single trial call is let through (the half-open state):
+    if it succeeds the circuit closes again, otherwise it stays open for another `reset_timeout`.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.trial_in_flight = False
+        # Runs on different threads (each with its own event loop) can share a breaker
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return "open"
+            return "half_open"
+
+    def acquire(self) -> CircuitState | None:
+        """Returns the state a call is allowed through in, or None if the circuit is open."""
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            if self.trial_in_flight or time.monotonic() - self.opened_at < self.reset_timeout:
+                return None
+            self.trial_in_flight = True
+            return "half_open"
+
+    def release(self, state: CircuitState, succeeded: bool | None) -> None:
+        """Records the outcome of a call. `succeeded` is None if the call didn't run to completion,
+        e.g. because it was cancelled, in which case it doesn't count either way."""
+        with self._lock:
+            if state == "half_open":
+                self.trial_in_flight = False
+            if succeeded is None:
+                return
+            if succeeded:
+                # A slow call that started before the circuit opened doesn't close it
+                if state == "half_open" or self.opened_at is None:
+                    self.failures = 0
+                    self.opened_at = None
+                return
+
+            self.failures += 1
+            if state == "half_open" or (
+                self.opened_at is None and self.failures >= self.failure_threshold
+            ):
+                self.opened_at = time.monotonic()
+
+
+class _Bulkhead:
+    def __init__(self, max_concurrency: int):
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.waiting = 0
+
+
+@dataclass
+class ToolPolicy:
+    """Limits how a function tool is executed, to protect the service behind it and to stop a
+    misbehaving tool from stalling runs. Set it as the `policy` of a `FunctionTool` (or pass it to
+    `function_tool`).
+
+    The policy's state is shared by every call to every tool it's attached to, across all runs in
+    the process. Giving each tool its own policy isolates tools from each other (a bulkhead), so a
+    slow or failing tool can't use up another tool's capacity; tools that call the same downstream
+    service can share one policy, so they share its limits.
+
+    Calls that are rejected, or time out, return an error message to the model rather than raising.
+    The decision made for each call is recorded on its function span.
+    """
+
+    max_concurrency: int | None = None
+    """The maximum number of calls that can run at the same time. Further calls wait for a slot.
+    None means no limit. The limit applies per event loop, which in most programs means per
+    process."""
+
+    max_queued: int | None = None
+    """The maximum number of calls that can wait for a slot when `max_concurrency` calls are
+    already running. Calls beyond that are rejected immediately. None means no limit. Only used if
+    `max_concurrency` is set."""
+
+    timeout: float | None = None
+    """The maximum number of seconds a call can run for before it's cancelled. Time spent waiting
+    for a slot doesn't count. Only async tools can be interrupted: a sync tool blocks the event
+    loop until it returns. None means no timeout."""
+
+    failure_threshold: int | None = None
+    """The number of consecutive failed calls (errors and timeouts) after which the circuit
+    breaker opens. While it's open, calls are rejected without running the tool. None disables the
+    circuit breaker."""
+
+    reset_timeout: float = 30.0
+    """How many seconds the circuit breaker stays open before letting a trial call through. If
+    the trial call succeeds, the circuit closes again."""
+
+    _breaker: _CircuitBreaker | None = field(default=None, init=False, repr=False, compare=False)
+    _bulkheads: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _Bulkhead] = field(
+        default_factory=weakref.WeakKeyDictionary, init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self) -> None:
+        if self.max_concurrency is not None and self.max_concurrency < 1:
+            raise UserError("max_concurrency must be at least 1")
+        if self.max_queued is not None and self.max_queued < 0:
+            raise UserError("max_queued must not be negative")
+        if self.timeout is not None and self.timeout <= 0:
+            raise UserError("timeout must be positive")
+        if self.failure_threshold is not None:
+            if self.failure_threshold < 1:
+                raise UserError("failure_threshold must be at least 1")
+            self._breaker = _CircuitBreaker(self.failure_threshold, self.reset_timeout)
+
+    @property
+    def circuit_state(self) -> CircuitState:
+        """The current state of the circuit breaker. Always "closed" if it's disabled."""
+        return self._breaker.state if self._breaker else "closed"
+
+    async def run(
+        self,
+        tool_name: str,
+        invoke: Callable[[], Awaitable[str]],
+        decisions: dict[str, Any],
+    ) -> str:
+        """Runs a tool call under the policy, and returns its output, or an error message for the
+        model if the call was rejected or timed out. What was decided is recorded in `decisions`.
+        """
+        state: CircuitState = "closed"
+        if self._breaker:
+            acquired = self._breaker.acquire()
+            if acquired is None:
+                decisions["circuit"] = "open"
+                return self._reject(
+                    tool_name,
+                    "rejected_circuit_open",
+                    decisions,
+                    f"Tool {tool_name} is temporarily unavailable, because it failed repeatedly. "
+                    "Don't call it again for now.",
+                )
+            state = acquired
+            decisions["circuit"] = state
+
+        succeeded: bool | None = None
+        try:
+            if self.max_concurrency is None:
+                result, succeeded = await self._invoke(tool_name, invoke, decisions)
+                return result
+
+            bulkhead = self._get_bulkhead()
+            if (
+                self.max_queued is not None
+                and bulkhead.semaphore.locked()
+                and bulkhead.waiting >= self.max_queued
+            ):
+                return self._reject(
+                    tool_name,
+                    "rejected_bulkhead_full",
+                    decisions,
+                    f"Tool {tool_name} is busy, with too many calls in progress. Try again later.",
+                )
+
+            queued_at = time.monotonic()
+            bulkhead.waiting += 1
+            try:
+                await bulkhead.semaphore.acquire()
+            finally:
+                bulkhead.waiting -= 1
+            decisions["queued_seconds"] = time.monotonic() - queued_at
+
+            try:
+                result, succeeded = await self._invoke(tool_name, invoke, decisions)
+                return result
+            finally:
+                bulkhead.semaphore.release()
+        except Exception:
+            succeeded = False
+            raise
+        finally:
+            if self._breaker:
+                self._breaker.release(state, succeeded)
+
+    async def _invoke(
+        self,
+        tool_name: str,
+        invoke: Callable[[], Awaitable[str]],
+        decisions: dict[str, Any],
+    ) -> tuple[str, bool]:
+        # Errors that the tool handles itself, by returning an error message, are failures too
+        errors = _tool_errors.get()
+        errors_token = None
+        if errors is None:
+            errors = []
+            errors_token = _tool_errors.set(errors)
+        error_count = len(errors)
+
+        try:
+            if self.timeout is None:
+                result = await invoke()
+            else:
+                result = await asyncio.wait_for(invoke(), self.timeout)
+        except asyncio.TimeoutError:
+            timed_out = True
+        except Exception:
+            decisions["decision"] = "failed"
+            raise
+        else:
+            timed_out = False
+        finally:
+            if errors_token is not None:
+                _tool_errors.reset(errors_token)
+
+        if timed_out:
+            record_handled_tool_error(TimeoutError(f"Tool {tool_name} timed out"))
+            message = f"Tool {tool_name} timed out after {self.timeout} seconds."
+            return self._reject(tool_name, "timed_out", decisions, message), False
+
+        succeeded = len(errors) == error_count
+        decisions["decision"] = "succeeded" if succeeded else "failed"
+        return result, succeeded
+
+    def _reject(
+        self,
+        tool_name: str,
+        decision: ToolPolicyDecision,
+        decisions: dict[str, Any],
+        message: str,
+    ) -> str:
+        decisions["decision"] = decision
+        logger.debug(f"Tool policy for {tool_name}: {decision}")
+        _utils.attach_error_to_current_span(
+            SpanError(
+                message="Tool call stopped by policy (non-fatal)",
+                data={"tool_name": tool_name, "decision": decision},
+            )
+        )
+        return message
+
+    def _get_bulkhead(self) -> _Bulkhead:
+        # asyncio primitives belong to a single event loop, so each loop gets its own semaphore
+        loop = asyncio.get_running_loop()
+        bulkhead = self._bulkheads.get(loop)
+        if bulkhead is None:
+            assert self.max_concurrency is not None
+            bulkhead = self._bulkheads[loop] = _Bulkhead(self.max_concurrency)
+        return bulkhead
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import time
+from typing import Any, Callable
+
+_current_reporter: contextvars.ContextVar[ToolProgressReporter | None] = contextvars.ContextVar(
+    "tool_progress_reporter", default=None
+)
+
+
+class ToolProgressReporter:
+    """Sends the progress of a single tool call to a streamed run, at most once per `interval`
+    seconds. Progress reported within the interval replaces any progress that's waiting to be sent,
+    so the consumer always gets the latest progress, and reporting never waits for the consumer.
+    """
+
+    def __init__(self, emit: Callable[[Any], None], interval: float):
+        self._emit = emit
+        self._interval = interval
+        self._last_sent: float | None = None
+        self._pending: Any = None
+        self._flush_handle: asyncio.Handle | None = None
+
+    def report(self, progress: Any) -> None:
+        self._pending = progress
+        if self._flush_handle is not None:
+            # A send is already scheduled, and will send this instead
+            return
+
+        loop = asyncio.get_running_loop()
+        wait = (
+            0.0 if self._last_sent is None else self._last_sent + self._interval - time.monotonic()
+        )
+        # Even progress that can be sent right away is sent on the next iteration of the event
+        # loop, so that the last value an async generator tool yields, which is its output, can
+        # be discarded rather than sent as progress
+        if wait <= 0:
+            self._flush_handle = loop.call_soon(self._flush)
+        else:
+            self._flush_handle = loop.call_later(wait, self._flush)
+
+    def discard_pending(self) -> None:
+        """Discards any progress that hasn't been sent yet, e.g. once the tool has completed."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self._pending = None
+
+    def _flush(self) -> None:
+        progress, self._pending = self._pending, None
+        self._flush_handle = None
+        self._last_sent = time.monotonic()
+        self._emit(progress)
+
+
+def set_tool_progress_reporter(reporter: ToolProgressReporter | None) -> None:
+    """Sets the reporter for the tool call running in the current task."""
+    _current_reporter.set(reporter)
+
+
+def report_tool_progress(progress: Any) -> None:
+    """Reports the progress of the function tool that's running, e.g. a status message or a
+    percentage. In streamed runs, it's sent as a `ToolProgressStreamEvent`; otherwise, it's
+    ignored. Never blocks. Async generator function tools report each value they yield, other than
+    the last, automatically.
+    """
+    reporter = _current_reporter.get()
+    if reporter is not None:
+        reporter.report(progress)
+
+
+def discard_pending_tool_progress() -> None:
+    """Discards the progress of the running tool that hasn't been sent yet."""
+    reporter = _current_reporter.get()
+    if reporter is not None:
+        reporter.discard_pending()
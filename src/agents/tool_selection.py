@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import Any
+
+from .items import TResponseInputItem
+from .model_settings import ModelSettings
+from .run_context import RunContextWrapper
+from .tool import FunctionTool, Tool
+
+_WORD = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do for from get has have how i if in is it me my of on or "
+    "please the this to was what when where which who will with you your".split()
+)
+
+
+def _tokenize(text: str) -> list[str]:
+    """Splits text, including snake_case and camelCase identifiers, into lowercase terms."""
+    tokens = []
+    for word in _WORD.findall(text):
+        word = word.lower()
+        if word in _STOPWORDS:
+            continue
+        # A crude stemmer, so that e.g. "orders" matches "order"
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+
+def _tool_text(tool: FunctionTool) -> str:
+    parts = [tool.name, tool.name, tool.description]
+    for name, schema in (tool.params_json_schema.get("properties") or {}).items():
+        parts.append(name)
+        if isinstance(schema, dict) and isinstance(schema.get("description"), str):
+            parts.append(schema["description"])
+    return " ".join(parts)
+
+
+class _BM25Index:
+    """An Okapi BM25 index over the names, descriptions and parameter docs of function tools."""
+
+    def __init__(self, tools: list[FunctionTool], k1: float, b: float):
+        self.tools = tools
+        self.k1 = k1
+        self.b = b
+        docs = [Counter(_tokenize(_tool_text(tool))) for tool in tools]
+        self.lengths = [sum(doc.values()) for doc in docs]
+        self.average_length = (sum(self.lengths) / len(docs)) if docs else 0.0
+
+        # term -> [(tool index, term frequency)]
+        self.postings: dict[str, list[tuple[int, int]]] = {}
+        for i, doc in enumerate(docs):
+            for term, count in doc.items():
+                self.postings.setdefault(term, []).append((i, count))
+        self.idf = {
+            term: math.log(1 + (len(docs) - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self.postings.items()
+        }
+
+    def scores(self, query: Iterable[str]) -> dict[int, float]:
+        """Scores the tools that share at least one term with the query."""
+        scores: dict[int, float] = {}
+        for term in set(query):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf[term]
+            for i, count in postings:
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[i] / self.average_length)
+                scores[i] = scores.get(i, 0.0) + idf * count * (self.k1 + 1) / (count + norm)
+        return scores
+
+
+@dataclass
+class ToolSelection:
+    """Sends the model only the function tools that are most relevant to the conversation, instead
+    of every tool, for agents with many tools. Fewer tool definitions make requests smaller and
+    cheaper, and tend to make the model's choice of tool more accurate.
+
+    Each turn, the function tools are ranked against the most recent conversation items with
+    BM25, using their names, descriptions and parameter descriptions, and the `top_k` best matches
+    are sent (topped up with the first other tools if fewer than `top_k` match). Hosted tools,
+    `pinned` tools, the tool forced by `tool_choice`, and tools called in the recent items are
+    always sent. If the model calls a tool that the agent doesn't have (e.g. because it guessed at
+    one that wasn't sent), it's told the tool isn't available, and the agent is sent every tool for
+    the rest of the run.
+    """
+
+    top_k: int = 10
+    """The number of most relevant function tools to send each turn."""
+
+    pinned: list[str] = field(default_factory=list)
+    """The names of tools that are always sent."""
+
+    recent_items: int = 4
+    """How many of the most recent conversation items to rank the tools against."""
+
+    k1: float = 1.2
+    """The BM25 term frequency saturation parameter."""
+
+    b: float = 0.75
+    """The BM25 document length normalization parameter."""
+
+    _index: _BM25Index | None = field(default=None, init=False, repr=False, compare=False)
+
+    def select(
+        self,
+        tools: list[Tool],
+        input: list[TResponseInputItem],
+        model_settings: ModelSettings | None = None,
+        expanded: bool = False,
+    ) -> list[Tool]:
+        """Returns the tools to send to the model for a turn, in their original order. If
+        `expanded`, every tool is sent."""
+        function_tools = [tool for tool in tools if isinstance(tool, FunctionTool)]
+        if expanded or len(function_tools) <= self.top_k:
+            return tools
+
+        index = self._get_index(function_tools)
+        recent = input[-self.recent_items :] if self.recent_items > 0 else []
+        scores = index.scores(_tokenize(" ".join(_item_text(item) for item in recent)))
+        ranked = sorted(scores, key=lambda i: scores[i], reverse=True)[: self.top_k]
+        # If too few tools match, the rest are filled in, in order, so the model still has a choice
+        for i in range(len(index.tools)):
+            if len(ranked) >= self.top_k:
+                break
+            if i not in scores:
+                ranked.append(i)
+
+        keep = {index.tools[i].name for i in ranked}
+        keep.update(self.pinned)
+        keep.update(
+            item.get("name")  # type: ignore[misc]
+            for item in recent
+            if isinstance(item, dict) and item.get("type") == "function_call"
+        )
+        tool_choice = model_settings.tool_choice if model_settings else None
+        if tool_choice not in (None, "auto", "required", "none"):
+            keep.add(tool_choice)
+
+        return [tool for tool in tools if not isinstance(tool, FunctionTool) or tool.name in keep]
+
+    def _get_index(self, tools: list[FunctionTool]) -> _BM25Index:
+        # The index is only rebuilt if the agent's tools change
+        index = self._index
+        if (
+            index is None
+            or len(index.tools) != len(tools)
+            or any(a is not b for a, b in zip(index.tools, tools))
+        ):
+            index = self._index = _BM25Index(tools, self.k1, self.b)
+        return index
+
+
+def unavailable_tool(name: str, agent_name: str) -> FunctionTool:
+    """A stand-in for a tool that the model called, but that the agent doesn't have. Calling it
+    makes the agent's tool selection send every tool for the rest of the run.
+    """
+
+    async def on_invoke_tool(ctx: RunContextWrapper[Any], input: str) -> str:
+        ctx._expanded_tool_selections.add(agent_name)
+        return (
+            f"Tool {name} is not available. You can now see every available tool; "
+            "call one of those instead."
+        )
+
+    return FunctionTool(
+        name=name,
+        description="",
+        params_json_schema={},
+        on_invoke_tool=on_invoke_tool,
+    )
+
+
+def _item_text(item: Any) -> str:
+    if not isinstance(item, dict):
+        return ""
+    item_type = item.get("type")
+    if item_type == "function_call":
+        return f"{item.get('name', '')} {item.get('arguments', '')}"
+    if item_type == "function_call_output":
+        return str(item.get("output", ""))
+
+    content = item.get("content")
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return " ".join(
+            part["text"]
+            for part in content
+            if isinstance(part, dict) and isinstance(part.get("text"), str)
+        )
+    return ""
@@ -12,6 +12,7 @@ from .create import (
     response_span,
     trace,
 )
+from .dispatch import AsyncDispatchMultiTracingProcessor, DispatchStats, OverflowPolicy
 from .processor_interface import TracingProcessor
 from .processors import default_exporter, default_processor
 from .setup import GLOBAL_TRACE_PROVIDER
@@ -31,6 +32,7 @@ from .util import gen_span_id, gen_trace_id
 
 __all__ = [
     "add_trace_processor",
+    "enable_async_trace_dispatch",
     "agent_span",
     "custom_span",
     "function_span",
@@ -55,6 +57,9 @@ __all__ = [
     "HandoffSpanData",
     "ResponseSpanData",
     "TracingProcessor",
+    "AsyncDispatchMultiTracingProcessor",
+    "DispatchStats",
+    "OverflowPolicy",
     "gen_trace_id",
     "gen_span_id",
 ]
@@ -74,6 +79,22 @@ def set_trace_processors(processors: list[TracingProcessor]) -> None:
     GLOBAL_TRACE_PROVIDER.set_processors(processors)
 
 
+def enable_async_trace_dispatch(
+    max_buffer_size: int = 2048,
+    overflow_policy: OverflowPolicy = "drop_oldest",
+) -> AsyncDispatchMultiTracingProcessor:
+    """
+    Deliver traces/spans to the registered processors from background threads instead of inline
+    on the event loop. Cheap built-in processors are still called inline. Returns the dispatching
+    processor, whose `stats()` method reports per-processor buffer depth, drops and lag.
+    """
+    multi_processor = AsyncDispatchMultiTracingProcessor(
+        max_buffer_size=max_buffer_size, overflow_policy=overflow_policy
+    )
+    GLOBAL_TRACE_PROVIDER.set_multi_processor(multi_processor)
+    return multi_processor
+
+
 def set_tracing_disabled(disabled: bool) -> None:
     """
     Set whether tracing is globally disabled.
@@ -0,0 +1,384 @@
+"""Offline analysis of trace files written by `FileSpanExporter`.
+
+Usage:
+    python -m agents.tracing.analyze [--json] PATH [PATH ...]
+
+Each PATH can be a `.jsonl`/`.jsonl.gz` file, or a directory containing such files. Files are
+streamed line by line (plain files are memory-mapped), so only small per-span records are kept in
+memory, never the span payloads themselves.
+"""
+
+from __future__ import annotations
+
+import argparse
+import array
+import gzip
+import json
+import mmap
+import os
+import sys
+from collections import defaultdict
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+PERCENTILES = (50, 90, 95, 99)
+
+# Spans that make up a critical path. Other spans (e.g. guardrails, handoffs) are skipped over.
+_CRITICAL_PATH_SPAN_TYPES = ("agent", "generation", "response", "function")
+
+
+@dataclass
+class LatencyStats:
+    """Latency distribution for a group of spans or traces, in seconds."""
+
+    count: int
+    mean: float
+    max: float
+    percentiles: dict[int, float]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "max": self.max,
+            **{f"p{p}": v for p, v in self.percentiles.items()},
+        }
+
+
+@dataclass
+class TokenTotals:
+    """Token usage summed over generation spans."""
+
+    generations: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "generations": self.generations,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+        }
+
+
+@dataclass
+class CriticalPathStats:
+    """How often a critical path (a chain of span labels) occurred, and how long it took."""
+
+    path: tuple[str, ...]
+    latency: LatencyStats
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"path": " > ".join(self.path), **self.latency.to_dict()}
+
+
+@dataclass
+class TraceAnalysis:
+    """The result of analyzing a set of trace files."""
+
+    files: int = 0
+    traces: int = 0
+    spans: int = 0
+    malformed_lines: int = 0
+    workflow_latency: dict[str, LatencyStats] = field(default_factory=dict)
+    span_type_latency: dict[str, LatencyStats] = field(default_factory=dict)
+    span_name_latency: dict[str, LatencyStats] = field(default_factory=dict)
+    critical_paths: dict[str, list[CriticalPathStats]] = field(default_factory=dict)
+    tokens_by_model: dict[str, TokenTotals] = field(default_factory=dict)
+
+    @property
+    def total_tokens(self) -> TokenTotals:
+        totals = TokenTotals()
+        for t in self.tokens_by_model.values():
+            totals.generations += t.generations
+            totals.input_tokens += t.input_tokens
+            totals.output_tokens += t.output_tokens
+        return totals
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "files": self.files,
+            "traces": self.traces,
+            "spans": self.spans,
+            "malformed_lines": self.malformed_lines,
+            "workflow_latency": {k: v.to_dict() for k, v in self.workflow_latency.items()},
+            "span_type_latency": {k: v.to_dict() for k, v in self.span_type_latency.items()},
+            "span_name_latency": {k: v.to_dict() for k, v in self.span_name_latency.items()},
+            "critical_paths": {k: [p.to_dict() for p in v] for k, v in self.critical_paths.items()},
+            "tokens_by_model": {k: v.to_dict() for k, v in self.tokens_by_model.items()},
+            "total_tokens": self.total_tokens.to_dict(),
+        }
+
+
+def latency_stats(values: Sequence[float]) -> LatencyStats:
+    """Computes nearest-rank percentiles for the given durations."""
+    ordered = sorted(values)
+    n = len(ordered)
+    if n == 0:
+        return LatencyStats(count=0, mean=0.0, max=0.0, percentiles={p: 0.0 for p in PERCENTILES})
+
+    percentiles = {}
+    for p in PERCENTILES:
+        rank = max(1, -(-p * n // 100))  # ceil(p * n / 100)
+        percentiles[p] = ordered[rank - 1]
+    return LatencyStats(count=n, mean=sum(ordered) / n, max=ordered[-1], percentiles=percentiles)
+
+
+def iter_trace_files(paths: Iterable[str | os.PathLike[str]]) -> Iterator[str]:
+    """Expands directories into the trace files they contain, in name order."""
+    for path in paths:
+        path = os.fspath(path)
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.endswith((".jsonl", ".jsonl.gz")):
+                    yield os.path.join(path, name)
+        else:
+            yield path
+
+
+def iter_lines(path: str) -> Iterator[bytes]:
+    """Yields the lines of a trace file without reading it into memory."""
+    if path.endswith(".gz"):
+        with gzip.open(path, "rb") as f:
+            try:
+                yield from f
+            except EOFError:
+                # The file is still being written, so it doesn't end with an end-of-stream marker
+                # yet. Every complete line has been read, and the partial one is skipped.
+                pass
+        return
+
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield from iter(mm.readline, b"")
+
+
+def _parse_time(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        return None
+
+
+def _span_label(span_data: dict[str, Any]) -> str:
+    span_type = span_data.get("type") or "unknown"
+    name = span_data.get("name")
+    if name:
+        return f"{span_type}:{name}"
+    if span_type == "generation" and span_data.get("model"):
+        return f"{span_type}:{span_data['model']}"
+    return str(span_type)
+
+
+class _Analyzer:
+    """Consumes exported items one at a time. Relies on spans being exported when they end, so a
+    span's children are always seen before the span itself.
+    """
+
+    def __init__(self) -> None:
+        self.result = TraceAnalysis()
+        self._workflow_by_trace: dict[str, str] = {}
+        self._trace_bounds: dict[str, list[float]] = {}
+        self._type_durations: defaultdict[str, array.array[float]] = defaultdict(
+            lambda: array.array("d")
+        )
+        self._name_durations: defaultdict[str, array.array[float]] = defaultdict(
+            lambda: array.array("d")
+        )
+        # span_id -> (end time, critical path) of its last-ending child seen so far
+        self._pending_children: dict[str, tuple[float, tuple[str, ...]]] = {}
+        self._critical_paths: defaultdict[str, defaultdict[tuple[str, ...], array.array[float]]] = (
+            defaultdict(lambda: defaultdict(lambda: array.array("d")))
+        )
+
+    def add(self, item: dict[str, Any]) -> None:
+        obj = item.get("object")
+        if obj == "trace":
+            self.result.traces += 1
+            self._workflow_by_trace[item.get("id") or ""] = item.get("workflow_name") or "unknown"
+        elif obj == "trace.span":
+            self._add_span(item)
+
+    def _add_span(self, span: dict[str, Any]) -> None:
+        self.result.spans += 1
+        span_data = span.get("span_data") or {}
+        span_type = span_data.get("type") or "unknown"
+        label = _span_label(span_data)
+
+        if span_type == "generation":
+            model = span_data.get("model") or "unknown"
+            totals = self.result.tokens_by_model.setdefault(model, TokenTotals())
+            totals.generations += 1
+            usage = span_data.get("usage") or {}
+            totals.input_tokens += usage.get("input_tokens") or 0
+            totals.output_tokens += usage.get("output_tokens") or 0
+
+        started_at = _parse_time(span.get("started_at"))
+        ended_at = _parse_time(span.get("ended_at"))
+        if started_at is None or ended_at is None:
+            return
+
+        duration = max(0.0, ended_at - started_at)
+        self._type_durations[span_type].append(duration)
+        if label != span_type:
+            self._name_durations[label].append(duration)
+
+        trace_id = span.get("trace_id") or ""
+        bounds = self._trace_bounds.get(trace_id)
+        if bounds is None:
+            self._trace_bounds[trace_id] = [started_at, ended_at]
+        else:
+            bounds[0] = min(bounds[0], started_at)
+            bounds[1] = max(bounds[1], ended_at)
+
+        # The critical path through this span is the span itself, followed by the critical path
+        # through whichever child finished last (i.e. the child that gated this span's end).
+        _, child_path = self._pending_children.pop(span.get("id") or "", (0.0, ()))
+        path = (label, *child_path) if span_type in _CRITICAL_PATH_SPAN_TYPES else child_path
+
+        parent_id = span.get("parent_id")
+        if parent_id:
+            current = self._pending_children.get(parent_id)
+            if current is None or ended_at >= current[0]:
+                self._pending_children[parent_id] = (ended_at, path)
+        elif path:
+            workflow = self._workflow_by_trace.get(trace_id, "unknown")
+            self._critical_paths[workflow][path].append(duration)
+
+    def finish(self, top_paths: int) -> TraceAnalysis:
+        durations_by_workflow: defaultdict[str, array.array[float]] = defaultdict(
+            lambda: array.array("d")
+        )
+        for trace_id, (start, end) in self._trace_bounds.items():
+            workflow = self._workflow_by_trace.get(trace_id, "unknown")
+            durations_by_workflow[workflow].append(end - start)
+
+        self.result.workflow_latency = {
+            k: latency_stats(v) for k, v in sorted(durations_by_workflow.items())
+        }
+        self.result.span_type_latency = {
+            k: latency_stats(v) for k, v in sorted(self._type_durations.items())
+        }
+        self.result.span_name_latency = {
+            k: latency_stats(v) for k, v in sorted(self._name_durations.items())
+        }
+        for workflow, paths in sorted(self._critical_paths.items()):
+            ranked = sorted(paths.items(), key=lambda kv: (-len(kv[1]), -sum(kv[1])))
+            self.result.critical_paths[workflow] = [
+                CriticalPathStats(path=path, latency=latency_stats(durations))
+                for path, durations in ranked[:top_paths]
+            ]
+        return self.result
+
+
+def analyze_files(paths: Iterable[str | os.PathLike[str]], top_paths: int = 5) -> TraceAnalysis:
+    """Analyzes trace files written by `FileSpanExporter`.
+
+    Args:
+        paths: Trace files, or directories containing trace files.
+        top_paths: The number of most frequent critical paths to report per workflow.
+
+    Returns:
+        Latency percentiles per workflow, span type and span name; the most frequent critical
+        paths per workflow; and token totals from generation spans.
+    """
+    analyzer = _Analyzer()
+    for path in iter_trace_files(paths):
+        analyzer.result.files += 1
+        for line in iter_lines(path):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError:
+                analyzer.result.malformed_lines += 1
+                continue
+            if isinstance(item, dict):
+                analyzer.add(item)
+            else:
+                analyzer.result.malformed_lines += 1
+    return analyzer.finish(top_paths)
+
+
+def _format_latency_table(title: str, rows: dict[str, LatencyStats]) -> list[str]:
+    if not rows:
+        return []
+    width = max(len(title), *(len(k) for k in rows))
+    header = f"{title:<{width}}  {'count':>7}  {'mean':>8}" + "".join(
+        f"  {'p' + str(p):>8}" for p in PERCENTILES
+    )
+    lines = [header, "-" * len(header)]
+    for key, stats in rows.items():
+        lines.append(
+            f"{key:<{width}}  {stats.count:>7}  {stats.mean:>8.3f}"
+            + "".join(f"  {stats.percentiles[p]:>8.3f}" for p in PERCENTILES)
+        )
+    return lines + [""]
+
+
+def format_report(analysis: TraceAnalysis) -> str:
+    """Renders an analysis as a human readable report. Latencies are in seconds."""
+    lines = [
+        f"Files: {analysis.files}  Traces: {analysis.traces}  Spans: {analysis.spans}"
+        + (f"  Malformed lines: {analysis.malformed_lines}" if analysis.malformed_lines else ""),
+        "",
+    ]
+    lines += _format_latency_table("workflow", analysis.workflow_latency)
+    lines += _format_latency_table("span type", analysis.span_type_latency)
+    lines += _format_latency_table("span", analysis.span_name_latency)
+
+    for workflow, paths in analysis.critical_paths.items():
+        lines.append(f"Critical paths for {workflow}:")
+        for p in paths:
+            lines.append(
+                f"  {p.latency.count:>6}x  p50={p.latency.percentiles[50]:.3f}s  "
+                + " > ".join(p.path)
+            )
+        lines.append("")
+
+    if analysis.tokens_by_model:
+        lines.append("Tokens (from generation spans):")
+        for model, t in analysis.tokens_by_model.items():
+            lines.append(
+                f"  {model}: {t.generations} generations, {t.input_tokens} in, "
+                f"{t.output_tokens} out"
+            )
+        total = analysis.total_tokens
+        lines.append(f"  total: {total.input_tokens} in, {total.output_tokens} out")
+
+    return "\n".join(lines).rstrip() + "\n"
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m agents.tracing.analyze",
+        description="Analyze trace files written by FileSpanExporter.",
+    )
+    parser.add_argument("paths", nargs="+", help="Trace files or directories of trace files.")
+    parser.add_argument("--json", action="store_true", help="Print the analysis as JSON.")
+    parser.add_argument(
+        "--top-paths",
+        type=int,
+        default=5,
+        help="Number of critical paths to report per workflow.",
+    )
+    args = parser.parse_args(argv)
+
+    analysis = analyze_files(args.paths, top_paths=args.top_paths)
+    if args.json:
+        json.dump(analysis.to_dict(), sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    else:
+        sys.stdout.write(format_report(analysis))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,296 @@
+from __future__ import annotations
+
+import collections
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Literal
+
+from .logger import logger
+from .processor_interface import TracingProcessor
+from .processors import BatchTraceProcessor
+from .setup import SynchronousMultiTracingProcessor
+from .spans import Span
+from .traces import Trace
+
+OverflowPolicy = Literal["drop_newest", "drop_oldest", "block"]
+"""What to do when a processor's buffer is full:
+- `drop_newest`: discard the incoming event.
+- `drop_oldest`: evict the oldest buffered event to make room for the incoming one.
+- `block`: wait (up to `block_timeout`) for the worker to make room, then drop the event.
+"""
+
+
+@dataclass
+class DispatchStats:
+    """A point-in-time snapshot of the dispatch metrics for a single processor."""
+
+    processor: TracingProcessor
+    """The processor these metrics belong to."""
+
+    inline: bool
+    """Whether the processor is called inline on the caller's thread (i.e. it has no buffer)."""
+
+    enqueued: int = 0
+    """Total events accepted into the buffer."""
+
+    delivered: int = 0
+    """Total events handed to the processor."""
+
+    dropped: int = 0
+    """Total events dropped because the buffer was full."""
+
+    errors: int = 0
+    """Total events for which the processor raised an exception."""
+
+    queue_depth: int = 0
+    """The number of events currently waiting in the buffer."""
+
+    high_water_mark: int = 0
+    """The largest number of events that have been waiting in the buffer at once."""
+
+    last_lag: float = 0.0
+    """Seconds between enqueueing and delivering the most recently delivered event."""
+
+    max_lag: float = 0.0
+    """The largest lag, in seconds, observed for any delivered event."""
+
+    total_lag: float = 0.0
+    """The sum of all observed lags, in seconds. Divide by `delivered` for the mean lag."""
+
+
+class _ProcessorDispatcher:
+    """Owns a bounded ring buffer for one processor, and a worker thread that drains it."""
+
+    def __init__(
+        self,
+        processor: TracingProcessor,
+        max_buffer_size: int,
+        overflow_policy: OverflowPolicy,
+        block_timeout: float,
+    ):
+        self.processor = processor
+        self._overflow_policy = overflow_policy
+        self._block_timeout = block_timeout
+        self._max_buffer_size = max_buffer_size
+        self._buffer: collections.deque[tuple[float, Callable[[Any], None], Any]] = (
+            collections.deque()
+        )
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._shutdown = False
+        self._stats = DispatchStats(processor=processor, inline=False)
+
+        self._worker_thread = threading.Thread(
+            target=self._run, name=f"trace-dispatch-{type(processor).__name__}", daemon=True
+        )
+        self._worker_thread.start()
+
+    def submit(self, method: Callable[[Any], None], item: Any) -> None:
+        with self._cond:
+            if self._shutdown:
+                return
+
+            if len(self._buffer) >= self._max_buffer_size:
+                if self._overflow_policy == "drop_oldest":
+                    self._buffer.popleft()
+                    self._stats.dropped += 1
+                elif self._overflow_policy == "block":
+                    has_room = self._cond.wait_for(
+                        lambda: len(self._buffer) < self._max_buffer_size or self._shutdown,
+                        timeout=self._block_timeout,
+                    )
+                    if not has_room or self._shutdown:
+                        self._stats.dropped += 1
+                        return
+                else:
+                    self._stats.dropped += 1
+                    return
+
+            self._buffer.append((time.monotonic(), method, item))
+            self._stats.enqueued += 1
+            self._stats.high_water_mark = max(self._stats.high_water_mark, len(self._buffer))
+            self._cond.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._buffer or self._shutdown)
+                if not self._buffer:
+                    # Shutdown was requested and everything has been drained
+                    return
+                enqueued_at, method, item = self._buffer.popleft()
+                self._in_flight += 1
+                self._cond.notify_all()
+
+            lag = time.monotonic() - enqueued_at
+            try:
+                method(item)
+            except Exception as e:
+                logger.error(f"Error in trace processor {self.processor}: {e}")
+                with self._cond:
+                    self._stats.errors += 1
+
+            with self._cond:
+                self._in_flight -= 1
+                self._stats.delivered += 1
+                self._stats.last_lag = lag
+                self._stats.max_lag = max(self._stats.max_lag, lag)
+                self._stats.total_lag += lag
+                self._cond.notify_all()
+
+    def wait_until_drained(self, timeout: float | None = None) -> bool:
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not self._buffer and self._in_flight == 0, timeout=timeout
+            )
+
+    def stats(self) -> DispatchStats:
+        with self._cond:
+            self._stats.queue_depth = len(self._buffer)
+            return DispatchStats(**self._stats.__dict__)
+
+    def shutdown(self, timeout: float | None = None) -> None:
+        with self._cond:
+            self._shutdown = True
+            self._cond.notify_all()
+        self._worker_thread.join(timeout=timeout)
+
+
+class AsyncDispatchMultiTracingProcessor(SynchronousMultiTracingProcessor):
+    """
+    Forwards all calls to a list of TracingProcessors, like `SynchronousMultiTracingProcessor`,
+    but without running them on the caller's thread. Each processor gets its own bounded ring
+    buffer, drained by a dedicated worker thread, so a slow processor (e.g. one that writes to a
+    database) neither adds latency to the agent run nor delays the other processors.
+
+    Processors whose callbacks are already cheap (by default, `BatchTraceProcessor`, which only
+    enqueues) keep being called inline, since handing them off would cost more than calling them.
+
+    Note that spans are handed to the processors by reference. By the time a buffered
+    `on_span_start` is delivered, the span may already have finished.
+    """
+
+    def __init__(
+        self,
+        max_buffer_size: int = 2048,
+        overflow_policy: OverflowPolicy = "drop_oldest",
+        block_timeout: float = 0.1,
+        inline_processor_types: tuple[type[TracingProcessor], ...] = (BatchTraceProcessor,),
+    ):
+        """
+        Args:
+            max_buffer_size: The maximum number of events buffered per processor.
+            overflow_policy: What to do when a processor's buffer is full. See `OverflowPolicy`.
+            block_timeout: With the `block` policy, the maximum time (in seconds) to wait for room
+                in the buffer before dropping the event.
+            inline_processor_types: Processor types that are called inline instead of buffered.
+        """
+        super().__init__()
+        self._max_buffer_size = max_buffer_size
+        self._overflow_policy = overflow_policy
+        self._block_timeout = block_timeout
+        self._inline_processor_types = inline_processor_types
+        self._dispatchers: dict[int, _ProcessorDispatcher] = {}
+
+    def _dispatcher_for(self, processor: TracingProcessor) -> _ProcessorDispatcher | None:
+        if isinstance(processor, self._inline_processor_types):
+            return None
+
+        dispatcher = self._dispatchers.get(id(processor))
+        if dispatcher is None:
+            dispatcher = _ProcessorDispatcher(
+                processor,
+                max_buffer_size=self._max_buffer_size,
+                overflow_policy=self._overflow_policy,
+                block_timeout=self._block_timeout,
+            )
+            self._dispatchers[id(processor)] = dispatcher
+        return dispatcher
+
+    def add_tracing_processor(self, tracing_processor: TracingProcessor):
+        """
+        Add a processor to the list of processors. Each processor will receive all traces/spans.
+        """
+        with self._lock:
+            self._dispatcher_for(tracing_processor)
+            self._processors += (tracing_processor,)
+
+    def set_processors(self, processors: list[TracingProcessor]):
+        """
+        Set the list of processors. This will replace the current list of processors. Buffered
+        events for processors that are removed are still delivered before their worker stops.
+        """
+        with self._lock:
+            new_ids = {id(p) for p in processors}
+            removed = [d for key, d in self._dispatchers.items() if key not in new_ids]
+            self._dispatchers = {key: d for key, d in self._dispatchers.items() if key in new_ids}
+            for processor in processors:
+                self._dispatcher_for(processor)
+            self._processors = tuple(processors)
+
+        for dispatcher in removed:
+            dispatcher.shutdown(timeout=0)
+
+    def _dispatch(self, method_name: str, item: Trace | Span[Any]) -> None:
+        dispatchers = self._dispatchers
+        for processor in self._processors:
+            dispatcher = dispatchers.get(id(processor))
+            if dispatcher is None:
+                getattr(processor, method_name)(item)
+            else:
+                dispatcher.submit(getattr(processor, method_name), item)
+
+    def on_trace_start(self, trace: Trace) -> None:
+        """
+        Called when a trace is started.
+        """
+        self._dispatch("on_trace_start", trace)
+
+    def on_trace_end(self, trace: Trace) -> None:
+        """
+        Called when a trace is finished.
+        """
+        self._dispatch("on_trace_end", trace)
+
+    def on_span_start(self, span: Span[Any]) -> None:
+        """
+        Called when a span is started.
+        """
+        self._dispatch("on_span_start", span)
+
+    def on_span_end(self, span: Span[Any]) -> None:
+        """
+        Called when a span is finished.
+        """
+        self._dispatch("on_span_end", span)
+
+    def stats(self) -> list[DispatchStats]:
+        """
+        Returns a snapshot of the dispatch metrics for each processor, in order of registration.
+        """
+        dispatchers = self._dispatchers
+        result = []
+        for processor in self._processors:
+            dispatcher = dispatchers.get(id(processor))
+            if dispatcher is None:
+                result.append(DispatchStats(processor=processor, inline=True))
+            else:
+                result.append(dispatcher.stats())
+        return result
+
+    def shutdown(self) -> None:
+        """
+        Called when the application stops. Drains every buffer before shutting the processors down.
+        """
+        for dispatcher in list(self._dispatchers.values()):
+            dispatcher.shutdown()
+        super().shutdown()
+
+    def force_flush(self):
+        """
+        Waits for every buffer to drain, then forces the processors to flush their buffers.
+        """
+        for dispatcher in list(self._dispatchers.values()):
+            dispatcher.wait_until_drained()
+        super().force_flush()
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
+import gzip
+import json
 import os
 import queue
 import random
 import threading
 import time
-from typing import Any
+from datetime import datetime, timezone
+from typing import IO, Any, cast
 
 import httpx
 
@@ -26,6 +29,112 @@ class ConsoleSpanExporter(TracingExporter):
                 print(f"[Exporter] Export span: {item.export()}")
 
 
+class FileSpanExporter(TracingExporter):
+    """Writes traces and spans to local files as compact JSONL, one exported item per line. Useful
+    when traces must not leave the machine. The files can be analyzed offline with
+    `python -m agents.tracing.analyze`.
+
+    Files are named `<file_prefix>-<UTC timestamp>-<sequence>.jsonl` (with a `.gz` suffix if
+    compressed), and are rotated once they grow past `max_bytes` or get older than `max_age`.
+    """
+
+    def __init__(
+        self,
+        directory: str | os.PathLike[str],
+        file_prefix: str = "traces",
+        compress: bool = False,
+        max_bytes: int | None = 100 * 1024 * 1024,
+        max_age: float | None = 3600.0,
+    ):
+        """
+        Args:
+            directory: The directory to write files to. Created if it does not exist.
+            file_prefix: The prefix for file names.
+            compress: Whether to gzip-compress the files.
+            max_bytes: Rotate to a new file after this many bytes have been written to the current
+                one. For compressed files, this counts uncompressed bytes. None disables size-based
+                rotation.
+            max_age: Rotate to a new file once the current one is older than this many seconds.
+                None disables time-based rotation.
+        """
+        self.directory = os.fspath(directory)
+        self.file_prefix = file_prefix
+        self.compress = compress
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+
+        self._lock = threading.Lock()
+        self._file: IO[bytes] | None = None
+        self._current_path: str | None = None
+        self._bytes_written = 0
+        self._opened_at = 0.0
+        self._sequence = 0
+
+    @property
+    def current_path(self) -> str | None:
+        """The path of the file currently being written to, if any."""
+        return self._current_path
+
+    def export(self, items: list[Trace | Span[Any]]) -> None:
+        lines = []
+        for item in items:
+            exported = item.export()
+            if exported:
+                lines.append(json.dumps(exported, separators=(",", ":"), default=str))
+        if not lines:
+            return
+
+        data = ("\n".join(lines) + "\n").encode("utf-8")
+        with self._lock:
+            try:
+                file = self._file_for_write()
+                file.write(data)
+                if not self.compress:
+                    # Flushing a compressed file would reset the compression for every batch. Its
+                    # data is written as compression blocks fill up, and when it's closed.
+                    file.flush()
+                self._bytes_written += len(data)
+            except OSError as e:
+                logger.error(f"Failed to write {len(lines)} items to trace file: {e}")
+
+    def _file_for_write(self) -> IO[bytes]:
+        if self._file is not None and not self._should_rotate():
+            return self._file
+
+        self._close_file()
+        os.makedirs(self.directory, exist_ok=True)
+        timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        self._sequence += 1
+        suffix = ".jsonl.gz" if self.compress else ".jsonl"
+        path = os.path.join(
+            self.directory, f"{self.file_prefix}-{timestamp}-{self._sequence:04d}{suffix}"
+        )
+        file = cast(IO[bytes], gzip.open(path, "ab") if self.compress else open(path, "ab"))
+        self._file = file
+        self._current_path = path
+        self._bytes_written = 0
+        self._opened_at = time.monotonic()
+        logger.debug(f"Writing traces to {path}")
+        return file
+
+    def _should_rotate(self) -> bool:
+        if self.max_bytes is not None and self._bytes_written >= self.max_bytes:
+            return True
+        if self.max_age is not None and time.monotonic() - self._opened_at >= self.max_age:
+            return True
+        return False
+
+    def _close_file(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self):
+        """Close the file currently being written to."""
+        with self._lock:
+            self._close_file()
+
+
 class BackendSpanExporter(TracingExporter):
     def __init__(
         self,
@@ -193,6 +302,10 @@ class BatchTraceProcessor(TracingProcessor):
         """
         self._shutdown_event.set()
         self._worker_thread.join(timeout=timeout)
+        close = getattr(self._exporter, "close", None)
+        if callable(close) and not self._worker_thread.is_alive():
+            # Everything has been exported, so e.g. a compressed trace file can be finished
+            close()
 
     def force_flush(self):
         """
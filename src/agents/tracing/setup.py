@@ -100,6 +100,23 @@ class TraceProvider:
         """
         self._multi_processor.set_processors(processors)
 
+    def set_multi_processor(self, multi_processor: SynchronousMultiTracingProcessor):
+        """
+        Replace the processor that fans traces/spans out to the registered processors, e.g. with an
+        `AsyncDispatchMultiTracingProcessor`. The currently registered processors are carried over.
+
+        The previous processor is detached rather than shut down, since its processors are now
+        shared with the new one: events it has already buffered are still delivered, and then its
+        worker threads (if any) stop. Traces and spans created before this call that are still open
+        stop being processed, so call this before starting any traces.
+        """
+        previous = self._multi_processor
+        if multi_processor is previous:
+            return
+        multi_processor.set_processors(list(previous._processors))
+        self._multi_processor = multi_processor
+        previous.set_processors([])
+
     def get_current_trace(self) -> Trace | None:
         """
         Returns the currently active trace, if any.
@@ -49,24 +49,35 @@ class AgentSpanData(SpanData):
 
 
 class FunctionSpanData(SpanData):
-    __slots__ = ("name", "input", "output")
+    __slots__ = ("name", "input", "output", "policy")
 
-    def __init__(self, name: str, input: str | None, output: str | None):
+    def __init__(
+        self,
+        name: str,
+        input: str | None,
+        output: str | None,
+        policy: dict[str, Any] | None = None,
+    ):
         self.name = name
         self.input = input
         self.output = output
+        self.policy = policy
 
     @property
     def type(self) -> str:
         return "function"
 
     def export(self) -> dict[str, Any]:
-        return {
+        exported: dict[str, Any] = {
             "type": self.type,
             "name": self.name,
             "input": self.input,
             "output": self.output,
         }
+        # Only tools with a `ToolPolicy` have policy decisions
+        if self.policy is not None:
+            exported["policy"] = self.policy
+        return exported
 
 
 class GenerationSpanData(SpanData):
@@ -15,8 +15,15 @@ class Usage:
     total_tokens: int = 0
     """Total tokens sent and received, across all requests."""
 
+    cancelled_requests: int = 0
+    """Requests that were cancelled before the model finished responding, e.g. because a streamed
+    run was cancelled. They're included in `requests`, but their tokens aren't known, so they're not
+    included in the token counts.
+    """
+
     def add(self, other: "Usage") -> None:
         self.requests += other.requests if other.requests else 0
         self.input_tokens += other.input_tokens if other.input_tokens else 0
         self.output_tokens += other.output_tokens if other.output_tokens else 0
         self.total_tokens += other.total_tokens if other.total_tokens else 0
+        self.cancelled_requests += other.cancelled_requests if other.cancelled_requests else 0
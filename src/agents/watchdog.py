@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import asyncio
+import collections
+import contextlib
+import sys
+import threading
+import time
+import traceback
+from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import Any
+
+from .logger import logger
+from .metrics import AgentMetrics
+from .tracing import Span, SpanError, get_current_span
+
+# The synchronous user code (e.g. a sync tool) currently running on each watched event loop
+# thread, as (name, span). Only populated for threads that have a running watchdog.
+_watched_threads: set[int] = set()
+_culprits: dict[int, tuple[str, Span[Any] | None]] = {}
+
+
+@contextlib.contextmanager
+def blocking_call(name: str) -> Iterator[None]:
+    """Marks the body as synchronous user code that runs on the event loop, such as a sync tool or
+    guardrail function. If it stalls the loop, the watchdog reports it under `name`, and attaches
+    the error to the span that is current when the body starts. Does nothing if no watchdog is
+    watching the current thread.
+    """
+    ident = threading.get_ident()
+    if ident not in _watched_threads:
+        yield
+        return
+
+    previous = _culprits.get(ident)
+    _culprits[ident] = (name, get_current_span())
+    try:
+        yield
+    finally:
+        if previous is None:
+            _culprits.pop(ident, None)
+        else:
+            _culprits[ident] = previous
+
+
+@dataclass
+class StallReport:
+    """An occurrence of the event loop being blocked for longer than the watchdog's threshold."""
+
+    culprit: str
+    """The name of the code that blocked the loop: the name passed to `blocking_call()` (e.g. the
+    tool name) if available, otherwise the innermost function on the stack."""
+
+    blocked_for: float
+    """How long the loop was blocked, in seconds."""
+
+    stack: str
+    """The stack of the event loop thread, captured once the threshold was passed."""
+
+    span: Span[Any] | None
+    """The span the stall was attached to, if any."""
+
+
+class EventLoopWatchdog:
+    """
+    Detects code that blocks the event loop, such as sync tools, sync `instructions` callables,
+    sync guardrail functions or sync `Computer` implementations.
+
+    A helper thread repeatedly schedules a callback on the loop and measures how late it runs. Every
+    measurement goes into the `agents_event_loop_lag_seconds` histogram. If the loop is blocked for
+    longer than `threshold`, the watchdog captures the stack of the loop thread while it is still
+    blocked, logs it, and attaches it as a span error to the current span (e.g. the function span of
+    a sync tool).
+
+    Usage:
+    ```python
+    async with EventLoopWatchdog(threshold=0.1) as watchdog:
+        await Runner.run(agent, "Hello")
+    print(watchdog.stalls)
+    ```
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.1,
+        interval: float = 0.05,
+        metrics: AgentMetrics | None = None,
+        max_reports: int = 100,
+    ):
+        """
+        Args:
+            threshold: How long (in seconds) the loop must be blocked before it's reported.
+            interval: How often (in seconds) to measure the loop lag.
+            metrics: The metrics to record the lag and stalls into. If not provided, a new
+                `AgentMetrics` is created; it's available as `watchdog.metrics`.
+            max_reports: The maximum number of recent stalls kept in `stalls`.
+        """
+        self.threshold = threshold
+        self.interval = interval
+        self.metrics = metrics or AgentMetrics()
+        self.stalls: collections.deque[StallReport] = collections.deque(maxlen=max_reports)
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id: int | None = None
+        self._thread: threading.Thread | None = None
+        self._stop_event = threading.Event()
+
+    def start(self) -> None:
+        """Starts watching the running event loop. Must be called from the loop's thread."""
+        if self._thread is not None:
+            return
+
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._stop_event.clear()
+        _watched_threads.add(self._loop_thread_id)
+
+        self._thread = threading.Thread(
+            target=self._run, name="agents-event-loop-watchdog", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops watching the event loop."""
+        if self._thread is None:
+            return
+
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        if self._loop_thread_id is not None:
+            _watched_threads.discard(self._loop_thread_id)
+            _culprits.pop(self._loop_thread_id, None)
+
+    async def __aenter__(self) -> EventLoopWatchdog:
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+    def _run(self) -> None:
+        loop = self._loop
+        assert loop is not None
+
+        while not self._stop_event.is_set():
+            ran = threading.Event()
+            sent_at = time.monotonic()
+            try:
+                loop.call_soon_threadsafe(ran.set)
+            except RuntimeError:
+                # The loop was closed
+                return
+
+            report: StallReport | None = None
+            while not ran.wait(timeout=min(self.interval, self.threshold)):
+                if self._stop_event.is_set():
+                    return
+                if report is None and time.monotonic() - sent_at >= self.threshold:
+                    report = self._report_stall(time.monotonic() - sent_at)
+
+            lag = time.monotonic() - sent_at
+            self.metrics.record_event_loop_lag(lag)
+            if report is not None:
+                report.blocked_for = lag
+                self.stalls.append(report)
+                logger.warning(
+                    f"Event loop was blocked for {lag:.3f}s by {report.culprit}:\n{report.stack}"
+                )
+
+            self._stop_event.wait(self.interval)
+
+    def _report_stall(self, blocked_for: float) -> StallReport:
+        # The loop thread is blocked, so the stack and the current culprit are stable
+        frame = sys._current_frames().get(self._loop_thread_id or 0)
+        stack = "".join(traceback.format_stack(frame)) if frame else ""
+
+        name, span = _culprits.get(self._loop_thread_id or 0, (None, None))
+        # Unmarked culprits are named after the blocking frame, which would give the metric a
+        # label value per line of code, so they share a single label
+        metric_label = name or "unmarked"
+        if name is None:
+            name = _innermost_function(frame)
+
+        if span is not None:
+            span.set_error(
+                SpanError(
+                    message=f"Event loop blocked by {name}",
+                    data={
+                        "culprit": name,
+                        "threshold": self.threshold,
+                        "blocked_for": blocked_for,
+                        "stack": stack,
+                    },
+                )
+            )
+
+        self.metrics.record_event_loop_stall(metric_label)
+        return StallReport(culprit=name, blocked_for=blocked_for, stack=stack, span=span)
+
+
+def _innermost_function(frame: Any) -> str:
+    if frame is None:
+        return "unknown"
+    code = frame.f_code
+    return f"{code.co_name} ({code.co_filename}:{frame.f_lineno})"
@@ -0,0 +1,109 @@
+"""Benchmarks `OpenAIChatCompletionsModel.stream_response` on long outputs, to check that the time
+per token stays flat as outputs grow.
+
+Run with `python -m tests.benchmarks.bench_chatcompletions_stream`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import AsyncIterator
+from typing import Any
+
+from openai import AsyncOpenAI
+from openai.types.chat.chat_completion_chunk import (
+    ChatCompletionChunk,
+    Choice,
+    ChoiceDelta,
+    ChoiceDeltaToolCall,
+    ChoiceDeltaToolCallFunction,
+)
+from openai.types.responses import Response
+
+from agents.model_settings import ModelSettings
+from agents.models.interface import ModelTracing
+from agents.models.openai_chatcompletions import OpenAIChatCompletionsModel
+
+TOKEN_COUNTS = [1_000, 10_000, 50_000]
+
+
+def text_chunks(tokens: int) -> list[ChatCompletionChunk]:
+    return [_chunk(ChoiceDelta(content=f"t{i} ")) for i in range(tokens)]
+
+
+def tool_call_chunks(tokens: int) -> list[ChatCompletionChunk]:
+    first = ChoiceDeltaToolCall(
+        index=0,
+        id="call_1",
+        function=ChoiceDeltaToolCallFunction(name="write_file", arguments='{"text": "'),
+        type="function",
+    )
+    rest = [
+        ChoiceDeltaToolCall(
+            index=0, function=ChoiceDeltaToolCallFunction(arguments=f"t{i} "), type="function"
+        )
+        for i in range(tokens)
+    ]
+    return [_chunk(ChoiceDelta(tool_calls=[delta])) for delta in [first, *rest]]
+
+
+def _chunk(delta: ChoiceDelta) -> ChatCompletionChunk:
+    return ChatCompletionChunk(
+        id="chunk-id",
+        created=1,
+        model="fake",
+        object="chat.completion.chunk",
+        choices=[Choice(index=0, delta=delta)],
+    )
+
+
+class ReplayModel(OpenAIChatCompletionsModel):
+    def __init__(self, chunks: list[ChatCompletionChunk]):
+        super().__init__(model="gpt-4o", openai_client=AsyncOpenAI(api_key="fake"))
+        self.chunks = chunks
+
+    async def _fetch_response(self, *args: Any, **kwargs: Any) -> Any:
+        async def stream() -> AsyncIterator[ChatCompletionChunk]:
+            for chunk in self.chunks:
+                yield chunk
+
+        response = Response(
+            id="resp-id",
+            created_at=0,
+            model="fake-model",
+            object="response",
+            output=[],
+            tool_choice="none",
+            tools=[],
+            parallel_tool_calls=False,
+        )
+        return response, stream()
+
+
+async def time_stream(chunks: list[ChatCompletionChunk]) -> float:
+    model = ReplayModel(chunks)
+    started_at = time.perf_counter()
+    async for _ in model.stream_response(
+        system_instructions=None,
+        input="",
+        model_settings=ModelSettings(),
+        tools=[],
+        output_schema=None,
+        handoffs=[],
+        tracing=ModelTracing.DISABLED,
+    ):
+        pass
+    return time.perf_counter() - started_at
+
+
+async def main() -> None:
+    print(f"{'output':<12}{'tokens':>8}{'total (ms)':>14}{'per token (us)':>16}")
+    for name, make_chunks in [("text", text_chunks), ("tool call", tool_call_chunks)]:
+        for tokens in TOKEN_COUNTS:
+            duration = min([await time_stream(make_chunks(tokens)) for _ in range(3)])
+            print(f"{name:<12}{tokens:>8}{duration * 1000:>14.1f}{duration / tokens * 1e6:>16.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,94 @@
+"""Benchmarks the number of calls per second that `function_tool` tools can handle, for a few
+kinds of tools, so that the overhead of validating inputs and converting outputs stays low.
+
+Run with `python -m tests.benchmarks.bench_function_tool`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from pydantic import BaseModel
+
+from agents import FunctionTool, RunContextWrapper, function_tool
+
+CALLS = 20_000
+
+
+class Address(BaseModel):
+    street: str
+    city: str
+    zip_code: str
+
+
+@dataclass
+class Order:
+    id: int
+    items: list[str]
+    total: float
+
+
+@function_tool
+def no_args() -> str:
+    return "ok"
+
+
+@function_tool
+def simple_args(a: int, b: int, name: str = "x") -> int:
+    return a + b
+
+
+@function_tool
+async def async_args(a: int, b: int) -> int:
+    return a + b
+
+
+@function_tool
+def nested_model(address: Address, tags: list[str]) -> str:
+    return address.city
+
+
+@function_tool
+def returns_model(city: str) -> Address:
+    return Address(street="1 Main St", city=city, zip_code="12345")
+
+
+@function_tool
+def returns_dataclass(id: int) -> Order:
+    return Order(id=id, items=["a", "b", "c"], total=12.5)
+
+
+TOOLS: list[tuple[FunctionTool, dict[str, Any]]] = [
+    (no_args, {}),
+    (simple_args, {"a": 1, "b": 2}),
+    (async_args, {"a": 1, "b": 2}),
+    (
+        nested_model,
+        {"address": {"street": "1 Main St", "city": "Paris", "zip_code": "75001"}, "tags": ["a"]},
+    ),
+    (returns_model, {"city": "Paris"}),
+    (returns_dataclass, {"id": 1}),
+]
+
+
+async def calls_per_second(tool: FunctionTool, input: str) -> float:
+    ctx = RunContextWrapper(None)
+    started_at = time.perf_counter()
+    for _ in range(CALLS):
+        await tool.on_invoke_tool(ctx, input)
+    return CALLS / (time.perf_counter() - started_at)
+
+
+async def main() -> None:
+    print(f"{'tool':<20}{'calls/s':>12}{'per call (us)':>16}")
+    for tool, args in TOOLS:
+        rate = max([await calls_per_second(tool, json.dumps(args)) for _ in range(3)])
+        print(f"{tool.name:<20}{rate:>12,.0f}{1e6 / rate:>16.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
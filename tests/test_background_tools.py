@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import asyncio
+import gc
+import json
+from typing import Any
+
+import pytest
+
+from agents import (
+    Agent,
+    MaxTurnsExceeded,
+    RunItemStreamEvent,
+    Runner,
+    ToolCallItem,
+    ToolCallOutputItem,
+    function_tool,
+)
+
+from .fake_model import FakeModel
+from .test_responses import get_function_tool_call, get_text_message
+
+
+class RecordingModel(FakeModel):
+    def __init__(self) -> None:
+        super().__init__()
+        self.inputs: list[Any] = []
+        self.tool_names: list[list[str]] = []
+
+    async def get_response(self, *args, **kwargs):
+        self.inputs.append(kwargs["input"])
+        self.tool_names.append([tool.name for tool in kwargs["tools"]])
+        return await super().get_response(*args, **kwargs)
+
+
+def function_call_outputs(items: list[Any]) -> dict[str, str]:
+    return {
+        item["call_id"]: item["output"]
+        for item in items
+        if isinstance(item, dict) and item.get("type") == "function_call_output"
+    }
+
+
+@pytest.mark.asyncio
+async def test_background_output_is_added_before_the_run_ends():
+    release = asyncio.Event()
+
+    @function_tool(background=True)
+    async def generate_report() -> str:
+        await release.wait()
+        return "the report"
+
+    model = RecordingModel()
+    model.add_multiple_turn_outputs(
+        [
+            [get_function_tool_call("generate_report", "{}")],
+            # The model carries on while the report is generated
+            [get_text_message("working on it")],
+            [get_text_message("here's the report")],
+        ]
+    )
+    agent = Agent(name="test", model=model, tools=[generate_report])
+
+    run = asyncio.create_task(Runner.run(agent, input="report please"))
+
+    async def second_request() -> None:
+        while len(model.inputs) < 2 and not run.done():
+            await asyncio.sleep(0)
+
+    await asyncio.wait_for(second_request(), 1)
+    assert not run.done()
+    release.set()
+    result = await run
+
+    assert result.final_output == "here's the report"
+    assert len(model.inputs) == 3
+    assert "await_background_tool" in model.tool_names[0]
+
+    outputs = function_call_outputs(model.inputs[2])
+    assert "running in the background" in outputs["2"]
+    assert outputs["2_result"] == "the report"
+    injected_call = next(
+        item for item in model.inputs[2] if item.get("call_id") == "2_result" and "name" in item
+    )
+    assert injected_call["name"] == "await_background_tool"
+    assert json.loads(injected_call["arguments"]) == {"handle": "2"}
+    assert "id" not in injected_call
+
+    tool_calls = [item for item in result.new_items if isinstance(item, ToolCallItem)]
+    assert [item.raw_item.name for item in tool_calls] == [  # type: ignore[union-attr]
+        "generate_report",
+        "await_background_tool",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_model_can_wait_for_a_background_output():
+    @function_tool(background=True)
+    async def generate_report() -> str:
+        await asyncio.sleep(0.01)
+        return "the report"
+
+    model = RecordingModel()
+    model.add_multiple_turn_outputs(
+        [
+            [get_function_tool_call("generate_report", "{}")],
+            [get_function_tool_call("await_background_tool", json.dumps({"handle": "2"}))],
+            [get_text_message("done")],
+        ]
+    )
+    agent = Agent(name="test", model=model, tools=[generate_report])
+    result = await Runner.run(agent, input="report please")
+
+    assert result.final_output == "done"
+    outputs = [item.output for item in result.new_items if isinstance(item, ToolCallOutputItem)]
+    # The output is delivered once, by the await tool, and not added again
+    assert outputs[1:] == ["the report"]
+    assert len(model.inputs) == 3
+
+
+@pytest.mark.asyncio
+async def test_running_background_tools_are_cancelled_when_the_run_fails():
+    cancelled = asyncio.Event()
+
+    @function_tool(background=True)
+    async def generate_report() -> str:
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return "never"
+
+    model = FakeModel()
+    model.add_multiple_turn_outputs(
+        [
+            [get_function_tool_call("generate_report", "{}")],
+            [get_function_tool_call("generate_report", "{}")],
+        ]
+    )
+    agent = Agent(name="test", model=model, tools=[generate_report])
+    with pytest.raises(MaxTurnsExceeded):
+        await Runner.run(agent, input="report please", max_turns=2)
+    await asyncio.wait_for(cancelled.wait(), 1)
+
+
+@pytest.mark.asyncio
+async def test_errors_of_undelivered_background_tools_are_retrieved():
+    second_turn = asyncio.Event()
+    tool_failed = asyncio.Event()
+
+    @function_tool(background=True, failure_error_function=None)
+    async def generate_report() -> str:
+        await second_turn.wait()
+        tool_failed.set()
+        raise ValueError("no report")
+
+    class FailingModel(FakeModel):
+        calls = 0
+
+        async def get_response(self, *args, **kwargs):
+            self.calls += 1
+            if self.calls == 2:
+                # The run fails after the tool, before its error is delivered
+                second_turn.set()
+                await tool_failed.wait()
+                # Lets the tool's task finish, once the tool has raised
+                await asyncio.sleep(0.01)
+            return await super().get_response(*args, **kwargs)
+
+    loop = asyncio.get_running_loop()
+    errors: list[dict[str, Any]] = []
+    previous_handler = loop.get_exception_handler()
+    loop.set_exception_handler(lambda _, context: errors.append(context))
+    try:
+        model = FailingModel()
+        model.add_multiple_turn_outputs(
+            [[get_function_tool_call("generate_report", "{}")], RuntimeError("model failed")]
+        )
+        agent = Agent(name="test", model=model, tools=[generate_report])
+        raised = None
+        try:
+            await Runner.run(agent, input="report please")
+        except RuntimeError as e:
+            raised = str(e)
+        assert raised == "model failed"
+        del agent, generate_report
+        gc.collect()
+    finally:
+        loop.set_exception_handler(previous_handler)
+    assert errors == []
+
+
+@pytest.mark.asyncio
+async def test_background_outputs_are_streamed():
+    @function_tool(background=True)
+    async def generate_report() -> str:
+        return "the report"
+
+    model = FakeModel()
+    model.add_multiple_turn_outputs(
+        [
+            [get_function_tool_call("generate_report", "{}")],
+            [get_text_message("done")],
+        ]
+    )
+    agent = Agent(name="test", model=model, tools=[generate_report])
+    result = Runner.run_streamed(agent, input="report please")
+    outputs = [
+        event.item.output
+        async for event in result.stream_events()
+        if isinstance(event, RunItemStreamEvent) and isinstance(event.item, ToolCallOutputItem)
+    ]
+    assert "running in the background" in outputs[0]
+    assert outputs[1] == "the report"
+    assert result.final_output == "done"
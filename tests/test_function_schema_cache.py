@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import pytest
+from pydantic import BaseModel
+
+from agents import (
+    RunContextWrapper,
+    _schema_cache,
+    function_schema as function_schema_module,
+    function_tool,
+    set_function_schema_cache_dir,
+)
+from agents.function_schema import function_schema
+
+
+class Location(BaseModel):
+    """A location on Earth."""
+
+    lat: float
+    long: float
+
+
+def get_weather(location: Location, days: int = 3) -> str:
+    """Get the weather for a location.
+
+    Args:
+        location: Where to get the weather for.
+        days: How many days to forecast.
+    """
+    return f"{location.lat},{location.long} for {days} days"
+
+
+@dataclass
+class Forecast:
+    days: int
+    hours: list[int] = field(default_factory=list)
+    metric: bool = True
+
+
+@pytest.fixture
+def cache_dir(tmp_path: Path) -> Iterator[Path]:
+    set_function_schema_cache_dir(tmp_path)
+    try:
+        yield tmp_path
+    finally:
+        set_function_schema_cache_dir(None)
+
+
+def test_disabled_by_default(tmp_path: Path):
+    assert _schema_cache.get_cache_dir() is None
+    function_schema(get_weather)
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_cached_schemas_skip_docstring_parsing_and_schema_generation(
+    cache_dir: Path, monkeypatch: pytest.MonkeyPatch
+):
+    expected = function_schema(get_weather)
+    assert len(list(cache_dir.glob("*.json"))) == 1
+
+    def fail(*args, **kwargs):
+        raise AssertionError("should use the cache")
+
+    monkeypatch.setattr(function_schema_module, "generate_func_documentation", fail)
+    monkeypatch.setattr(function_schema_module, "ensure_strict_json_schema", fail)
+
+    cached = function_schema(get_weather)
+    assert cached.params_json_schema == expected.params_json_schema
+    assert cached.description == expected.description == "Get the weather for a location."
+    assert cached.takes_context is False
+
+    # The model is still built for validating inputs
+    tool = function_tool(get_weather)
+    assert tool.params_json_schema == expected.params_json_schema
+    result = await tool.on_invoke_tool(
+        RunContextWrapper(None), json.dumps({"location": {"lat": 1, "long": 2}})
+    )
+    assert result == "1.0,2.0 for 3 days"
+
+
+def test_options_are_part_of_the_key(cache_dir: Path):
+    strict = function_schema(get_weather)
+    not_strict = function_schema(get_weather, strict_json_schema=False)
+    renamed = function_schema(get_weather, name_override="weather")
+    no_docstring = function_schema(get_weather, use_docstring_info=False)
+    assert len(list(cache_dir.glob("*.json"))) == 4
+
+    assert strict.params_json_schema["additionalProperties"] is False
+    assert "additionalProperties" not in not_strict.params_json_schema
+    assert renamed.name == "weather"
+    assert no_docstring.description is None
+    assert function_schema(get_weather, strict_json_schema=False).params_json_schema == (
+        not_strict.params_json_schema
+    )
+
+
+def test_referenced_types_are_part_of_the_key(cache_dir: Path):
+    class Point(BaseModel):
+        x: int
+
+    class ChangedPoint(BaseModel):
+        x: int
+        y: int
+
+    ChangedPoint.__qualname__ = Point.__qualname__
+    options = (None, None, None, True, True)
+    key = _schema_cache.cache_key(get_weather, {"point": Point}, options)
+    assert key == _schema_cache.cache_key(get_weather, {"point": Point}, options)
+    assert key != _schema_cache.cache_key(get_weather, {"point": ChangedPoint}, options)
+    assert key != _schema_cache.cache_key(get_weather, {"point": list[Point]}, options)
+
+
+def test_keys_of_dataclass_parameters_are_the_same_in_every_process(cache_dir: Path):
+    options = (None, None, None, True, True)
+    key = _schema_cache.cache_key(get_weather, {"forecast": Forecast}, options)
+
+    code = (
+        "from agents import _schema_cache\n"
+        "from tests.test_function_schema_cache import Forecast, get_weather\n"
+        f"_schema_cache.set_cache_dir({str(cache_dir)!r})\n"
+        f"print(_schema_cache.cache_key(get_weather, {{'forecast': Forecast}}, {options!r}))"
+    )
+    repo = Path(__file__).parent.parent
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([str(repo / "src"), str(repo)])}
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=repo, env=env, capture_output=True, text=True, check=True
+    )
+    assert output.stdout.strip() == key
+
+
+def test_unreadable_entries_are_regenerated(cache_dir: Path):
+    expected = function_schema(get_weather)
+    [entry] = cache_dir.glob("*.json")
+    entry.write_text("{not json")
+
+    assert function_schema(get_weather).params_json_schema == expected.params_json_schema
+    assert json.loads(entry.read_text())["params_json_schema"] == expected.params_json_schema
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from typing import Any
+
+import pytest
+from pydantic import BaseModel
+
+from agents import ModelBehaviorError, RunContextWrapper, function_tool
+from agents.function_schema import function_schema
+
+
+def mixed_params(a: int, b: str, *args: int, c: bool = False, **kwargs: str) -> str:
+    return f"{a} {b} {args} {c} {kwargs}"
+
+
+def test_call_plan_passes_each_kind_of_parameter():
+    schema = function_schema(mixed_params)
+    parsed = schema.params_pydantic_model.model_validate_json(
+        json.dumps({"a": 1, "b": "x", "args": [2, 3], "c": True, "kwargs": {"d": "y"}})
+    )
+    assert schema.to_call_args(parsed) == ([1, "x", 2, 3], {"c": True, "d": "y"})
+
+
+def test_call_plan_skips_context():
+    def with_context(ctx: RunContextWrapper[Any], a: int, *, b: int = 2) -> int:
+        return a + b
+
+    schema = function_schema(with_context)
+    parsed = schema.params_pydantic_model(a=1)
+    assert schema.to_call_args(parsed) == ([1], {"b": 2})
+
+
+@pytest.mark.asyncio
+async def test_invalid_input_raises_model_behavior_error():
+    tool = function_tool(mixed_params, failure_error_function=None)
+    ctx = RunContextWrapper(None)
+
+    with pytest.raises(ModelBehaviorError, match="Invalid JSON input for tool mixed_params: {a"):
+        await tool.on_invoke_tool(ctx, "{a")
+    # Valid JSON that isn't an object, and objects that don't match the parameters
+    for input in ["[1, 2]", '{"a": "not a number", "b": "x"}']:
+        with pytest.raises(ModelBehaviorError, match="Invalid JSON input for tool mixed_params"):
+            await tool.on_invoke_tool(ctx, input)
+
+    assert await tool.on_invoke_tool(ctx, '{"a": 1, "b": "x"}') == "1 x () False {}"
+
+
+class Weather(BaseModel):
+    city: str
+    temperature: float
+
+
+@dataclass
+class Forecast:
+    days: list[Weather]
+
+
+@dataclass
+class Opaque:
+    value: object
+
+
+@pytest.mark.asyncio
+async def test_models_and_dataclasses_are_returned_as_json():
+    @function_tool
+    def get_weather(city: str) -> Weather:
+        return Weather(city=city, temperature=21.5)
+
+    @function_tool
+    async def get_forecast(city: str) -> Forecast:
+        return Forecast(days=[Weather(city=city, temperature=20)])
+
+    @function_tool
+    def get_opaque() -> Opaque:
+        return Opaque(value=object)
+
+    ctx = RunContextWrapper(None)
+    result = await get_weather.on_invoke_tool(ctx, '{"city": "Paris"}')
+    assert json.loads(result) == {"city": "Paris", "temperature": 21.5}
+
+    result = await get_forecast.on_invoke_tool(ctx, '{"city": "Paris"}')
+    assert json.loads(result) == {"days": [{"city": "Paris", "temperature": 20.0}]}
+
+    # Values that can't be serialized to JSON fall back to `str()`
+    result = await get_opaque.on_invoke_tool(ctx, "")
+    assert result == str(Opaque(value=object))
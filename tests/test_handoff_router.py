@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import json
+from typing import Any
+
+import pytest
+from pydantic import BaseModel
+
+from agents import (
+    Agent,
+    HandoffInputData,
+    HandoffRouter,
+    ModelBehaviorError,
+    RunContextWrapper,
+    Runner,
+    handoff,
+)
+from agents.handoff_router import route_handoffs
+
+from .fake_model import FakeModel
+from .test_responses import get_function_tool_call, get_text_message
+
+
+class Address(BaseModel):
+    city: str
+
+
+class Refund(BaseModel):
+    order_id: str
+    address: Address
+
+
+def remove_new_items(data: HandoffInputData) -> HandoffInputData:
+    return HandoffInputData(input_history=data.input_history, pre_handoff_items=(), new_items=())
+
+
+class RecordingModel(FakeModel):
+    def __init__(self) -> None:
+        super().__init__()
+        self.handoff_names: list[list[str]] = []
+
+    async def get_response(self, *args, **kwargs):
+        self.handoff_names.append([handoff.tool_name for handoff in kwargs["handoffs"]])
+        return await super().get_response(*args, **kwargs)
+
+
+def specialists(model: FakeModel, count: int = 10) -> list[Agent[Any]]:
+    return [
+        Agent(
+            name=f"specialist_{i}",
+            handoff_description=f"Handles questions about topic {i}.",
+            model=model,
+        )
+        for i in range(count)
+    ]
+
+
+def route(target: str, input: Any = None) -> Any:
+    return get_function_tool_call(
+        "transfer_to_agent", json.dumps({"target": target, "input": input})
+    )
+
+
+def test_routing_tool_lists_targets_and_saves_tokens():
+    agents = specialists(FakeModel())
+    router = HandoffRouter([handoff(agent) for agent in agents])
+
+    target = router.handoff.input_json_schema["properties"]["target"]
+    assert target["enum"] == [f"specialist_{i}" for i in range(10)]
+    assert "- specialist_3: Handles questions about topic 3." in target["description"]
+    assert "Handoff to the" not in target["description"]
+    assert "input" not in router.handoff.input_json_schema["properties"]
+    assert router.saved_tokens > 0
+    assert router.saved_tokens == (router.original_size - router.collapsed_size) // 4
+
+
+def test_input_schemas_are_merged_with_their_definitions():
+    def on_refund(ctx: RunContextWrapper[Any], refund: Refund) -> None:
+        pass
+
+    refunds = Agent(name="refunds")
+    router = HandoffRouter(
+        [handoff(Agent(name="faq")), handoff(refunds, on_handoff=on_refund, input_type=Refund)]
+    )
+    schema = router.handoff.input_json_schema
+    assert schema["required"] == ["target", "input"]
+    assert list(schema["$defs"]) == ["refunds.Address"]
+    refund_schema, null_schema = schema["properties"]["input"]["anyOf"]
+    assert refund_schema["properties"]["address"] == {"$ref": "#/$defs/refunds.Address"}
+    assert null_schema == {"type": "null"}
+    assert "Takes an input" in schema["properties"]["target"]["description"]
+
+
+def test_routers_are_memoized_per_agent_and_handoffs():
+    triage = Agent(name="triage", handoffs=[*specialists(FakeModel())], collapse_handoffs=True)
+    router = route_handoffs(triage, Runner._get_handoffs(triage))
+    # The handoffs for agents are created anew each turn, but the router is reused
+    assert route_handoffs(triage, Runner._get_handoffs(triage)) is router
+
+    triage.handoffs.append(Agent(name="another"))
+    new_router = route_handoffs(triage, Runner._get_handoffs(triage))
+    assert new_router is not router
+    assert "another" in new_router.targets
+
+
+@pytest.mark.asyncio
+async def test_routed_handoff_runs_with_input_and_input_filter():
+    received: list[Refund] = []
+
+    def on_refund(ctx: RunContextWrapper[Any], refund: Refund) -> None:
+        received.append(refund)
+
+    model = RecordingModel()
+    refunds = Agent(name="refunds", model=model)
+    triage = Agent(
+        name="triage",
+        model=model,
+        handoffs=[
+            *specialists(model),
+            handoff(
+                refunds,
+                on_handoff=on_refund,
+                input_type=Refund,
+                input_filter=remove_new_items,
+            ),
+        ],
+        collapse_handoffs=True,
+    )
+    model.add_multiple_turn_outputs(
+        [
+            [route("refunds", {"order_id": "42", "address": {"city": "Paris"}})],
+            [get_text_message("refunded")],
+        ]
+    )
+    result = await Runner.run(triage, input="refund order 42")
+
+    assert result.final_output == "refunded"
+    assert result.last_agent is refunds
+    assert model.handoff_names[0] == ["transfer_to_agent"]
+    assert received == [Refund(order_id="42", address=Address(city="Paris"))]
+    # The refunds agent's input filter removed the handoff call and its output
+    assert len(result.to_input_list()) == 2
+
+
+@pytest.mark.asyncio
+async def test_routed_handoff_without_input():
+    model = FakeModel()
+    agents = specialists(model)
+    triage = Agent(name="triage", model=model, handoffs=[*agents], collapse_handoffs=True)
+    model.add_multiple_turn_outputs([[route("specialist_7")], [get_text_message("done")]])
+
+    result = await Runner.run(triage, input="a question about topic 7")
+    assert result.last_agent is agents[7]
+
+
+@pytest.mark.asyncio
+async def test_invalid_routing_calls_are_model_errors():
+    def on_refund(ctx: RunContextWrapper[Any], refund: Refund) -> None:
+        pass
+
+    model = FakeModel()
+    refunds = Agent(name="refunds", model=model)
+    triage = Agent(
+        name="triage",
+        model=model,
+        handoffs=[handoff(refunds, on_handoff=on_refund, input_type=Refund)],
+        collapse_handoffs=True,
+    )
+
+    model.add_multiple_turn_outputs([[route("nobody")]])
+    with pytest.raises(ModelBehaviorError):
+        await Runner.run(triage, input="hello")
+
+    # The target's input is still validated against its input type
+    model.add_multiple_turn_outputs([[route("refunds", {"order_id": "42"})]])
+    with pytest.raises(ModelBehaviorError):
+        await Runner.run(triage, input="hello")
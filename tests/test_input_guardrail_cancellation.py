@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import asyncio
+import gc
+from collections.abc import AsyncIterator
+from typing import Any
+
+import pytest
+
+from agents import (
+    Agent,
+    GuardrailFunctionOutput,
+    InputGuardrailTripwireTriggered,
+    RunConfig,
+    RunContextWrapper,
+    Runner,
+    function_tool,
+    input_guardrail,
+)
+from agents.items import ModelResponse, TResponseStreamEvent
+
+from .fake_model import FakeModel
+from .test_responses import get_function_tool_call, get_text_message
+from .test_stream_buffer import text_delta
+
+
+class SlowModel(FakeModel):
+    """Takes a long time to respond, and records whether it was cancelled."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.cancelled = False
+        self.deltas_sent = 0
+
+    async def get_response(self, *args: Any, **kwargs: Any) -> ModelResponse:
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return await super().get_response(*args, **kwargs)
+
+    async def stream_response(
+        self, *args: Any, **kwargs: Any
+    ) -> AsyncIterator[TResponseStreamEvent]:
+        try:
+            for _ in range(1000):
+                await asyncio.sleep(0.01)
+                self.deltas_sent += 1
+                yield text_delta("a").data
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        async for event in super().stream_response(*args, **kwargs):
+            yield event
+
+
+def guardrail(tripwire: bool, delay: float = 0):
+    @input_guardrail
+    async def check(context: RunContextWrapper[Any], agent: Agent[Any], input: Any):
+        await asyncio.sleep(delay)
+        return GuardrailFunctionOutput(output_info=None, tripwire_triggered=tripwire)
+
+    return check
+
+
+@pytest.mark.asyncio
+async def test_tripwire_cancels_the_first_turn():
+    model = SlowModel()
+    agent = Agent(name="test", model=model, input_guardrails=[guardrail(tripwire=True)])
+
+    with pytest.raises(InputGuardrailTripwireTriggered):
+        await asyncio.wait_for(Runner.run(agent, input="hi"), timeout=2)
+    assert model.cancelled
+
+
+@pytest.mark.asyncio
+async def test_tripwire_cancels_the_first_streamed_turn():
+    model = SlowModel()
+    agent = Agent(name="test", model=model, input_guardrails=[guardrail(True, delay=0.05)])
+
+    result = Runner.run_streamed(agent, input="hi")
+    with pytest.raises(InputGuardrailTripwireTriggered):
+        await _consume(result.stream_events())
+
+    await asyncio.sleep(0.05)
+    assert model.cancelled
+    assert model.deltas_sent < 100
+    assert len(result.input_guardrail_results) == 1
+
+
+def agent_with_tool(tripwire: bool, calls: list[str]) -> Agent:
+    @function_tool
+    def send_email() -> str:
+        calls.append("send_email")
+        return "sent"
+
+    model = FakeModel()
+    model.add_multiple_turn_outputs(
+        [[get_function_tool_call("send_email")], [get_text_message("done")]]
+    )
+    return Agent(
+        name="test",
+        model=model,
+        tools=[send_email],
+        input_guardrails=[guardrail(tripwire, delay=0.05)],
+    )
+
+
+@pytest.mark.asyncio
+async def test_tools_run_before_slow_guardrails_by_default():
+    calls: list[str] = []
+    with pytest.raises(InputGuardrailTripwireTriggered):
+        await Runner.run(agent_with_tool(tripwire=True, calls=calls), input="hi")
+    assert calls == ["send_email"]
+
+
+@pytest.mark.asyncio
+async def test_hold_tools_for_input_guardrails():
+    run_config = RunConfig(hold_tools_for_input_guardrails=True)
+
+    calls: list[str] = []
+    with pytest.raises(InputGuardrailTripwireTriggered):
+        await Runner.run(agent_with_tool(True, calls), input="hi", run_config=run_config)
+    assert calls == []
+
+    result = Runner.run_streamed(agent_with_tool(True, calls), input="hi", run_config=run_config)
+    with pytest.raises(InputGuardrailTripwireTriggered):
+        await _consume(result.stream_events())
+    assert calls == []
+
+    # Once the guardrails pass, the tools run as usual
+    run_result = await Runner.run(agent_with_tool(False, calls), input="hi", run_config=run_config)
+    assert run_result.final_output == "done"
+    assert calls == ["send_email"]
+
+    streamed = Runner.run_streamed(agent_with_tool(False, calls), input="hi", run_config=run_config)
+    await _consume(streamed.stream_events())
+    assert streamed.final_output == "done"
+    assert calls == ["send_email"] * 2
+
+
+@pytest.mark.asyncio
+async def test_first_turn_error_cancels_the_guardrails():
+    cancelled = []
+
+    @input_guardrail
+    async def slow(context: RunContextWrapper[Any], agent: Agent[Any], input: Any):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        return GuardrailFunctionOutput(output_info=None, tripwire_triggered=False)
+
+    model = FakeModel()
+    model.set_next_output(ValueError("model failed"))
+    agent = Agent(name="test", model=model, input_guardrails=[slow])
+
+    with pytest.raises(ValueError):
+        await asyncio.wait_for(Runner.run(agent, input="hi"), timeout=2)
+    await asyncio.sleep(0)
+    assert cancelled == [True]
+
+
+async def _consume(events: AsyncIterator[Any]) -> None:
+    async for _ in events:
+        pass
+
+
+@pytest.mark.asyncio
+async def test_first_turn_error_is_retrieved_when_a_guardrail_trips():
+    async def fail(error: Exception) -> Any:
+        raise error
+
+    loop = asyncio.get_running_loop()
+    errors: list[dict[str, Any]] = []
+    previous_handler = loop.get_exception_handler()
+    loop.set_exception_handler(lambda _, context: errors.append(context))
+    try:
+        guardrails_task = asyncio.create_task(fail(RuntimeError("tripped")))
+        first_turn_task = asyncio.create_task(fail(ValueError("model failed")))
+        await asyncio.sleep(0)
+        assert guardrails_task.done() and first_turn_task.done()
+
+        # The guardrail's exception is raised, and the first turn's is retrieved too
+        raised = None
+        try:
+            await Runner._wait_for_first_turn(guardrails_task, first_turn_task)
+        except RuntimeError as e:
+            raised = str(e)
+        assert raised == "tripped"
+        del guardrails_task, first_turn_task
+        gc.collect()
+    finally:
+        loop.set_exception_handler(previous_handler)
+    assert errors == []
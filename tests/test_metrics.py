@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import threading
+from collections.abc import AsyncIterator
+from typing import Any
+
+import pytest
+from openai.types.responses import ResponseTextDeltaEvent
+
+from agents import (
+    Agent,
+    AgentMetrics,
+    GuardrailFunctionOutput,
+    InputGuardrail,
+    MaxTurnsExceeded,
+    MetricsRegistry,
+    OutputGuardrail,
+    OutputGuardrailTripwireTriggered,
+    RunConfig,
+    Runner,
+    function_tool,
+)
+from agents.items import TResponseStreamEvent
+
+from .fake_model import FakeModel
+from .test_responses import (
+    get_function_tool,
+    get_function_tool_call,
+    get_handoff_tool_call,
+    get_text_message,
+)
+
+
+def sample_value(registry: MetricsRegistry, name: str, **labels: str) -> float | None:
+    for family in registry.collect():
+        for sample in family.samples:
+            if sample.name == name and sample.labels == labels:
+                return sample.value
+    return None
+
+
+class DeltaFakeModel(FakeModel):
+    """Streams a text delta before the completed response, so there is a first token."""
+
+    model = "delta-model"
+
+    async def stream_response(
+        self, *args: Any, **kwargs: Any
+    ) -> AsyncIterator[TResponseStreamEvent]:
+        yield ResponseTextDeltaEvent(
+            content_index=0,
+            delta="a",
+            item_id="1",
+            output_index=0,
+            type="response.output_text.delta",
+        )
+        async for event in super().stream_response(*args, **kwargs):
+            yield event
+
+
+def test_counter_and_histogram_exposition():
+    registry = MetricsRegistry()
+    counter = registry.counter("requests", "Requests served.", ["path"])
+    counter.labels("/a").inc()
+    counter.labels(path="/a").inc(2)
+    histogram = registry.histogram("latency_seconds", "Latency.", buckets=[0.1, 1.0])
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(5)
+
+    assert registry.render_text() == (
+        "# HELP requests Requests served.\n"
+        "# TYPE requests counter\n"
+        'requests_total{path="/a"} 3\n'
+        "# HELP latency_seconds Latency.\n"
+        "# TYPE latency_seconds histogram\n"
+        'latency_seconds_bucket{le="0.1"} 1\n'
+        'latency_seconds_bucket{le="1"} 2\n'
+        'latency_seconds_bucket{le="+Inf"} 3\n'
+        "latency_seconds_sum 5.55\n"
+        "latency_seconds_count 3\n"
+    )
+
+
+def test_registry_rejects_conflicting_metrics():
+    registry = MetricsRegistry()
+    assert registry.counter("x", "X.") is registry.counter("x", "X.")
+    with pytest.raises(ValueError):
+        registry.histogram("x", "X.")
+    with pytest.raises(ValueError):
+        registry.counter("y", "Y.", ["a"]).labels("1", "2")
+
+
+def test_updates_from_many_threads_are_not_lost():
+    registry = MetricsRegistry()
+    counter = registry.counter("hits", "Hits.")
+    histogram = registry.histogram("sizes", "Sizes.", buckets=[10])
+
+    def work():
+        for _ in range(10_000):
+            counter.inc()
+            histogram.observe(1)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sample_value(registry, "hits_total") == 80_000
+    assert sample_value(registry, "sizes_count") == 80_000
+
+
+@pytest.mark.asyncio
+async def test_run_records_model_tool_and_turn_metrics():
+    @function_tool
+    def broken_tool() -> str:
+        raise ValueError("boom")
+
+    model = FakeModel()
+    agent = Agent(name="test", model=model, tools=[get_function_tool("foo"), broken_tool])
+    model.add_multiple_turn_outputs(
+        [
+            [get_function_tool_call("foo"), get_function_tool_call("broken_tool")],
+            [get_text_message("done")],
+        ]
+    )
+    metrics = AgentMetrics()
+
+    await Runner.run(agent, input="hi", run_config=RunConfig(metrics=metrics))
+
+    registry = metrics.registry
+    assert (
+        sample_value(registry, "agents_model_request_duration_seconds_count", model="FakeModel")
+        == 2
+    )
+    assert sample_value(registry, "agents_tool_calls_total", tool="foo") == 1
+    assert sample_value(registry, "agents_tool_errors_total", tool="foo") is None
+    # The error was handled by the tool and sent to the model, but still counts as an error
+    assert sample_value(registry, "agents_tool_errors_total", tool="broken_tool") == 1
+    assert sample_value(registry, "agents_run_turns_sum") == 2
+
+
+@pytest.mark.asyncio
+async def test_run_records_guardrail_handoff_and_max_turns_metrics():
+    def passing_guardrail(context, agent, input) -> GuardrailFunctionOutput:
+        return GuardrailFunctionOutput(output_info=None, tripwire_triggered=False)
+
+    def tripping_guardrail(context, agent, output) -> GuardrailFunctionOutput:
+        return GuardrailFunctionOutput(output_info=None, tripwire_triggered=True)
+
+    model = FakeModel()
+    agent_2 = Agent(name="agent_2", model=model)
+    agent_1 = Agent(
+        name="agent_1",
+        model=model,
+        handoffs=[agent_2],
+        input_guardrails=[InputGuardrail(guardrail_function=passing_guardrail, name="ok")],
+    )
+    agent_2.output_guardrails = [
+        OutputGuardrail(guardrail_function=tripping_guardrail, name="trip")
+    ]
+    model.add_multiple_turn_outputs([[get_handoff_tool_call(agent_2)], [get_text_message("done")]])
+    metrics = AgentMetrics()
+
+    with pytest.raises(OutputGuardrailTripwireTriggered):
+        await Runner.run(agent_1, input="hi", run_config=RunConfig(metrics=metrics))
+
+    registry = metrics.registry
+    assert (
+        sample_value(registry, "agents_handoffs_total", from_agent="agent_1", to_agent="agent_2")
+        == 1
+    )
+    assert sample_value(registry, "agents_guardrail_runs_total", guardrail="ok", kind="input") == 1
+    assert (
+        sample_value(
+            registry, "agents_guardrail_tripwire_triggered_total", guardrail="ok", kind="input"
+        )
+        is None
+    )
+    assert (
+        sample_value(
+            registry, "agents_guardrail_tripwire_triggered_total", guardrail="trip", kind="output"
+        )
+        == 1
+    )
+
+    model.add_multiple_turn_outputs([[get_function_tool_call("foo")]] * 3)
+    looping_agent = Agent(name="loop", model=model, tools=[get_function_tool("foo")])
+    with pytest.raises(MaxTurnsExceeded):
+        await Runner.run(
+            looping_agent, input="hi", max_turns=2, run_config=RunConfig(metrics=metrics)
+        )
+    assert sample_value(registry, "agents_max_turns_exceeded_total") == 1
+
+
+@pytest.mark.asyncio
+async def test_streamed_run_records_ttft_and_queue_depth():
+    model = DeltaFakeModel()
+    model.set_next_output([get_text_message("done")])
+    agent = Agent(name="test", model=model)
+    metrics = AgentMetrics()
+
+    result = Runner.run_streamed(agent, input="hi", run_config=RunConfig(metrics=metrics))
+    async for _ in result.stream_events():
+        pass
+
+    registry = metrics.registry
+    assert (
+        sample_value(
+            registry, "agents_model_time_to_first_token_seconds_count", model="delta-model"
+        )
+        == 1
+    )
+    assert (
+        sample_value(registry, "agents_model_request_duration_seconds_count", model="delta-model")
+        == 1
+    )
+    assert (sample_value(registry, "agents_stream_event_queue_depth_count") or 0) >= 2
+    assert sample_value(registry, "agents_run_turns_count") == 1
@@ -1,4 +1,5 @@
 from collections.abc import AsyncIterator
+from typing import Any
 
 import pytest
 from openai.types.chat.chat_completion_chunk import (
@@ -262,17 +263,146 @@ async def test_stream_response_yields_events_for_tool_call(monkeypatch) -> None:
     added_fn = output_events[1].item
     assert isinstance(added_fn, ResponseFunctionToolCall)
     assert added_fn.name == "my_func"  # Name should be concatenation of both chunks.
-    assert added_fn.arguments == "arg1arg2"
-    assert output_events[2].type == "response.function_call_arguments.delta"
-    assert output_events[2].delta == "arg1arg2"
-    assert output_events[3].type == "response.output_item.done"
-    assert output_events[4].type == "response.completed"
-    assert output_events[2].delta == "arg1arg2"
-    assert output_events[3].type == "response.output_item.done"
-    assert output_events[4].type == "response.completed"
-    assert added_fn.name == "my_func"  # Name should be concatenation of both chunks.
-    assert added_fn.arguments == "arg1arg2"
+    # The arguments arrive as deltas
+    assert added_fn.arguments == ""
     assert output_events[2].type == "response.function_call_arguments.delta"
     assert output_events[2].delta == "arg1arg2"
     assert output_events[3].type == "response.output_item.done"
+    done_fn = output_events[3].item
+    assert isinstance(done_fn, ResponseFunctionToolCall)
+    assert done_fn.arguments == "arg1arg2"
     assert output_events[4].type == "response.completed"
+
+
+def _chunk(delta: ChoiceDelta | None = None, usage: CompletionUsage | None = None):
+    return ChatCompletionChunk(
+        id="chunk-id",
+        created=1,
+        model="fake",
+        object="chat.completion.chunk",
+        choices=[Choice(index=0, delta=delta)] if delta else [],
+        usage=usage,
+    )
+
+
+def _patch_stream(
+    monkeypatch, chunks: list[ChatCompletionChunk], log: list[str] | None = None
+) -> None:
+    async def fake_stream() -> AsyncIterator[ChatCompletionChunk]:
+        for i, c in enumerate(chunks):
+            if log is not None:
+                log.append(f"chunk {i}")
+            yield c
+
+    async def patched_fetch_response(self, *args, **kwargs):
+        resp = Response(
+            id="resp-id",
+            created_at=0,
+            model="fake-model",
+            object="response",
+            output=[],
+            tool_choice="none",
+            tools=[],
+            parallel_tool_calls=False,
+        )
+        return resp, fake_stream()
+
+    monkeypatch.setattr(OpenAIChatCompletionsModel, "_fetch_response", patched_fetch_response)
+
+
+async def _stream(log: list[str] | None = None) -> list[Any]:
+    model = OpenAIProvider(use_responses=False).get_model("gpt-4")
+    output_events: list[Any] = []
+    async for event in model.stream_response(
+        system_instructions=None,
+        input="",
+        model_settings=ModelSettings(),
+        tools=[],
+        output_schema=None,
+        handoffs=[],
+        tracing=ModelTracing.DISABLED,
+    ):
+        output_events.append(event)
+        if log is not None:
+            log.append(event.type)
+    return output_events
+
+
+@pytest.mark.allow_call_model_methods
+@pytest.mark.asyncio
+async def test_stream_response_emits_tool_call_events_as_they_arrive(monkeypatch) -> None:
+    def tool_call(index: int, id=None, name=None, arguments=None):
+        return ChoiceDelta(
+            tool_calls=[
+                ChoiceDeltaToolCall(
+                    index=index,
+                    id=id,
+                    function=ChoiceDeltaToolCallFunction(name=name, arguments=arguments),
+                    type="function",
+                )
+            ]
+        )
+
+    chunks = [
+        _chunk(ChoiceDelta(content="Checking")),
+        _chunk(tool_call(0, id="call_a", name="get_weather", arguments="")),
+        _chunk(tool_call(0, arguments='{"city":')),
+        _chunk(tool_call(0, arguments=' "SF"}')),
+        _chunk(tool_call(1, id="call_b", name="get_time", arguments="{}")),
+        _chunk(usage=CompletionUsage(completion_tokens=1, prompt_tokens=1, total_tokens=2)),
+    ]
+    log: list[str] = []
+    _patch_stream(monkeypatch, chunks, log)
+    output_events = await _stream(log)
+
+    assert log == [
+        "chunk 0",
+        "response.created",
+        "response.output_item.added",
+        "response.content_part.added",
+        "response.output_text.delta",
+        "chunk 1",
+        # The name may continue in the next chunk, so the call starts once it doesn't
+        "chunk 2",
+        "response.output_item.added",
+        "response.function_call_arguments.delta",
+        "chunk 3",
+        "response.function_call_arguments.delta",
+        # The next tool call starting means the previous one is done
+        "chunk 4",
+        "response.output_item.done",
+        "chunk 5",
+        "response.content_part.done",
+        "response.output_item.done",
+        "response.output_item.added",
+        "response.function_call_arguments.delta",
+        "response.output_item.done",
+        "response.completed",
+    ]
+
+    get_weather_added = output_events[4]
+    assert get_weather_added.output_index == 1
+    assert get_weather_added.item.name == "get_weather"
+    assert get_weather_added.item.call_id == "call_a"
+    assert [e.delta for e in output_events if e.type.endswith("arguments.delta")] == [
+        '{"city":',
+        ' "SF"}',
+        "{}",
+    ]
+
+    completed = output_events[-1].response
+    assert [item.type for item in completed.output] == ["message", "function_call", "function_call"]
+    assert completed.output[1].arguments == '{"city": "SF"}'
+    assert completed.output[2].name == "get_time"
+    assert completed.output[2].call_id == "call_b"
+
+
+@pytest.mark.allow_call_model_methods
+@pytest.mark.asyncio
+async def test_stream_response_accumulates_long_outputs(monkeypatch) -> None:
+    tokens = [f"t{i} " for i in range(10_000)]
+    _patch_stream(monkeypatch, [_chunk(ChoiceDelta(content=token)) for token in tokens])
+    output_events = await _stream()
+
+    assert sum(e.type == "response.output_text.delta" for e in output_events) == 10_000
+    assert output_events[-1].response.output[0].content[0].text == "".join(tokens)
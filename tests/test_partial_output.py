@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import json
+from collections.abc import AsyncIterator
+from typing import Any
+
+import pytest
+from openai.types.responses import ResponseTextDeltaEvent
+from pydantic import BaseModel
+
+from agents import Agent, PartialOutputStreamEvent, RunConfig, Runner
+from agents._partial_output import PartialJSONParser
+from agents.agent_output import AgentOutputSchema
+from agents.items import TResponseStreamEvent
+
+from .fake_model import FakeModel
+from .test_responses import get_final_output_message
+
+DOCUMENT = {
+    "title": 'A "quoted" café \U0001f600',
+    "count": -12.5e3,
+    "flags": [True, False, None],
+    "nested": {"items": [{"a": 1}, {"b": [2, 3]}], "empty": {}, "none": []},
+}
+
+
+def parse_in_chunks(text: str, size: int) -> PartialJSONParser:
+    parser = PartialJSONParser()
+    for i in range(0, len(text), size):
+        parser.feed(text[i : i + size])
+    return parser
+
+
+@pytest.mark.parametrize("ensure_ascii", [True, False])
+def test_parser_handles_any_chunking(ensure_ascii: bool):
+    text = json.dumps(DOCUMENT, ensure_ascii=ensure_ascii)
+    for size in [1, 2, 3, 7, len(text)]:
+        parser = parse_in_chunks(text, size)
+        assert not parser.failed
+        assert parser.snapshot() == DOCUMENT
+
+
+def test_parser_snapshots_of_incomplete_documents():
+    parser = PartialJSONParser()
+    assert parser.snapshot() is None
+
+    parser.feed('{"title": "Hel')
+    assert parser.snapshot() == {"title": "Hel"}
+    parser.feed("lo\\")
+    # An incomplete escape isn't included yet
+    assert parser.snapshot() == {"title": "Hello"}
+    parser.feed('u00e9", "count": 12')
+    # Nor is a number that may not be complete
+    assert parser.snapshot() == {"title": "Helloé"}
+    parser.feed(', "items": [1, {"a": tr')
+    assert parser.snapshot() == {"title": "Helloé", "count": 12, "items": [1, {}]}
+
+    # Snapshots are copies
+    snapshot = parser.snapshot()
+    parser.feed("ue}]}")
+    assert snapshot["items"] == [1, {}]
+    assert parser.snapshot()["items"] == [1, {"a": True}]
+
+
+def test_parser_stops_at_invalid_json():
+    parser = PartialJSONParser()
+    parser.feed('{"a": 1}}')
+    assert parser.failed
+
+    parser = PartialJSONParser()
+    parser.feed('{"a" 1}')
+    assert parser.failed
+
+
+class Recipe(BaseModel):
+    title: str
+    steps: list[str]
+
+
+def test_validate_partial_python():
+    schema = AgentOutputSchema(Recipe)
+    assert schema.validate_partial_python({"title": "Soup", "steps": ["Boil"]}) == Recipe(
+        title="Soup", steps=["Boil"]
+    )
+
+    wrapped = AgentOutputSchema(list[int])
+    assert wrapped.validate_partial_python({"response": [1, 2]}) == [1, 2]
+
+
+class JSONStreamingModel(FakeModel):
+    """Streams the final output text as deltas of a few characters."""
+
+    def __init__(self, text: str, chunk_size: int = 4):
+        super().__init__()
+        self.text = text
+        self.chunk_size = chunk_size
+
+    async def stream_response(
+        self, *args: Any, **kwargs: Any
+    ) -> AsyncIterator[TResponseStreamEvent]:
+        for i in range(0, len(self.text), self.chunk_size):
+            yield ResponseTextDeltaEvent(
+                content_index=0,
+                delta=self.text[i : i + self.chunk_size],
+                item_id="1",
+                output_index=0,
+                type="response.output_text.delta",
+            )
+        async for event in super().stream_response(*args, **kwargs):
+            yield event
+
+
+def recipe_agent() -> Agent:
+    text = json.dumps({"title": "Soup", "steps": ["Boil water", "Add salt"]})
+    model = JSONStreamingModel(text)
+    model.set_next_output([get_final_output_message(text)])
+    return Agent(name="test", model=model, output_type=Recipe)
+
+
+@pytest.mark.asyncio
+async def test_streamed_run_sends_partial_outputs():
+    result = Runner.run_streamed(
+        recipe_agent(), input="hi", run_config=RunConfig(partial_output_interval=0)
+    )
+    events = [
+        event
+        async for event in result.stream_events()
+        if isinstance(event, PartialOutputStreamEvent)
+    ]
+
+    # The first delta is '{"ti'
+    assert events[0].json_value == {}
+    # The output only validates once every required field has started
+    assert [e.output for e in events if e.output is not None][0] == Recipe(title="Soup", steps=[])
+    assert (
+        events[-1].output
+        == result.final_output
+        == Recipe(title="Soup", steps=["Boil water", "Add salt"])
+    )
+    assert all(isinstance(e.output, (Recipe, type(None))) for e in events)
+    # One per delta; the completed response didn't change the output
+    assert len(events) == 14
+
+
+@pytest.mark.asyncio
+async def test_partial_outputs_are_throttled_and_can_be_subscribed_to():
+    result = Runner.run_streamed(
+        recipe_agent(),
+        input="hi",
+        run_config=RunConfig(partial_output_interval=60),
+        events={"partial_output_stream_event"},
+    )
+    events = [event async for event in result.stream_events()]
+
+    # The first delta, then the complete output when the response completes
+    assert [type(e) for e in events] == [PartialOutputStreamEvent] * 2
+    assert events[-1].output == result.final_output  # type: ignore
+
+
+@pytest.mark.asyncio
+async def test_no_partial_outputs_by_default():
+    result = Runner.run_streamed(recipe_agent(), input="hi")
+    events = [event async for event in result.stream_events()]
+    assert not any(isinstance(e, PartialOutputStreamEvent) for e in events)
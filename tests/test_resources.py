@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Annotated
+
+import pytest
+
+from agents import (
+    Resource,
+    ResourceRegistry,
+    RunContextWrapper,
+    function_tool,
+    get_default_resource_registry,
+    resource,
+    set_default_resource_registry,
+)
+from agents.function_schema import function_schema
+
+
+class Pool:
+    def __init__(self) -> None:
+        self.closed = False
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_resources_are_set_up_once_and_torn_down_in_reverse_order():
+    events: list[str] = []
+
+    async def create_pool() -> Pool:
+        events.append("setup pool")
+        await asyncio.sleep(0.01)
+        return Pool()
+
+    async def close_pool(pool: Pool) -> None:
+        events.append("teardown pool")
+        await pool.close()
+
+    pool_resource = Resource(create_pool, teardown=close_pool)
+
+    @resource
+    async def session():
+        events.append("setup session")
+        yield "session"
+        events.append("teardown session")
+
+    registry = ResourceRegistry()
+    # Concurrent users of a resource share a single setup
+    pools = await asyncio.gather(*(registry.get(pool_resource) for _ in range(3)))
+    assert pools[0] is pools[1] is pools[2]
+    await registry.warm_up(session, pool_resource)
+    assert registry.is_ready(session)
+    assert events == ["setup pool", "setup session"]
+
+    await registry.shutdown()
+    assert events[2:] == ["teardown session", "teardown pool"]
+    assert pools[0].closed
+    assert not registry.is_ready(pool_resource)
+
+
+@pytest.mark.asyncio
+async def test_failed_teardown_does_not_stop_shutdown():
+    closed: list[str] = []
+
+    async def fail(value: str) -> None:
+        raise RuntimeError("teardown failed")
+
+    async def close(value: str) -> None:
+        closed.append(value)
+
+    async def make_a() -> str:
+        return "a"
+
+    async def make_b() -> str:
+        return "b"
+
+    async with ResourceRegistry() as registry:
+        await registry.warm_up(Resource(make_a, teardown=close))
+        await registry.warm_up(Resource(make_b, teardown=fail))
+    assert closed == ["a"]
+
+
+async def create_pool() -> Pool:
+    return Pool()
+
+
+db_pool = Resource(create_pool)
+
+
+def lookup(ctx: RunContextWrapper[None], pool: Annotated[Pool, db_pool], order_id: str) -> str:
+    return f"{type(pool).__name__} {order_id}"
+
+
+@pytest.mark.asyncio
+async def test_resources_are_injected_into_function_tools():
+    schema = function_schema(lookup)
+    assert schema.resources == {"pool": db_pool}
+    assert list(schema.params_json_schema["properties"]) == ["order_id"]
+
+    previous = get_default_resource_registry()
+    registry = ResourceRegistry()
+    set_default_resource_registry(registry)
+    try:
+        tool = function_tool(lookup)
+        ctx = RunContextWrapper(None)
+        result = await tool.on_invoke_tool(ctx, json.dumps({"order_id": "42"}))
+        assert result == "Pool 42"
+        # The resource is kept in the registry, and shared by later calls
+        pool = await registry.get(db_pool)
+        assert await tool.on_invoke_tool(ctx, json.dumps({"order_id": "43"})) == "Pool 43"
+        assert await registry.get(db_pool) is pool
+    finally:
+        set_default_resource_registry(previous)
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+import pytest
+
+from agents import (
+    Agent,
+    AgentHooks,
+    GuardrailFunctionOutput,
+    InputGuardrail,
+    OutputGuardrail,
+    RunConfig,
+    RunContextWrapper,
+    Runner,
+    function_tool,
+)
+from agents.timing import RunTimings, TurnTiming
+
+from .fake_model import FakeModel
+from .test_metrics import DeltaFakeModel
+from .test_responses import get_function_tool_call, get_text_message
+
+
+class SlowModel(FakeModel):
+    async def get_response(self, *args: Any, **kwargs: Any):
+        await asyncio.sleep(0.02)
+        return await super().get_response(*args, **kwargs)
+
+
+class SlowStartHooks(AgentHooks[Any]):
+    async def on_start(self, context: RunContextWrapper[Any], agent: Agent[Any]) -> None:
+        await asyncio.sleep(0.01)
+
+
+@function_tool
+async def slow_tool() -> str:
+    await asyncio.sleep(0.02)
+    return "done"
+
+
+async def slow_guardrail(context, agent, data) -> GuardrailFunctionOutput:
+    await asyncio.sleep(0.01)
+    return GuardrailFunctionOutput(output_info=None, tripwire_triggered=False)
+
+
+@pytest.mark.asyncio
+async def test_timings_are_not_collected_by_default():
+    model = FakeModel()
+    model.set_next_output([get_text_message("done")])
+    result = await Runner.run(Agent(name="test", model=model), input="hi")
+    assert result.timings is None
+
+
+@pytest.mark.asyncio
+async def test_run_timings_breakdown():
+    model = SlowModel()
+    agent = Agent(
+        name="test",
+        model=model,
+        tools=[slow_tool],
+        hooks=SlowStartHooks(),
+        input_guardrails=[InputGuardrail(guardrail_function=slow_guardrail)],
+        output_guardrails=[OutputGuardrail(guardrail_function=slow_guardrail)],
+    )
+    model.add_multiple_turn_outputs(
+        [[get_function_tool_call("slow_tool")], [get_text_message("done")]]
+    )
+
+    result = await Runner.run(
+        agent, input="hi", run_config=RunConfig(collect_timings=True, tracing_disabled=True)
+    )
+
+    timings = result.timings
+    assert timings is not None
+    assert [(t.turn, t.agent) for t in timings.turns] == [(1, "test"), (2, "test")]
+    first, second = timings.turns
+    assert first.model >= 0.02 and second.model >= 0.02
+    assert first.hooks >= 0.01 and second.hooks < 0.01
+    assert first.tools >= 0.02
+    [tool_call] = first.tool_calls
+    assert tool_call.name == "slow_tool" and tool_call.call_id == "2"
+    assert tool_call.duration >= 0.02
+    assert second.guardrails >= 0.01
+    assert timings.input_guardrails >= 0.01
+    assert first.time_to_first_token is None
+
+    for turn in timings.turns:
+        assert turn.total >= turn.model + turn.tools + turn.guardrails + turn.hooks
+    assert timings.total >= sum(turn.total for turn in timings.turns)
+    assert timings.model == first.model + second.model
+    assert timings.to_dict()["turns"][0]["tool_calls"][0]["name"] == "slow_tool"
+
+
+@pytest.mark.asyncio
+async def test_streamed_run_timings_include_ttft():
+    model = DeltaFakeModel()
+    model.set_next_output([get_text_message("done")])
+    result = Runner.run_streamed(
+        Agent(name="test", model=model),
+        input="hi",
+        run_config=RunConfig(collect_timings=True, tracing_disabled=True),
+    )
+    async for _ in result.stream_events():
+        pass
+
+    timings = result.timings
+    assert timings is not None
+    [turn] = timings.turns
+    assert turn.time_to_first_token is not None
+    assert turn.model >= turn.time_to_first_token
+    assert timings.total > 0
+
+
+def test_overhead_is_the_unaccounted_time():
+    turn = TurnTiming(turn=1, agent="a", total=1.0, model=0.5, tools=0.2, guardrails=0.1)
+    assert turn.overhead == pytest.approx(0.2)
+
+    timings = RunTimings(turns=[turn], input_guardrails=0.3)
+    assert timings.guardrails == pytest.approx(0.4)
+    assert timings.overhead == pytest.approx(0.2)
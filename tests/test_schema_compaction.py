@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import json
+from typing import Any
+
+import pytest
+from pydantic import BaseModel, Field
+
+from agents import Agent, FunctionTool, RunConfig, Runner, compact_json_schema, function_tool
+from agents.agent_output import AgentOutputSchema
+
+from .fake_model import FakeModel
+from .test_responses import get_final_output_message, get_function_tool_call
+
+
+class Address(BaseModel):
+    """A postal address."""
+
+    street: str = Field(description="The   street,\n    including the number.")
+    city: str
+
+
+class Book(BaseModel):
+    title: str
+    author: str
+
+
+@function_tool
+def send_parcel(to: Address, book: Book | None = None):
+    """Send a parcel.
+
+    Args:
+        to: Where to send it.
+        book: A book to include.
+    """
+    return "sent"
+
+
+def assert_strict(schema: Any) -> None:
+    if isinstance(schema, dict):
+        if schema.get("type") == "object":
+            assert schema["additionalProperties"] is False
+            assert schema["required"] == list(schema["properties"])
+        for value in schema.values():
+            assert_strict(value)
+    elif isinstance(schema, list):
+        for value in schema:
+            assert_strict(value)
+
+
+def test_compaction_keeps_the_schema_strict_and_smaller():
+    original = json.dumps(send_parcel.params_json_schema)
+    result = compact_json_schema(send_parcel.params_json_schema)
+    schema = result.schema
+
+    # The original isn't modified
+    assert json.dumps(send_parcel.params_json_schema) == original
+    # Titles are removed, but not a property called `title`
+    assert json.dumps(schema).count('"title"') == 2  # In `properties` and `required`
+    assert list(schema["$defs"]["Book"]["properties"]) == ["title", "author"]
+    assert schema["properties"]["to"]["properties"]["street"]["description"] == (
+        "The street, including the number."
+    )
+    # `Address` was inlined because of its description, so its definition is no longer used
+    assert list(schema["$defs"]) == ["Book"]
+    assert_strict(schema)
+
+    assert result.original_size == len(original.replace(", ", ",").replace(": ", ":"))
+    assert result.compacted_size == len(json.dumps(schema, separators=(",", ":")))
+    assert 0 < result.compacted_size < result.original_size
+    assert result.saved == result.original_size - result.compacted_size
+
+
+def test_identical_definitions_are_merged():
+    schema = {
+        "type": "object",
+        "properties": {
+            "a": {"$ref": "#/$defs/A"},
+            "b": {"$ref": "#/$defs/B"},
+            "c": {"$ref": "#/$defs/C"},
+            "d": {"$ref": "#/$defs/D"},
+        },
+        "$defs": {
+            "A": {"type": "string", "title": "A"},
+            "B": {"type": "string", "title": "B"},
+            # Identical once A and B are merged
+            "C": {"type": "array", "items": {"$ref": "#/$defs/A"}},
+            "D": {"type": "array", "items": {"$ref": "#/$defs/B"}},
+            "Unused": {"type": "integer"},
+        },
+    }
+    compacted = compact_json_schema(schema).schema
+    assert compacted["$defs"] == {
+        "A": {"type": "string"},
+        "C": {"type": "array", "items": {"$ref": "#/$defs/A"}},
+    }
+    assert compacted["properties"] == {
+        "a": {"$ref": "#/$defs/A"},
+        "b": {"$ref": "#/$defs/A"},
+        "c": {"$ref": "#/$defs/C"},
+        "d": {"$ref": "#/$defs/C"},
+    }
+
+
+def test_results_are_memoized_by_identity():
+    schema = {"type": "object", "title": "X", "properties": {}}
+    assert compact_json_schema(schema) is compact_json_schema(schema)
+    assert compact_json_schema(dict(schema)) is not compact_json_schema(schema)
+
+
+class SchemaCapturingModel(FakeModel):
+    def __init__(self):
+        super().__init__()
+        self.sent: list[tuple[Any, ...]] = []
+
+    async def get_response(self, *args, **kwargs):
+        self.sent.append((kwargs["tools"], kwargs["output_schema"], kwargs["handoffs"]))
+        return await super().get_response(*args, **kwargs)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("compact_schemas", [True, False])
+async def test_runner_sends_compacted_schemas(compact_schemas: bool):
+    model = SchemaCapturingModel()
+    model.add_multiple_turn_outputs(
+        [
+            [
+                get_function_tool_call(
+                    "send_parcel", json.dumps({"to": {"street": "a", "city": "b"}})
+                )
+            ],
+            [get_final_output_message(json.dumps({"title": "Dune", "author": "Herbert"}))],
+        ]
+    )
+    agent = Agent(
+        name="test",
+        model=model,
+        tools=[send_parcel],
+        handoffs=[Agent(name="other")],
+        output_type=Book,
+    )
+
+    result = await Runner.run(
+        agent, input="hi", run_config=RunConfig(compact_schemas=compact_schemas)
+    )
+    assert result.final_output == Book(title="Dune", author="Herbert")
+
+    [tool], output_schema, [handoff] = model.sent[0]
+    assert isinstance(tool, FunctionTool)
+    assert isinstance(output_schema, AgentOutputSchema)
+    if compact_schemas:
+        assert tool.params_json_schema == compact_json_schema(send_parcel.params_json_schema).schema
+        assert "title" not in output_schema.json_schema()
+        # The output schema is reused across turns
+        assert model.sent[1][1] is output_schema
+    else:
+        assert tool is send_parcel
+        assert output_schema.json_schema()["title"] == "Book"
+    assert handoff.tool_name == "transfer_to_other"
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from agents import Agent, MaxTurnsExceeded, RunConfig, Runner
+from agents._run_impl import QueueCompleteSentinel
+from agents.stream_buffer import StreamBroadcast, StreamEventQueue
+from agents.stream_events import AgentUpdatedStreamEvent, RunItemStreamEvent, StreamEvent
+
+from .fake_model import FakeModel
+from .test_responses import (
+    get_function_tool,
+    get_function_tool_call,
+    get_handoff_tool_call,
+    get_text_message,
+)
+from .test_stream_buffer import text_delta
+
+
+def tool_agent() -> Agent:
+    model = FakeModel()
+    model.add_multiple_turn_outputs([[get_function_tool_call("foo")], [get_text_message("done")]])
+    return Agent(name="test", model=model, tools=[get_function_tool("foo", "result")])
+
+
+def event_names(events: list[StreamEvent]) -> list[str]:
+    return [event.name if isinstance(event, RunItemStreamEvent) else event.type for event in events]
+
+
+@pytest.mark.asyncio
+async def test_every_subscriber_receives_every_event():
+    result = Runner.run_streamed(tool_agent(), input="hi")
+    ui = result.subscribe()
+    audit = result.subscribe(include={"run_item_stream_event"})
+    # stream_events() becomes another subscriber instead of stealing events
+    ui_events, audit_events, tap_events = await asyncio.gather(
+        _collect(ui), _collect(audit), _collect(result.stream_events())
+    )
+
+    assert event_names(ui_events) == [
+        "agent_updated_stream_event",
+        "raw_response_event",
+        "tool_called",
+        "tool_output",
+        "raw_response_event",
+        "message_output_created",
+    ]
+    assert event_names(audit_events) == ["tool_called", "tool_output", "message_output_created"]
+    assert event_names(tap_events) == event_names(ui_events)
+    assert result.final_output == "done"
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_does_not_block_others():
+    result = Runner.run_streamed(tool_agent(), input="hi")
+    slow = result.subscribe()
+    fast = result.subscribe()
+
+    first = await slow.__anext__()
+    assert isinstance(first, AgentUpdatedStreamEvent)
+
+    # The slow subscriber isn't reading, but the fast one still gets the whole run
+    fast_events = await asyncio.wait_for(_collect(fast), timeout=5)
+    assert len(fast_events) == 6
+    assert result.is_complete
+
+    assert len(await _collect(slow)) == 5
+    assert slow.missed == 0
+
+
+@pytest.mark.asyncio
+async def test_subscriber_that_falls_behind_skips_overwritten_events():
+    result = Runner.run_streamed(
+        tool_agent(), input="hi", run_config=RunConfig(stream_broadcast_buffer_size=2)
+    )
+    slow = result.subscribe()
+    await _collect(result.subscribe(from_turn_start=False))
+
+    assert event_names(await _collect(slow)) == ["raw_response_event", "message_output_created"]
+    assert slow.missed == 4
+
+
+@pytest.mark.asyncio
+async def test_late_subscriber_replays_the_current_turn():
+    model = FakeModel()
+    agent_2 = Agent(name="agent_2", model=model)
+    agent_1 = Agent(name="agent_1", model=model, handoffs=[agent_2])
+    model.add_multiple_turn_outputs([[get_handoff_tool_call(agent_2)], [get_text_message("done")]])
+
+    result = Runner.run_streamed(agent_1, input="hi")
+    await _collect(result.subscribe())
+
+    late = await _collect(result.subscribe())
+    # The turn started with the handoff to agent_2
+    assert isinstance(late[0], AgentUpdatedStreamEvent)
+    assert late[0].new_agent is agent_2
+    assert event_names(late) == [
+        "agent_updated_stream_event",
+        "raw_response_event",
+        "message_output_created",
+    ]
+
+    assert await _collect(result.subscribe(from_turn_start=False)) == []
+
+
+@pytest.mark.asyncio
+async def test_subscriber_replays_the_turn_after_events_were_read_directly():
+    result = Runner.run_streamed(tool_agent(), input="hi")
+
+    async def take() -> StreamEvent:
+        item = await result._event_queue.get()
+        assert not isinstance(item, QueueCompleteSentinel)
+        return item
+
+    # Read the first turn, and the first event of the second turn, without broadcasting
+    events: list[StreamEvent] = []
+    while "tool_output" not in event_names(events):
+        events.append(await take())
+    events.append(await take())
+    assert event_names(events)[-1] == "raw_response_event"
+
+    # The rest of the second turn is replayed, even though the broadcast numbers events from when
+    # it started
+    late = await _collect(result.subscribe())
+    assert event_names(late) == ["message_output_created"]
+
+
+@pytest.mark.asyncio
+async def test_run_errors_are_raised_by_every_subscriber():
+    model = FakeModel()
+    model.add_multiple_turn_outputs([[get_function_tool_call("foo")]] * 3)
+    agent = Agent(name="test", model=model, tools=[get_function_tool("foo")])
+
+    result = Runner.run_streamed(agent, input="hi", max_turns=2)
+    subscriptions = [result.subscribe(), result.subscribe()]
+    for subscription in subscriptions:
+        with pytest.raises(MaxTurnsExceeded):
+            await _collect(subscription)
+
+
+@pytest.mark.asyncio
+async def test_turn_start_and_ring_buffer_positions():
+    queue = StreamEventQueue()
+    queue.put_nowait(text_delta("a"))
+    queue.mark_turn_start()
+    assert queue.turn_start == 1
+    queue.put_nowait(AgentUpdatedStreamEvent(new_agent=Agent(name="x")))
+    queue.mark_turn_start()
+    assert queue.turn_start == 1
+
+    broadcast = StreamBroadcast(max_size=3)
+    for delta in "abcde":
+        broadcast.publish(text_delta(delta))
+    broadcast.close()
+    assert broadcast.first_seq == 2
+
+    subscription = broadcast.subscribe(start=0)
+    assert [event.data.delta for event in await _collect(subscription)] == ["c", "d", "e"]  # type: ignore
+    assert subscription.missed == 2
+
+    with pytest.raises(ValueError):
+        StreamBroadcast(max_size=0)
+
+
+async def _collect(events) -> list[StreamEvent]:
+    return [event async for event in events]
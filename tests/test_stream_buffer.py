@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+from typing import Any
+
+import pytest
+from openai.types.responses import ResponseOutputItemAddedEvent, ResponseTextDeltaEvent
+
+from agents import Agent, RunConfig, Runner, TextDeltaCoalescing
+from agents.items import TResponseStreamEvent
+from agents.stream_buffer import StreamEventQueue, TextDeltaCoalescer
+from agents.stream_events import RawResponsesStreamEvent, RunItemStreamEvent
+
+from .fake_model import FakeModel
+from .test_responses import get_text_message
+
+
+def text_delta(delta: str, item_id: str = "1") -> RawResponsesStreamEvent:
+    return RawResponsesStreamEvent(
+        data=ResponseTextDeltaEvent(
+            content_index=0,
+            delta=delta,
+            item_id=item_id,
+            output_index=0,
+            type="response.output_text.delta",
+        )
+    )
+
+
+def item_added() -> RawResponsesStreamEvent:
+    return RawResponsesStreamEvent(
+        data=ResponseOutputItemAddedEvent(
+            item=get_text_message(""),
+            output_index=0,
+            type="response.output_item.added",
+        )
+    )
+
+
+class ManyDeltasModel(FakeModel):
+    def __init__(self, deltas: int):
+        super().__init__()
+        self.deltas = deltas
+
+    async def stream_response(
+        self, *args: Any, **kwargs: Any
+    ) -> AsyncIterator[TResponseStreamEvent]:
+        for i in range(self.deltas):
+            yield text_delta(str(i % 10)).data
+        async for event in super().stream_response(*args, **kwargs):
+            yield event
+
+
+def delta_of(event: object) -> str:
+    if isinstance(event, RawResponsesStreamEvent):
+        event = event.data
+    assert isinstance(event, ResponseTextDeltaEvent)
+    return event.delta
+
+
+def drain(queue: StreamEventQueue) -> list[Any]:
+    items = []
+    while not queue.empty():
+        items.append(queue.get_nowait())
+    return items
+
+
+@pytest.mark.asyncio
+async def test_coalesce_merges_deltas_into_the_last_buffered_delta():
+    queue = StreamEventQueue(max_size=2, policy="coalesce")
+    for delta in "abcde":
+        await queue.put_raw(text_delta(delta))
+    # A delta for different content can't be merged, so it's buffered anyway
+    await queue.put_raw(text_delta("x", item_id="2"))
+    await queue.put_raw(text_delta("y", item_id="2"))
+
+    assert [e.data.delta for e in drain(queue)] == ["a", "bcde", "xy"]
+    assert queue.stats.coalesced == 4
+    assert queue.stats.raw_high_water_mark == 3
+
+
+@pytest.mark.asyncio
+async def test_coalesce_merges_interleaved_deltas_for_the_same_content():
+    queue = StreamEventQueue(max_size=2, policy="coalesce")
+    await queue.put_raw(text_delta("a"))
+    await queue.put_raw(text_delta("x", item_id="2"))
+    # The last buffered event is for other content, but "a" is still buffered
+    await queue.put_raw(text_delta("b"))
+    await queue.put_raw(text_delta("y", item_id="2"))
+
+    assert [delta_of(e) for e in drain(queue)] == ["ab", "xy"]
+    assert queue.stats.raw_high_water_mark == 2
+
+    # Once a delta has been consumed, the next delta for its content has nothing to merge into
+    await queue.put_raw(text_delta("c"))
+    await queue.put_raw(text_delta("d"))
+    assert [delta_of(e) for e in drain(queue)] == ["c", "d"]
+
+
+@pytest.mark.asyncio
+async def test_drop_keeps_structural_and_semantic_events():
+    queue = StreamEventQueue(max_size=1, policy="drop")
+    await queue.put_raw(text_delta("a"))
+    await queue.put_raw(text_delta("b"))
+    await queue.put_raw(item_added())
+    semantic = RunItemStreamEvent(name="message_output_created", item=None)  # type: ignore[arg-type]
+    queue.put_nowait(semantic)
+
+    items = drain(queue)
+    assert [getattr(e, "data", e).type for e in items[:2]] == [
+        "response.output_text.delta",
+        "response.output_item.added",
+    ]
+    assert items[2] is semantic
+    assert queue.stats.dropped == 1
+
+
+@pytest.mark.asyncio
+async def test_block_waits_for_the_consumer():
+    queue = StreamEventQueue(max_size=2, policy="block")
+
+    async def produce():
+        for delta in "abcd":
+            await queue.put_raw(text_delta(delta))
+
+    producer = asyncio.create_task(produce())
+    await asyncio.sleep(0.01)
+    assert not producer.done()
+    assert queue.qsize() == 2
+
+    received: list[str] = []
+    while len(received) < 4:
+        received.append(delta_of(await queue.get()))
+    await producer
+
+    assert received == ["a", "b", "c", "d"]
+    assert queue.stats.raw_high_water_mark == 2
+    assert queue.stats.blocked_time > 0
+
+
+@pytest.mark.asyncio
+async def test_unbounded_by_default():
+    model = ManyDeltasModel(50)
+    model.set_next_output([get_text_message("done")])
+    result = Runner.run_streamed(Agent(name="test", model=model), input="hi")
+    async for _ in result.stream_events():
+        pass
+
+    assert result.buffer_stats.max_size is None
+    assert result.buffer_stats.raw_high_water_mark == 51
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("policy", ["block", "coalesce", "drop"])
+async def test_bounded_streamed_run(policy):
+    model = ManyDeltasModel(50)
+    model.set_next_output([get_text_message("done")])
+    result = Runner.run_streamed(
+        Agent(name="test", model=model),
+        input="hi",
+        run_config=RunConfig(stream_buffer_size=5, stream_buffer_policy=policy),
+    )
+
+    text = ""
+    run_items = []
+    async for event in result.stream_events():
+        if event.type == "raw_response_event" and event.data.type == "response.output_text.delta":
+            text += event.data.delta
+        elif event.type == "run_item_stream_event":
+            run_items.append(event.name)
+        await asyncio.sleep(0)
+
+    assert run_items == ["message_output_created"]
+    assert result.final_output == "done"
+    assert result.buffer_stats.raw_high_water_mark <= 6
+    expected = "".join(str(i % 10) for i in range(50))
+    if policy == "drop":
+        assert result.buffer_stats.dropped > 0
+        assert len(text) == 50 - result.buffer_stats.dropped
+    else:
+        assert text == expected
+
+
+def test_coalescer_flushes_by_count_and_at_boundaries():
+    coalescer = TextDeltaCoalescer(TextDeltaCoalescing(max_deltas=3, max_interval=60))
+    emitted = []
+    for delta in "abcd":
+        emitted.extend(coalescer.add(text_delta(delta).data))
+    assert [delta_of(e) for e in emitted] == ["abc"]
+
+    # A delta for another item, or any other event, flushes the pending deltas first
+    emitted = coalescer.add(text_delta("x", item_id="2").data)
+    assert [delta_of(e) for e in emitted] == ["d"]
+    added = item_added().data
+    assert [getattr(e, "delta", e) for e in coalescer.add(added)] == ["x", added]
+    assert coalescer.flush() == []
+
+
+def test_coalescer_flushes_by_interval():
+    coalescer = TextDeltaCoalescer(TextDeltaCoalescing(max_deltas=100, max_interval=0))
+    assert [delta_of(e) for e in coalescer.add(text_delta("a").data)] == ["a"]
+
+
+@pytest.mark.asyncio
+async def test_streamed_run_with_text_delta_coalescing():
+    model = ManyDeltasModel(50)
+    model.set_next_output([get_text_message("done")])
+    result = Runner.run_streamed(
+        Agent(name="test", model=model),
+        input="hi",
+        run_config=RunConfig(text_delta_coalescing=TextDeltaCoalescing(max_interval=60)),
+    )
+
+    deltas = []
+    completed = None
+    async for event in result.stream_events():
+        if event.type == "raw_response_event":
+            if event.data.type == "response.output_text.delta":
+                deltas.append(event.data.delta)
+            elif event.data.type == "response.completed":
+                completed = event.data
+
+    assert [len(d) for d in deltas] == [16, 16, 16, 2]
+    assert "".join(deltas) == "".join(str(i % 10) for i in range(50))
+    assert completed is not None
+    assert completed.response.output[0].content[0].text == "done"  # type: ignore[union-attr]
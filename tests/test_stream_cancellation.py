@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+from typing import Any
+
+import pytest
+from openai.types.chat.chat_completion_chunk import ChatCompletionChunk, Choice, ChoiceDelta
+from openai.types.responses import Response
+
+from agents import Agent, AgentSpanData, RunConfig, Runner, RunResultStreaming
+from agents.items import TResponseStreamEvent
+from agents.model_settings import ModelSettings
+from agents.models.interface import ModelTracing
+from agents.models.openai_chatcompletions import OpenAIChatCompletionsModel
+from agents.models.openai_provider import OpenAIProvider
+
+from .fake_model import FakeModel
+from .test_responses import get_text_message
+from .test_stream_buffer import text_delta
+from .testing_processor import fetch_events, fetch_ordered_spans, fetch_traces
+
+
+class EndlessModel(FakeModel):
+    """Streams text deltas until it's closed, and records that it was."""
+
+    def __init__(self) -> None:
+        super().__init__(tracing_enabled=True)
+        self.deltas_sent = 0
+        self.closed = False
+
+    async def stream_response(
+        self, *args: Any, **kwargs: Any
+    ) -> AsyncIterator[TResponseStreamEvent]:
+        try:
+            while True:
+                await asyncio.sleep(0)
+                self.deltas_sent += 1
+                yield text_delta("a").data
+        finally:
+            self.closed = True
+
+
+async def wait_for_run(result: RunResultStreaming) -> None:
+    assert result._run_impl_task
+    await asyncio.wait([result._run_impl_task])
+
+
+@pytest.mark.asyncio
+async def test_cancel_stops_the_run_and_closes_the_model_stream():
+    model = EndlessModel()
+    result = Runner.run_streamed(Agent(name="test", model=model), input="hi")
+
+    events = 0
+    async for _ in result.stream_events():
+        events += 1
+        if events == 5:
+            result.cancel()
+
+    await wait_for_run(result)
+    assert result.is_cancelled
+    assert result.is_complete
+    assert model.closed
+    assert model.deltas_sent < 20
+    # The cut short request is counted, but its tokens aren't known
+    assert result.usage.requests == 1
+    assert result.usage.cancelled_requests == 1
+    assert result.usage.total_tokens == 0
+
+    # The trace and spans are finished, with the cancellation recorded
+    assert len(fetch_traces()) == 1
+    assert fetch_events()[-1] == "trace_end"
+    (agent_span,) = fetch_ordered_spans()
+    assert isinstance(agent_span.span_data, AgentSpanData)
+    assert agent_span.error and agent_span.error["message"] == "Run cancelled"
+
+    # Cancelling again, or after the run ended, does nothing
+    result.cancel()
+
+
+@pytest.mark.asyncio
+async def test_consumer_that_stops_reading_cancels_the_run():
+    model = EndlessModel()
+    result = Runner.run_streamed(Agent(name="test", model=model), input="hi")
+
+    events = result.stream_events()
+    async for event in events:
+        if event.type == "raw_response_event":
+            break
+    await events.aclose()  # type: ignore[attr-defined]
+
+    await wait_for_run(result)
+    assert result.is_cancelled
+    assert model.closed
+    assert fetch_events()[-1] == "trace_end"
+
+
+@pytest.mark.asyncio
+async def test_cancel_while_the_run_waits_for_a_slow_consumer():
+    model = EndlessModel()
+    result = Runner.run_streamed(
+        Agent(name="test", model=model), input="hi", run_config=RunConfig(stream_buffer_size=2)
+    )
+
+    # Nobody reads the events, so the run blocks once the buffer is full
+    await asyncio.sleep(0.01)
+    assert model.deltas_sent <= 3
+    assert not model.closed
+
+    result.cancel()
+    await asyncio.sleep(0)
+    assert model.closed
+    assert [event async for event in result.stream_events()]  # The buffered events are kept
+
+
+@pytest.mark.asyncio
+async def test_completed_runs_are_not_cancelled():
+    model = FakeModel()
+    model.set_next_output([get_text_message("done")])
+    result = Runner.run_streamed(Agent(name="test", model=model), input="hi")
+    async for _ in result.stream_events():
+        pass
+
+    result.cancel()
+    assert not result.is_cancelled
+    assert result.final_output == "done"
+
+
+@pytest.mark.allow_call_model_methods
+@pytest.mark.asyncio
+async def test_chatcompletions_model_closes_its_stream(monkeypatch) -> None:
+    class FakeStream:
+        def __init__(self) -> None:
+            self.closed = False
+
+        def __aiter__(self) -> FakeStream:
+            return self
+
+        async def __anext__(self) -> ChatCompletionChunk:
+            return ChatCompletionChunk(
+                id="chunk-id",
+                created=1,
+                model="fake",
+                object="chat.completion.chunk",
+                choices=[Choice(index=0, delta=ChoiceDelta(content="a"))],
+            )
+
+        async def close(self) -> None:
+            self.closed = True
+
+    stream = FakeStream()
+
+    async def patched_fetch_response(self, *args, **kwargs):
+        resp = Response(
+            id="resp-id",
+            created_at=0,
+            model="fake-model",
+            object="response",
+            output=[],
+            tool_choice="none",
+            tools=[],
+            parallel_tool_calls=False,
+        )
+        return resp, stream
+
+    monkeypatch.setattr(OpenAIChatCompletionsModel, "_fetch_response", patched_fetch_response)
+    model = OpenAIProvider(use_responses=False).get_model("gpt-4")
+    events = model.stream_response(
+        system_instructions=None,
+        input="",
+        model_settings=ModelSettings(),
+        tools=[],
+        output_schema=None,
+        handoffs=[],
+        tracing=ModelTracing.DISABLED,
+    )
+    async for _ in events:
+        break
+    assert not stream.closed
+
+    await events.aclose()  # type: ignore[attr-defined]
+    assert stream.closed
+
+
+@pytest.mark.asyncio
+async def test_cancel_before_the_run_starts():
+    model = EndlessModel()
+    result = Runner.run_streamed(Agent(name="test", model=model), input="hi")
+    result.cancel()
+
+    assert [event async for event in result.stream_events()] == []
+    await wait_for_run(result)
+    assert model.deltas_sent == 0
+    assert fetch_events()[-1] == "trace_end"
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+
+import pytest
+from openai.types.chat.chat_completion_chunk import ChatCompletionChunk, Choice, ChoiceDelta
+from openai.types.completion_usage import CompletionUsage
+from openai.types.responses import Response
+
+from agents import Agent, Runner
+from agents.model_settings import ModelSettings
+from agents.models.interface import ModelTracing, _subscribed_stream_events, is_stream_event_wanted
+from agents.models.openai_chatcompletions import OpenAIChatCompletionsModel
+from agents.models.openai_provider import OpenAIProvider
+from agents.stream_events import RawResponsesStreamEvent, RunItemStreamEvent
+
+from .fake_model import FakeModel
+from .test_responses import get_function_tool, get_function_tool_call, get_text_message
+from .test_stream_buffer import ManyDeltasModel
+
+
+def tool_agent() -> Agent:
+    model = FakeModel()
+    model.add_multiple_turn_outputs([[get_function_tool_call("foo")], [get_text_message("done")]])
+    return Agent(name="test", model=model, tools=[get_function_tool("foo", "result")])
+
+
+@pytest.mark.asyncio
+async def test_run_streamed_only_buffers_subscribed_event_types():
+    result = Runner.run_streamed(tool_agent(), input="hi", events={"run_item_stream_event"})
+    events = [event async for event in result.stream_events()]
+
+    assert events
+    item_events = [event for event in events if isinstance(event, RunItemStreamEvent)]
+    assert item_events == events
+    assert [event.name for event in item_events] == [
+        "tool_called",
+        "tool_output",
+        "message_output_created",
+    ]
+    assert result.final_output == "done"
+
+
+@pytest.mark.asyncio
+async def test_run_streamed_filters_by_item_name_and_raw_type():
+    result = Runner.run_streamed(tool_agent(), input="hi", events={"tool_output"})
+    events = [event async for event in result.stream_events()]
+    assert [event.name for event in events if isinstance(event, RunItemStreamEvent)] == [
+        "tool_output"
+    ]
+    assert len(events) == 1
+
+    model = ManyDeltasModel(3)
+    model.set_next_output([get_text_message("012")])
+    agent = Agent(name="test", model=model)
+    result = Runner.run_streamed(agent, input="hi", events={"response.output_text.delta"})
+    events = [event async for event in result.stream_events()]
+    assert all(isinstance(event, RawResponsesStreamEvent) for event in events)
+    assert [event.data.delta for event in events] == ["0", "1", "2"]  # type: ignore
+
+
+@pytest.mark.asyncio
+async def test_stream_events_include_filters_while_consuming():
+    result = Runner.run_streamed(tool_agent(), input="hi")
+    events = [event async for event in result.stream_events(include={"tool_called"})]
+    assert [event.name for event in events] == ["tool_called"]  # type: ignore
+    assert result.is_complete
+
+
+def test_is_stream_event_wanted():
+    assert is_stream_event_wanted("response.output_text.delta")
+
+    token = _subscribed_stream_events.set(frozenset({"run_item_stream_event"}))
+    try:
+        assert not is_stream_event_wanted("response.output_text.delta")
+        # The runner always needs the completed response
+        assert is_stream_event_wanted("response.completed")
+    finally:
+        _subscribed_stream_events.reset(token)
+
+    token = _subscribed_stream_events.set(frozenset({"raw_response_event"}))
+    try:
+        assert is_stream_event_wanted("response.output_text.delta")
+    finally:
+        _subscribed_stream_events.reset(token)
+
+
+@pytest.mark.allow_call_model_methods
+@pytest.mark.asyncio
+async def test_chatcompletions_model_skips_unsubscribed_events(monkeypatch) -> None:
+    chunks = [
+        ChatCompletionChunk(
+            id="chunk-id",
+            created=1,
+            model="fake",
+            object="chat.completion.chunk",
+            choices=[Choice(index=0, delta=ChoiceDelta(content=content))],
+            usage=usage,
+        )
+        for content, usage in [
+            ("He", None),
+            ("llo", CompletionUsage(completion_tokens=5, prompt_tokens=7, total_tokens=12)),
+        ]
+    ]
+
+    async def fake_stream() -> AsyncIterator[ChatCompletionChunk]:
+        for chunk in chunks:
+            yield chunk
+
+    async def patched_fetch_response(self, *args, **kwargs):
+        resp = Response(
+            id="resp-id",
+            created_at=0,
+            model="fake-model",
+            object="response",
+            output=[],
+            tool_choice="none",
+            tools=[],
+            parallel_tool_calls=False,
+        )
+        return resp, fake_stream()
+
+    monkeypatch.setattr(OpenAIChatCompletionsModel, "_fetch_response", patched_fetch_response)
+    model = OpenAIProvider(use_responses=False).get_model("gpt-4")
+
+    token = _subscribed_stream_events.set(frozenset({"response.output_text.delta"}))
+    try:
+        output_events = [
+            event
+            async for event in model.stream_response(
+                system_instructions=None,
+                input="",
+                model_settings=ModelSettings(),
+                tools=[],
+                output_schema=None,
+                handoffs=[],
+                tracing=ModelTracing.DISABLED,
+            )
+        ]
+    finally:
+        _subscribed_stream_events.reset(token)
+
+    assert [event.type for event in output_events] == [
+        "response.output_text.delta",
+        "response.output_text.delta",
+        "response.completed",
+    ]
+    # The completed response is still built in full
+    assert output_events[-1].response.output[0].content[0].text == "Hello"  # type: ignore
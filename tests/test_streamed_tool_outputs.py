@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from openai.types.responses import ResponseFunctionToolCall
+
+from agents import Agent, RunItemStreamEvent, Runner, ToolCallOutputItem, function_tool
+
+from .fake_model import FakeModel
+from .test_responses import get_text_message
+
+
+def tool_call(name: str, call_id: str) -> ResponseFunctionToolCall:
+    return ResponseFunctionToolCall(
+        id=call_id, call_id=call_id, type="function_call", name=name, arguments=""
+    )
+
+
+def agent_with_slow_and_fast_tools(release_slow: asyncio.Event) -> Agent:
+    @function_tool
+    async def slow() -> str:
+        await release_slow.wait()
+        return "slow result"
+
+    @function_tool
+    async def fast() -> str:
+        return "fast result"
+
+    model = FakeModel()
+    model.add_multiple_turn_outputs(
+        [
+            [tool_call("slow", "call_slow"), tool_call("fast", "call_fast")],
+            [get_text_message("done")],
+        ]
+    )
+    return Agent(name="test", model=model, tools=[slow, fast])
+
+
+@pytest.mark.asyncio
+async def test_tool_outputs_are_streamed_as_each_tool_completes():
+    release_slow = asyncio.Event()
+    result = Runner.run_streamed(agent_with_slow_and_fast_tools(release_slow), input="hi")
+
+    events: list[tuple[str, str | None]] = []
+    async for event in result.stream_events():
+        if not isinstance(event, RunItemStreamEvent):
+            continue
+        events.append((event.name, event.call_id))
+        if event.name == "tool_output" and event.call_id == "call_fast":
+            # The fast tool's output arrives while the slow tool is still running
+            release_slow.set()
+
+    assert events == [
+        ("tool_called", "call_slow"),
+        ("tool_called", "call_fast"),
+        ("tool_output", "call_fast"),
+        ("tool_output", "call_slow"),
+        ("message_output_created", None),
+    ]
+
+    # The run's items keep the order of the tool calls
+    outputs = [item for item in result.new_items if isinstance(item, ToolCallOutputItem)]
+    assert [item.output for item in outputs] == ["slow result", "fast result"]
+    assert result.final_output == "done"
+
+
+@pytest.mark.asyncio
+async def test_non_streamed_run_keeps_tool_call_order():
+    release_slow = asyncio.Event()
+    agent = agent_with_slow_and_fast_tools(release_slow)
+    release_slow.set()
+
+    result = await Runner.run(agent, input="hi")
+    outputs = [item for item in result.new_items if isinstance(item, ToolCallOutputItem)]
+    assert [item.output for item in outputs] == ["slow result", "fast result"]
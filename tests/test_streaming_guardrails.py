@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from collections.abc import AsyncIterator
+from typing import Any
+
+import pytest
+from pydantic import BaseModel
+
+from agents import (
+    Agent,
+    GuardrailFunctionOutput,
+    OutputGuardrailTripwireTriggered,
+    RunContextWrapper,
+    Runner,
+    output_guardrail,
+)
+from agents.items import TResponseStreamEvent
+
+from .fake_model import FakeModel
+from .test_responses import get_final_output_message, get_text_message
+from .test_stream_buffer import text_delta
+
+
+class SlowDeltasModel(FakeModel):
+    """Streams the output text a few characters at a time, yielding to the event loop in between,
+    and counts how many deltas were sent."""
+
+    def __init__(self, text: str, chunk_size: int = 5):
+        super().__init__()
+        self.text = text
+        self.chunk_size = chunk_size
+        self.sent = 0
+
+    async def stream_response(
+        self, *args: Any, **kwargs: Any
+    ) -> AsyncIterator[TResponseStreamEvent]:
+        for i in range(0, len(self.text), self.chunk_size):
+            await asyncio.sleep(0)
+            self.sent += 1
+            yield text_delta(self.text[i : i + self.chunk_size]).data
+        async for event in super().stream_response(*args, **kwargs):
+            yield event
+
+
+checked_outputs: list[Any] = []
+
+
+@output_guardrail(streaming_check_interval=20)
+def no_secrets(context: RunContextWrapper[Any], agent: Agent[Any], output: Any):
+    checked_outputs.append(output)
+    text = output if isinstance(output, str) else json.dumps(output.model_dump())
+    return GuardrailFunctionOutput(output_info=None, tripwire_triggered="SECRET" in text)
+
+
+@pytest.fixture(autouse=True)
+def clear_checked_outputs():
+    checked_outputs.clear()
+
+
+@pytest.mark.asyncio
+async def test_tripped_streaming_guardrail_stops_the_model_stream():
+    text = "a" * 100 + "SECRET" + "b" * 1000
+    model = SlowDeltasModel(text)
+    model.set_next_output([get_text_message(text)])
+    agent = Agent(name="test", model=model, output_guardrails=[no_secrets])
+
+    result = Runner.run_streamed(agent, input="hi")
+    with pytest.raises(OutputGuardrailTripwireTriggered) as exc_info:
+        async for _ in result.stream_events():
+            pass
+
+    assert exc_info.value.guardrail_result.guardrail is no_secrets
+    # The stream was abandoned long before the model finished
+    assert model.sent < 40
+    assert result.final_output is None
+    # The guardrail saw the text generated so far
+    assert all(isinstance(output, str) for output in checked_outputs)
+    assert "SECRET" in checked_outputs[-1]
+    assert len(checked_outputs[-1]) < len(text)
+
+
+@pytest.mark.asyncio
+async def test_streaming_guardrail_that_passes_also_checks_the_final_output():
+    text = "a" * 100
+    model = SlowDeltasModel(text)
+    model.set_next_output([get_text_message(text)])
+    agent = Agent(name="test", model=model, output_guardrails=[no_secrets])
+
+    result = Runner.run_streamed(agent, input="hi")
+    async for _ in result.stream_events():
+        pass
+
+    assert model.sent == 20
+    assert result.final_output == text
+    assert len(result.output_guardrail_results) == 1
+    # Checked while streaming, and once more on the final output
+    assert 1 < len(checked_outputs) <= 6
+    assert checked_outputs[-1] == text
+
+
+class Answer(BaseModel):
+    answer: str
+
+
+@pytest.mark.asyncio
+async def test_streaming_guardrail_receives_partial_structured_outputs():
+    text = json.dumps({"answer": "a" * 100 + "SECRET" + "b" * 1000})
+    model = SlowDeltasModel(text)
+    model.set_next_output([get_final_output_message(text)])
+    agent = Agent(name="test", model=model, output_type=Answer, output_guardrails=[no_secrets])
+
+    result = Runner.run_streamed(agent, input="hi")
+    with pytest.raises(OutputGuardrailTripwireTriggered):
+        async for _ in result.stream_events():
+            pass
+
+    assert model.sent < 40
+    assert checked_outputs
+    assert all(isinstance(output, Answer) for output in checked_outputs)
+
+
+@pytest.mark.asyncio
+async def test_guardrails_without_interval_only_check_the_final_output():
+    calls = []
+
+    @output_guardrail
+    def final_only(context: RunContextWrapper[Any], agent: Agent[Any], output: Any):
+        calls.append(output)
+        return GuardrailFunctionOutput(output_info=None, tripwire_triggered=False)
+
+    text = "a" * 100
+    model = SlowDeltasModel(text)
+    model.set_next_output([get_text_message(text)])
+    agent = Agent(name="test", model=model, output_guardrails=[final_only])
+
+    result = Runner.run_streamed(agent, input="hi")
+    async for _ in result.stream_events():
+        pass
+    assert calls == [text]
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from agents import (
+    Agent,
+    RunConfig,
+    RunContextWrapper,
+    Runner,
+    ToolOutputPolicy,
+    ToolOutputStore,
+    function_tool,
+)
+from agents.items import ToolCallOutputItem
+
+from .fake_model import FakeModel
+from .test_responses import get_function_tool_call, get_text_message
+
+LONG_OUTPUT = "".join(f"line {i}\n" for i in range(1000))
+
+
+def test_store_is_content_addressed(tmp_path: Path):
+    store = ToolOutputStore(tmp_path)
+    handle = store.put(LONG_OUTPUT)
+    assert handle == hashlib.sha256(LONG_OUTPUT.encode()).hexdigest()
+    # Storing the same output again (e.g. from another run) reuses the file
+    assert ToolOutputStore(tmp_path).put(LONG_OUTPUT) == handle
+    assert [path.name for path in tmp_path.iterdir()] == [f"{handle}.txt"]
+
+    assert store.get(handle) == LONG_OUTPUT
+    assert store.get("0" * 64) is None
+    assert store.get("../" + handle) is None
+
+
+@pytest.mark.asyncio
+async def test_policy_replaces_long_outputs_with_a_preview(tmp_path: Path):
+    policy = ToolOutputPolicy(max_chars=100, preview_chars=20, store=ToolOutputStore(tmp_path))
+    assert await policy.apply("short") == "short"
+
+    preview = await policy.apply(LONG_OUTPUT)
+    handle = hashlib.sha256(LONG_OUTPUT.encode()).hexdigest()
+    assert preview.startswith(LONG_OUTPUT[:20] + "\n\n[Output truncated")
+    assert f'handle "{handle}"' in preview
+    assert f"of {len(LONG_OUTPUT)} characters" in preview
+
+
+@pytest.mark.asyncio
+async def test_retrieval_tool_pages_through_stored_outputs(tmp_path: Path):
+    store = ToolOutputStore(tmp_path)
+    policy = ToolOutputPolicy(page_chars=5000, store=store)
+    handle = store.put(LONG_OUTPUT)
+    tool = policy.retrieval_tool
+    assert policy.retrieval_tool is tool
+    ctx = RunContextWrapper(None)
+
+    first = await tool.on_invoke_tool(ctx, json.dumps({"handle": handle, "offset": 0}))
+    assert first.startswith(LONG_OUTPUT[:5000])
+    assert "call read_stored_tool_output again with offset=5000" in first
+
+    last = await tool.on_invoke_tool(ctx, json.dumps({"handle": handle, "offset": 5000}))
+    assert last.startswith(LONG_OUTPUT[5000:])
+    assert "End of output" in last
+
+    missing = await tool.on_invoke_tool(ctx, json.dumps({"handle": "nope", "offset": 0}))
+    assert missing == 'There is no stored output with handle "nope".'
+
+
+class ToolCapturingModel(FakeModel):
+    def __init__(self):
+        super().__init__()
+        self.sent_tools: list[list[str]] = []
+        self.sent_input: list[list[Any]] = []
+
+    async def get_response(self, *args, **kwargs):
+        self.sent_tools.append([tool.name for tool in kwargs["tools"]])
+        self.sent_input.append(kwargs["input"])
+        return await super().get_response(*args, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_runner_offloads_long_outputs(tmp_path: Path):
+    @function_tool
+    def read_logs() -> str:
+        return LONG_OUTPUT
+
+    handle = hashlib.sha256(LONG_OUTPUT.encode()).hexdigest()
+    model = ToolCapturingModel()
+    model.add_multiple_turn_outputs(
+        [
+            [get_function_tool_call("read_logs", "{}")],
+            [
+                get_function_tool_call(
+                    "read_stored_tool_output", json.dumps({"handle": handle, "offset": 100})
+                )
+            ],
+            [get_text_message("done")],
+        ]
+    )
+    agent = Agent(name="test", model=model, tools=[read_logs])
+    policy = ToolOutputPolicy(
+        max_chars=1000, preview_chars=100, page_chars=50, store=ToolOutputStore(tmp_path)
+    )
+
+    result = await Runner.run(agent, input="hi", run_config=RunConfig(tool_output_policy=policy))
+    assert result.final_output == "done"
+    assert model.sent_tools[0] == ["read_logs", "read_stored_tool_output"]
+
+    logs_output, page_output = [
+        item for item in result.new_items if isinstance(item, ToolCallOutputItem)
+    ]
+    # The item has the whole output, but only the preview is sent to the model
+    assert logs_output.output == LONG_OUTPUT
+    sent = logs_output.raw_item["output"]
+    assert isinstance(sent, str)
+    assert sent.startswith(LONG_OUTPUT[:100] + "\n\n[Output truncated")
+    assert model.sent_input[1][-1]["output"] == sent
+    assert page_output.output.startswith(LONG_OUTPUT[100:150] + "\n\n[Characters 100 to 150")
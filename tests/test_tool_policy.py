@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+import pytest
+
+from agents import Agent, RunContextWrapper, Runner, ToolPolicy, UserError, function_tool
+from agents.items import ToolCallOutputItem
+from agents.tracing.span_data import FunctionSpanData
+
+from .fake_model import FakeModel
+from .test_responses import get_function_tool_call, get_text_message
+from .testing_processor import fetch_ordered_spans
+
+
+async def _noop() -> str:
+    return "ok"
+
+
+async def _fail() -> str:
+    raise ValueError("boom")
+
+
+def circuit_state(policy: ToolPolicy) -> str:
+    # Read through a function, so that mypy doesn't narrow the state between assertions
+    return policy.circuit_state
+
+
+@pytest.mark.asyncio
+async def test_max_concurrency_limits_concurrent_calls():
+    policy = ToolPolicy(max_concurrency=2)
+    running = 0
+    peak = 0
+
+    async def invoke() -> str:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return "ok"
+
+    decisions: list[dict[str, Any]] = [{} for _ in range(6)]
+    results = await asyncio.gather(*[policy.run("tool", invoke, d) for d in decisions])
+    assert results == ["ok"] * 6
+    assert peak == 2
+    assert all(d["decision"] == "succeeded" for d in decisions)
+    assert max(d["queued_seconds"] for d in decisions) > 0
+
+
+@pytest.mark.asyncio
+async def test_bulkhead_rejects_calls_beyond_the_queue():
+    policy = ToolPolicy(max_concurrency=1, max_queued=1)
+    release = asyncio.Event()
+
+    async def invoke() -> str:
+        await release.wait()
+        return "ok"
+
+    running = asyncio.create_task(policy.run("tool", invoke, {}))
+    queued = asyncio.create_task(policy.run("tool", invoke, {}))
+    await asyncio.sleep(0)
+
+    decisions: dict[str, Any] = {}
+    rejected = await policy.run("tool", invoke, decisions)
+    assert decisions["decision"] == "rejected_bulkhead_full"
+    assert "busy" in rejected
+
+    release.set()
+    assert list(await asyncio.gather(running, queued)) == ["ok", "ok"]
+
+    # Tools with their own policies are isolated from each other
+    assert await ToolPolicy(max_concurrency=1, max_queued=0).run("other", _noop, {}) == "ok"
+
+
+@pytest.mark.asyncio
+async def test_timeout_returns_an_error_message():
+    policy = ToolPolicy(timeout=0.01)
+
+    async def hang() -> str:
+        await asyncio.sleep(10)
+        return "never"
+
+    decisions: dict[str, Any] = {}
+    result = await policy.run("slow_tool", hang, decisions)
+    assert result == "Tool slow_tool timed out after 0.01 seconds."
+    assert decisions["decision"] == "timed_out"
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_opens_and_recovers():
+    policy = ToolPolicy(failure_threshold=2, reset_timeout=0.05)
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            await policy.run("tool", _fail, {})
+    assert circuit_state(policy) == "open"
+
+    decisions: dict[str, Any] = {}
+    result = await policy.run("tool", _noop, decisions)
+    assert "temporarily unavailable" in result
+    assert decisions == {"circuit": "open", "decision": "rejected_circuit_open"}
+
+    await asyncio.sleep(0.06)
+    assert circuit_state(policy) == "half_open"
+    # A failed trial call opens the circuit again
+    with pytest.raises(ValueError):
+        await policy.run("tool", _fail, {})
+    assert circuit_state(policy) == "open"
+
+    await asyncio.sleep(0.06)
+    decisions = {}
+    assert await policy.run("tool", _noop, decisions) == "ok"
+    assert decisions == {"circuit": "half_open", "decision": "succeeded"}
+    assert circuit_state(policy) == "closed"
+
+
+@pytest.mark.asyncio
+async def test_handled_tool_errors_count_as_failures():
+    policy = ToolPolicy(failure_threshold=1)
+
+    @function_tool(policy=policy)
+    def flaky() -> str:
+        raise ValueError("downstream is down")
+
+    assert flaky.policy is policy
+    ctx = RunContextWrapper(None)
+    decisions: dict[str, Any] = {}
+    result = await policy.run("flaky", lambda: flaky.on_invoke_tool(ctx, "{}"), decisions)
+    assert "downstream is down" in result
+    assert decisions["decision"] == "failed"
+    assert circuit_state(policy) == "open"
+
+
+def test_invalid_policies_raise():
+    with pytest.raises(UserError):
+        ToolPolicy(max_concurrency=0)
+    with pytest.raises(UserError):
+        ToolPolicy(failure_threshold=0)
+
+
+@pytest.mark.asyncio
+async def test_policy_decisions_are_sent_to_model_and_recorded_on_span():
+    @function_tool(policy=ToolPolicy(timeout=0.01))
+    async def slow_tool() -> str:
+        await asyncio.sleep(10)
+        return "never"
+
+    model = FakeModel()
+    model.add_multiple_turn_outputs(
+        [
+            [get_function_tool_call("slow_tool", "{}")],
+            [get_text_message("done")],
+        ]
+    )
+    agent = Agent(name="test", model=model, tools=[slow_tool])
+
+    result = await Runner.run(agent, input="go")
+    assert result.final_output == "done"
+    outputs = [item for item in result.new_items if isinstance(item, ToolCallOutputItem)]
+    assert outputs[0].output == "Tool slow_tool timed out after 0.01 seconds."
+
+    spans = [span for span in fetch_ordered_spans() if isinstance(span.span_data, FunctionSpanData)]
+    assert spans[0].span_data.policy == {"decision": "timed_out"}
+    exported = spans[0].export()
+    assert exported is not None
+    assert exported["span_data"]["policy"] == {"decision": "timed_out"}
+    assert spans[0].error is not None
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+import pytest
+
+from agents import (
+    Agent,
+    RunConfig,
+    RunContextWrapper,
+    Runner,
+    ToolCallOutputItem,
+    ToolProgressStreamEvent,
+    function_tool,
+    report_tool_progress,
+)
+from agents.tool_progress import ToolProgressReporter, set_tool_progress_reporter
+
+from .fake_model import FakeModel
+from .test_responses import get_function_tool_call, get_text_message
+
+
+@function_tool
+async def count_to(n: int):
+    for i in range(1, n + 1):
+        await asyncio.sleep(0)
+        yield f"{i} of {n}"
+    await asyncio.sleep(0)
+    yield f"counted to {n}"
+
+
+def agent_with_tool(tool: Any) -> Agent:
+    model = FakeModel()
+    model.add_multiple_turn_outputs(
+        [
+            [get_function_tool_call(tool.name, '{"n": 3}')],
+            [get_text_message("done")],
+        ]
+    )
+    return Agent(name="test", model=model, tools=[tool])
+
+
+@pytest.mark.asyncio
+async def test_yields_are_streamed_as_progress_and_the_last_is_the_output():
+    result = Runner.run_streamed(
+        agent_with_tool(count_to), input="go", run_config=RunConfig(tool_progress_interval=0)
+    )
+    progress = []
+    async for event in result.stream_events():
+        if isinstance(event, ToolProgressStreamEvent):
+            assert event.tool_name == "count_to"
+            assert event.agent.name == "test"
+            progress.append(event.progress)
+
+    assert progress == ["1 of 3", "2 of 3", "3 of 3"]
+    outputs = [item for item in result.new_items if isinstance(item, ToolCallOutputItem)]
+    assert outputs[0].output == "counted to 3"
+
+
+@pytest.mark.asyncio
+async def test_non_streamed_runs_only_get_the_output():
+    result = await Runner.run(agent_with_tool(count_to), input="go")
+    outputs = [item for item in result.new_items if isinstance(item, ToolCallOutputItem)]
+    assert outputs[0].output == "counted to 3"
+    assert result.final_output == "done"
+
+
+@pytest.mark.asyncio
+async def test_progress_is_rate_limited_to_the_latest_value():
+    sent: list[Any] = []
+    reporter = ToolProgressReporter(sent.append, interval=0.05)
+    for i in range(10):
+        reporter.report(i)
+    await asyncio.sleep(0)
+    assert sent == [9]
+
+    # Within the interval, only the latest progress is kept, and sent once the interval passes
+    reporter.report(10)
+    reporter.report(11)
+    await asyncio.sleep(0)
+    assert sent == [9]
+    await asyncio.sleep(0.06)
+    assert sent == [9, 11]
+
+    # Progress that hasn't been sent when the tool completes is discarded
+    reporter.report(12)
+    reporter.discard_pending()
+    await asyncio.sleep(0.06)
+    assert sent == [9, 11]
+
+
+@pytest.mark.asyncio
+async def test_report_tool_progress_from_a_regular_tool():
+    @function_tool
+    async def download(n: int) -> str:
+        report_tool_progress({"percent": 50})
+        await asyncio.sleep(0.01)
+        return "downloaded"
+
+    sent: list[Any] = []
+    set_tool_progress_reporter(ToolProgressReporter(sent.append, interval=0))
+    try:
+        output = await download.on_invoke_tool(RunContextWrapper(None), '{"n": 1}')
+    finally:
+        set_tool_progress_reporter(None)
+    assert output == "downloaded"
+    assert sent == [{"percent": 50}]
+
+
+@pytest.mark.asyncio
+async def test_generator_that_yields_nothing_is_an_error():
+    @function_tool
+    async def empty(n: int):
+        if n > 0:
+            yield "never"
+
+    output = await empty.on_invoke_tool(RunContextWrapper(None), '{"n": 0}')
+    assert "didn't yield an output" in output
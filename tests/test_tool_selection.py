@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import json
+from typing import Any
+
+import pytest
+
+from agents import (
+    Agent,
+    FunctionTool,
+    ModelSettings,
+    Runner,
+    Tool,
+    ToolSelection,
+    WebSearchTool,
+    function_tool,
+)
+from agents.items import TResponseInputItem
+
+from .fake_model import FakeModel
+from .test_responses import get_function_tool_call, get_text_message
+
+DESCRIPTIONS = {
+    "refund_order": "Refund a customer's order and return the money to their card.",
+    "track_shipment": "Track where a shipment is, given its tracking number.",
+    "get_weather": "Get the weather forecast for a city.",
+    "book_flight": "Book a flight between two airports.",
+    "cancel_subscription": "Cancel a customer's subscription at the end of the billing period.",
+    "translate_text": "Translate text into another language.",
+    "create_invoice": "Create an invoice for a customer.",
+    "reset_password": "Send a password reset email to a user.",
+}
+
+
+def make_tool(name: str, description: str) -> FunctionTool:
+    def tool(order_id: str) -> str:
+        return f"{name} done"
+
+    return function_tool(tool, name_override=name, description_override=description)
+
+
+def all_tools() -> list[Tool]:
+    return [make_tool(name, description) for name, description in DESCRIPTIONS.items()]
+
+
+def user(text: str) -> TResponseInputItem:
+    return {"role": "user", "content": text}
+
+
+def names(tools: list[Any]) -> list[str]:
+    return [tool.name for tool in tools]
+
+
+def test_selects_the_most_relevant_tools_in_their_original_order():
+    tools = all_tools()
+    selection = ToolSelection(top_k=2)
+
+    selected = selection.select(tools, [user("I want my money back for order 123, please refund")])
+    assert len(selected) == 2
+    assert "refund_order" in names(selected)
+
+    selected = selection.select(tools, [user("Will it rain in Paris tomorrow? Weather please")])
+    assert len(selected) == 2
+    assert "get_weather" in names(selected)
+
+    # With no matches, the first tools are sent
+    assert names(selection.select(tools, [user("hi")])) == ["refund_order", "track_shipment"]
+
+
+def test_always_sends_pinned_hosted_forced_and_recently_called_tools():
+    tools: list[Tool] = [*all_tools(), WebSearchTool()]
+    selection = ToolSelection(top_k=2, pinned=["reset_password"])
+    input: list[TResponseInputItem] = [
+        user("Where is my shipment?"),
+        {
+            "type": "function_call",
+            "name": "translate_text",
+            "arguments": "{}",
+            "call_id": "1",
+            "id": "1",
+        },
+        {"type": "function_call_output", "call_id": "1", "output": "Où est mon colis ?"},
+    ]
+
+    selected = selection.select(tools, input, ModelSettings(tool_choice="book_flight"))
+    assert names(selected) == [
+        "track_shipment",
+        "book_flight",
+        "translate_text",
+        "reset_password",
+        "web_search_preview",
+    ]
+
+
+def test_sends_every_tool_when_there_are_few_or_when_expanded():
+    tools = all_tools()
+    assert ToolSelection(top_k=len(tools)).select(tools, [user("hi")]) == tools
+    assert ToolSelection(top_k=1).select(tools, [user("hi")], expanded=True) == tools
+
+
+def test_index_is_only_rebuilt_when_the_tools_change():
+    tools = all_tools()
+    selection = ToolSelection(top_k=1)
+    selection.select(tools, [user("weather")])
+    index = selection._index
+
+    selection.select(list(tools), [user("refund")])
+    assert selection._index is index
+
+    selection.select([*tools, make_tool("new_tool", "Something new")], [user("refund")])
+    assert selection._index is not index
+
+
+class ToolCapturingModel(FakeModel):
+    def __init__(self):
+        super().__init__()
+        self.sent_tools: list[list[str]] = []
+
+    async def get_response(self, *args, **kwargs):
+        self.sent_tools.append(names(kwargs["tools"]))
+        return await super().get_response(*args, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_runner_sends_selected_tools_and_expands_on_unknown_tools():
+    model = ToolCapturingModel()
+    model.add_multiple_turn_outputs(
+        [
+            [get_function_tool_call("refund_order", json.dumps({"order_id": "1"}))],
+            [get_function_tool_call("issue_store_credit", json.dumps({"order_id": "1"}))],
+            [get_text_message("done")],
+        ]
+    )
+    agent = Agent(
+        name="test", model=model, tools=all_tools(), tool_selection=ToolSelection(top_k=1)
+    )
+
+    result = await Runner.run(agent, input="Please refund my order")
+    assert result.final_output == "done"
+
+    assert model.sent_tools[0] == ["refund_order"]
+    assert model.sent_tools[1] == ["refund_order"]
+    # The model called a tool the agent doesn't have, so it was sent every tool
+    assert model.sent_tools[2] == list(DESCRIPTIONS)
+    outputs = [item.output for item in result.new_items if item.type == "tool_call_output_item"]
+    assert outputs[0] == "refund_order done"
+    assert outputs[1].startswith("Tool issue_store_credit is not available")
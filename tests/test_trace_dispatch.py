@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any
+from unittest.mock import MagicMock
+
+from agents.tracing.dispatch import AsyncDispatchMultiTracingProcessor
+from agents.tracing.processor_interface import TracingProcessor
+from agents.tracing.processors import BatchTraceProcessor
+from agents.tracing.setup import TraceProvider
+from agents.tracing.span_data import AgentSpanData
+from agents.tracing.spans import Span, SpanImpl
+from agents.tracing.traces import Trace
+
+from .testing_processor import SpanProcessorForTests
+
+
+def get_span(processor: TracingProcessor) -> SpanImpl[AgentSpanData]:
+    return SpanImpl(
+        trace_id="test_trace_id",
+        span_id=None,
+        parent_id=None,
+        processor=processor,
+        span_data=AgentSpanData(name="test_agent"),
+    )
+
+
+class BlockingProcessor(SpanProcessorForTests):
+    """A processor whose span callbacks block until released."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.release = threading.Event()
+
+    def on_span_end(self, span: Span[Any]) -> None:
+        self.release.wait(timeout=5)
+        super().on_span_end(span)
+
+
+def test_slow_processor_does_not_block_caller():
+    slow = BlockingProcessor()
+    fast = SpanProcessorForTests()
+    multi = AsyncDispatchMultiTracingProcessor()
+    multi.set_processors([slow, fast])
+
+    span = get_span(multi)
+    start = time.monotonic()
+    span.start()
+    span.finish()
+    assert time.monotonic() - start < 0.5
+
+    slow.release.set()
+    multi.force_flush()
+
+    assert len(slow.get_ordered_spans()) == 1
+    assert len(fast.get_ordered_spans()) == 1
+    assert slow._events == ["span_start", "span_end"]
+    multi.shutdown()
+
+
+def test_cheap_builtin_processors_are_inline():
+    exporter = MagicMock()
+    batch = BatchTraceProcessor(exporter=exporter, schedule_delay=0.1)
+    custom = SpanProcessorForTests()
+    multi = AsyncDispatchMultiTracingProcessor()
+    multi.set_processors([batch, custom])
+
+    multi.on_span_end(get_span(multi))
+    # The batch processor got the span synchronously
+    assert batch._queue.qsize() == 1
+
+    stats = multi.stats()
+    assert [s.inline for s in stats] == [True, False]
+    multi.shutdown()
+
+
+def test_drop_newest_overflow_policy():
+    slow = BlockingProcessor()
+    multi = AsyncDispatchMultiTracingProcessor(max_buffer_size=2, overflow_policy="drop_newest")
+    multi.set_processors([slow])
+
+    spans = [get_span(multi) for _ in range(5)]
+    for span in spans:
+        multi.on_span_end(span)
+        # Give the worker a chance to pick up the first event, so it is in flight
+        time.sleep(0.01)
+
+    slow.release.set()
+    multi.force_flush()
+
+    stats = multi.stats()[0]
+    assert stats.dropped == 2
+    assert stats.delivered == 3
+    assert stats.high_water_mark == 2
+    # The oldest events were kept
+    assert [s.span_id for s in slow.get_ordered_spans(including_empty=True)] == [
+        s.span_id for s in spans[:3]
+    ]
+    multi.shutdown()
+
+
+def test_drop_oldest_overflow_policy():
+    slow = BlockingProcessor()
+    multi = AsyncDispatchMultiTracingProcessor(max_buffer_size=2, overflow_policy="drop_oldest")
+    multi.set_processors([slow])
+
+    spans = [get_span(multi) for _ in range(5)]
+    for span in spans:
+        multi.on_span_end(span)
+        time.sleep(0.01)
+
+    slow.release.set()
+    multi.force_flush()
+
+    delivered_ids = {s.span_id for s in slow._spans}
+    # The first span was in flight, and the last two were buffered
+    assert delivered_ids == {spans[0].span_id, spans[3].span_id, spans[4].span_id}
+    assert multi.stats()[0].dropped == 2
+    multi.shutdown()
+
+
+def test_lag_metrics_are_recorded():
+    slow = BlockingProcessor()
+    multi = AsyncDispatchMultiTracingProcessor()
+    multi.set_processors([slow])
+
+    multi.on_span_end(get_span(multi))
+    multi.on_span_end(get_span(multi))
+    time.sleep(0.05)
+    slow.release.set()
+    multi.force_flush()
+
+    stats = multi.stats()[0]
+    assert stats.delivered == 2
+    assert stats.queue_depth == 0
+    assert stats.max_lag >= 0.05
+    assert stats.total_lag >= stats.max_lag
+    multi.shutdown()
+
+
+def test_processor_errors_are_counted_and_isolated():
+    broken = SpanProcessorForTests()
+    broken.on_span_end = MagicMock(side_effect=RuntimeError("boom"))  # type: ignore[method-assign]
+    healthy = SpanProcessorForTests()
+    multi = AsyncDispatchMultiTracingProcessor()
+    multi.set_processors([broken, healthy])
+
+    multi.on_span_end(get_span(multi))
+    multi.force_flush()
+
+    assert multi.stats()[0].errors == 1
+    assert len(healthy.get_ordered_spans()) == 1
+    multi.shutdown()
+
+
+def test_trace_provider_swaps_multi_processor():
+    provider = TraceProvider()
+    processor = SpanProcessorForTests()
+    provider.set_processors([processor])
+
+    multi = AsyncDispatchMultiTracingProcessor()
+    provider.set_multi_processor(multi)
+
+    trace: Trace = provider.create_trace("test")
+    trace.start()
+    span = provider.create_span(AgentSpanData(name="agent"), parent=trace)
+    span.start()
+    span.finish()
+    trace.finish()
+    multi.force_flush()
+
+    assert processor._events == ["trace_start", "span_start", "span_end", "trace_end"]
+    multi.shutdown()
+
+
+def test_replacing_the_multi_processor_stops_the_previous_workers():
+    provider = TraceProvider()
+    processor = SpanProcessorForTests()
+    provider.set_processors([processor])
+
+    first = AsyncDispatchMultiTracingProcessor()
+    provider.set_multi_processor(first)
+    first.on_span_end(get_span(first))
+    workers = [dispatcher._worker_thread for dispatcher in first._dispatchers.values()]
+
+    second = AsyncDispatchMultiTracingProcessor()
+    provider.set_multi_processor(second)
+    for worker in workers:
+        worker.join(timeout=1)
+        assert not worker.is_alive()
+    # The event buffered by the previous processor was still delivered
+    assert processor._events == ["span_end"]
+    assert second.stats()[0].processor is processor
+    second.shutdown()
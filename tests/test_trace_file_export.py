@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import gzip
+import json
+import os
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+from agents.tracing.analyze import analyze_files, format_report, latency_stats, main
+from agents.tracing.processors import BatchTraceProcessor, FileSpanExporter
+from agents.tracing.span_data import (
+    AgentSpanData,
+    FunctionSpanData,
+    GenerationSpanData,
+    SpanData,
+)
+from agents.tracing.spans import SpanImpl
+from agents.tracing.traces import TraceImpl
+
+
+def make_trace(trace_id: str, workflow: str) -> TraceImpl:
+    return TraceImpl(
+        name=workflow, trace_id=trace_id, group_id=None, metadata=None, processor=MagicMock()
+    )
+
+
+def make_span(
+    trace_id: str,
+    span_id: str,
+    parent_id: str | None,
+    span_data: SpanData,
+    start: float,
+    end: float,
+) -> SpanImpl[Any]:
+    span = SpanImpl(
+        trace_id=trace_id,
+        span_id=span_id,
+        parent_id=parent_id,
+        processor=MagicMock(),
+        span_data=span_data,
+    )
+    span._started_at = f"2025-01-01T00:00:{start:09.6f}+00:00"
+    span._ended_at = f"2025-01-01T00:00:{end:09.6f}+00:00"
+    return span
+
+
+def write_sample_trace(exporter: FileSpanExporter, trace_id: str, offset: float = 0.0) -> None:
+    # agent (0-10) -> generation (0-3), function (3-9) -> nested generation (4-8), generation (9-10)
+    o = offset
+    exporter.export([make_trace(trace_id, "Weather workflow")])
+    exporter.export(
+        [
+            make_span(
+                trace_id,
+                f"{trace_id}_g1",
+                f"{trace_id}_a",
+                GenerationSpanData(model="gpt-4o", usage={"input_tokens": 10, "output_tokens": 5}),
+                o + 0,
+                o + 3,
+            ),
+            make_span(
+                trace_id,
+                f"{trace_id}_g2",
+                f"{trace_id}_f",
+                GenerationSpanData(model="gpt-4o", usage={"input_tokens": 7, "output_tokens": 3}),
+                o + 4,
+                o + 8,
+            ),
+            make_span(
+                trace_id,
+                f"{trace_id}_f",
+                f"{trace_id}_a",
+                FunctionSpanData(name="get_weather", input=None, output=None),
+                o + 3,
+                o + 9,
+            ),
+            make_span(
+                trace_id,
+                f"{trace_id}_a",
+                None,
+                AgentSpanData(name="Weather agent"),
+                o + 0,
+                o + 10,
+            ),
+        ]
+    )
+
+
+def test_file_exporter_writes_compact_jsonl(tmp_path):
+    exporter = FileSpanExporter(tmp_path)
+    write_sample_trace(exporter, "trace_1")
+    exporter.close()
+
+    [name] = os.listdir(tmp_path)
+    assert name.startswith("traces-") and name.endswith(".jsonl")
+    lines = (tmp_path / name).read_text().splitlines()
+    assert len(lines) == 5
+    assert json.loads(lines[0])["object"] == "trace"
+    assert ", " not in lines[1] and ": " not in lines[1]
+
+
+def test_file_exporter_compression(tmp_path):
+    exporter = FileSpanExporter(tmp_path, compress=True)
+    write_sample_trace(exporter, "trace_1")
+    exporter.close()
+
+    [name] = os.listdir(tmp_path)
+    assert name.endswith(".jsonl.gz")
+    with gzip.open(tmp_path / name, "rt") as f:
+        assert len(f.read().splitlines()) == 5
+
+
+def test_file_exporter_size_rotation(tmp_path):
+    exporter = FileSpanExporter(tmp_path, max_bytes=1)
+    write_sample_trace(exporter, "trace_1")
+    exporter.close()
+
+    # Every export call goes to a fresh file once the limit is passed
+    assert len(os.listdir(tmp_path)) == 2
+
+
+def test_file_exporter_time_rotation(tmp_path):
+    exporter = FileSpanExporter(tmp_path, max_bytes=None, max_age=60)
+    with patch("time.monotonic", return_value=1000.0):
+        exporter.export([make_trace("trace_1", "wf")])
+    with patch("time.monotonic", return_value=1030.0):
+        exporter.export([make_trace("trace_2", "wf")])
+    with patch("time.monotonic", return_value=1061.0):
+        exporter.export([make_trace("trace_3", "wf")])
+    exporter.close()
+
+    assert len(os.listdir(tmp_path)) == 2
+
+
+def test_analyze_latency_critical_path_and_tokens(tmp_path):
+    exporter = FileSpanExporter(tmp_path)
+    write_sample_trace(exporter, "trace_1")
+    exporter.close()
+    exporter = FileSpanExporter(tmp_path, compress=True)
+    write_sample_trace(exporter, "trace_2", offset=20.0)
+    exporter.close()
+
+    analysis = analyze_files([tmp_path])
+
+    assert analysis.files == 2
+    assert analysis.traces == 2
+    assert analysis.spans == 8
+    assert analysis.workflow_latency["Weather workflow"].count == 2
+    assert analysis.workflow_latency["Weather workflow"].max == 10.0
+    assert analysis.span_type_latency["function"].percentiles[50] == 6.0
+    assert analysis.span_name_latency["agent:Weather agent"].count == 2
+
+    [path] = analysis.critical_paths["Weather workflow"]
+    assert path.path == ("agent:Weather agent", "function:get_weather", "generation:gpt-4o")
+    assert path.latency.count == 2
+
+    tokens = analysis.tokens_by_model["gpt-4o"]
+    assert (tokens.generations, tokens.input_tokens, tokens.output_tokens) == (4, 34, 16)
+    assert "function:get_weather" in format_report(analysis)
+
+
+def test_analyze_skips_malformed_lines(tmp_path):
+    (tmp_path / "traces-bad.jsonl").write_text('{"object": "trace", "id": "t"}\nnot json\n\n')
+    analysis = analyze_files([tmp_path])
+    assert analysis.traces == 1
+    assert analysis.malformed_lines == 1
+
+
+def test_analyze_reads_compressed_files_that_are_still_being_written(tmp_path):
+    exporter = FileSpanExporter(tmp_path, compress=True)
+    write_sample_trace(exporter, "trace_1")
+    # The exporter still has the file open, so it doesn't have an end-of-stream marker yet
+    assert analyze_files([tmp_path]).files == 1
+    exporter.close()
+
+    # A file that ends part way through still yields every complete line
+    [name] = os.listdir(tmp_path)
+    data = (tmp_path / name).read_bytes()
+    (tmp_path / name).write_bytes(data[:-8])
+    analysis = analyze_files([tmp_path])
+    assert (analysis.traces, analysis.spans) == (1, 4)
+
+
+def test_batch_processor_shutdown_finishes_the_compressed_file(tmp_path):
+    exporter = FileSpanExporter(tmp_path, compress=True)
+    processor = BatchTraceProcessor(exporter)
+    processor.on_trace_start(make_trace("trace_1", "Weather workflow"))
+    processor.shutdown()
+
+    [name] = os.listdir(tmp_path)
+    with gzip.open(tmp_path / name, "rt") as f:
+        assert len(f.read().splitlines()) == 1
+
+
+def test_latency_stats_percentiles():
+    stats = latency_stats([float(i) for i in range(1, 101)])
+    assert stats.percentiles == {50: 50.0, 90: 90.0, 95: 95.0, 99: 99.0}
+    assert latency_stats([]).count == 0
+
+
+def test_analyze_cli_json(tmp_path, capsys):
+    exporter = FileSpanExporter(tmp_path)
+    write_sample_trace(exporter, "trace_1")
+    exporter.close()
+
+    assert main(["--json", str(tmp_path)]) == 0
+    output = json.loads(capsys.readouterr().out)
+    assert output["total_tokens"]["input_tokens"] == 17
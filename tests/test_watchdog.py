@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+from agents import Agent, EventLoopWatchdog, Runner, function_tool
+from agents.tracing.span_data import FunctionSpanData
+from agents.watchdog import _culprits, _watched_threads, blocking_call
+
+from .fake_model import FakeModel
+from .test_metrics import sample_value
+from .test_responses import get_function_tool_call, get_text_message
+from .testing_processor import fetch_ordered_spans
+
+
+@function_tool
+def blocking_tool() -> str:
+    time.sleep(0.3)
+    return "done"
+
+
+@pytest.mark.asyncio
+async def test_stall_in_sync_tool_is_attached_to_function_span():
+    model = FakeModel(tracing_enabled=True)
+    model.add_multiple_turn_outputs(
+        [[get_function_tool_call("blocking_tool")], [get_text_message("done")]]
+    )
+    agent = Agent(name="test", model=model, tools=[blocking_tool])
+
+    async with EventLoopWatchdog(threshold=0.1, interval=0.01) as watchdog:
+        await Runner.run(agent, input="hi")
+        await asyncio.sleep(0.05)
+
+    [stall] = watchdog.stalls
+    assert stall.culprit == "blocking_tool"
+    assert stall.blocked_for >= 0.25
+    assert "time.sleep" in stall.stack or "blocking_tool" in stall.stack
+
+    [function_span] = [
+        s for s in fetch_ordered_spans() if isinstance(s.span_data, FunctionSpanData)
+    ]
+    error = function_span.error
+    assert error is not None
+    assert error["message"] == "Event loop blocked by blocking_tool"
+    assert error["data"] is not None
+    assert error["data"]["culprit"] == "blocking_tool"
+
+    registry = watchdog.metrics.registry
+    assert sample_value(registry, "agents_event_loop_stalls_total", culprit="blocking_tool") == 1
+    assert (sample_value(registry, "agents_event_loop_lag_seconds_count") or 0) >= 1
+
+
+@pytest.mark.asyncio
+async def test_unmarked_stall_reports_innermost_function():
+    def busy_wait():
+        time.sleep(0.2)
+
+    async with EventLoopWatchdog(threshold=0.05, interval=0.01) as watchdog:
+        await asyncio.sleep(0.02)
+        busy_wait()
+        await asyncio.sleep(0.02)
+
+    [stall] = watchdog.stalls
+    assert stall.culprit.startswith("busy_wait (")
+    assert stall.span is None
+    registry = watchdog.metrics.registry
+    assert sample_value(registry, "agents_event_loop_stalls_total", culprit="unmarked") == 1
+
+
+@pytest.mark.asyncio
+async def test_no_stalls_when_loop_is_responsive():
+    async with EventLoopWatchdog(threshold=0.1, interval=0.01) as watchdog:
+        for _ in range(10):
+            await asyncio.sleep(0.01)
+
+    assert not watchdog.stalls
+    assert (sample_value(watchdog.metrics.registry, "agents_event_loop_lag_seconds_count") or 0) > 0
+
+
+@pytest.mark.asyncio
+async def test_blocking_call_is_noop_without_watchdog():
+    with blocking_call("tool"):
+        assert not _culprits
+
+    watchdog = EventLoopWatchdog()
+    watchdog.start()
+    with blocking_call("tool"):
+        assert [name for name, _ in _culprits.values()] == ["tool"]
+    watchdog.stop()
+    assert not _watched_threads